@@ -100,6 +100,20 @@ cems_states = {k: v for k, v in us_states.items() if v not in
                 'Virgin Islands'}
                }
 
+# EPA CEMS reports times in local standard time (i.e. ignoring daylight savings
+# time). These are the standard time UTC offsets, in hours, used to convert
+# them to UTC. States which span more than one time zone are given the offset
+# of the zone which covers most of the state.
+epacems_utc_offsets = {
+    'AL': -6, 'AR': -6, 'AZ': -7, 'CA': -8, 'CO': -7, 'CT': -5, 'DC': -5,
+    'DE': -5, 'FL': -5, 'GA': -5, 'IA': -6, 'ID': -7, 'IL': -6, 'IN': -5,
+    'KS': -6, 'KY': -5, 'LA': -6, 'MA': -5, 'MD': -5, 'ME': -5, 'MI': -5,
+    'MN': -6, 'MO': -6, 'MS': -6, 'MT': -7, 'NC': -5, 'ND': -6, 'NE': -6,
+    'NH': -5, 'NJ': -5, 'NM': -7, 'NV': -8, 'NY': -5, 'OH': -5, 'OK': -6,
+    'OR': -8, 'PA': -5, 'RI': -5, 'SC': -5, 'SD': -6, 'TN': -6, 'TX': -6,
+    'UT': -7, 'VA': -5, 'VT': -5, 'WA': -8, 'WI': -6, 'WV': -5, 'WY': -7,
+}
+
 travis_ci_ferc1_years = [2012, 2016, ]
 travis_ci_eia860_years = [2012, 2016, ]
 travis_ci_eia923_years = [2016, ]
@@ -3201,3 +3215,12 @@ need_fix_inting = {
     'plants_pumped_storage_ferc1': ['construction_year', 'installation_year'],
     'hourly_emissions_epacems': ['facility_id', 'unit_id_epa'],
 }
+
+# Tables which are loaded into postgres using the binary COPY format, which
+# is encoded straight from the numpy arrays, rather than via CSV text. Tables
+# that aren't listed here are loaded from CSV. The binary format can't be
+# used for tables with NUMERIC columns. None are loaded in binary by default:
+# tables are opted in with the copy_formats argument of pudl.init.init_db
+# (the copy_formats setting in settings.yml), e.g.
+# {'hourly_emissions_epacems': 'binary'}.
+copy_formats = {}
@@ -11,11 +11,18 @@ Support for selectively downloading portions of the EPA's large Continuous
 Emissions Monitoring System dataset will be added in the future.
 """
 
+import ftplib
 import os
-import urllib
+import urllib.error
+import urllib.parse
+import urllib.request
 import pudl.constants as pc
 from pudl.settings import SETTINGS
 
+# The ways a download can fail that are worth retrying (or at least reporting)
+# HTTP errors are a kind of URLError, which is a kind of OSError.
+_download_errors = (OSError, EOFError, ftplib.Error)
+
 
 def assert_valid_param(source, year, month=None, state=None, check_month=None):
     assert source in pc.data_sources, \
@@ -232,16 +239,380 @@ def paths_for_year(source, year=0, states=pc.cems_states.keys(),
     return paths
 
 
-def download(source, year, states, datadir=SETTINGS['data_dir'], verbose=True):
+class Downloader(object):
+    """
+    Download files concurrently, and keep a manifest of what's been fetched.
+
+    Files are downloaded by a pool of threads, with at most
+    connections_per_host connections open to any one server at a time. FTP
+    connections are kept open and reused for subsequent files from the same
+    server. Each file is first downloaded to a .part file next to its
+    destination, and if a download is interrupted it picks up where it left
+    off the next time (using an HTTP Range request or an FTP REST command).
+
+    The size and SHA-256 checksum of every completed download are recorded in
+    a JSON manifest at the top of the datastore, keyed by the path within the
+    datastore where the file ends up. A file whose size and checksum match
+    the manifest is present and intact, and doesn't need to be downloaded
+    again. Zipfiles which are already in the datastore but aren't in the
+    manifest (e.g. because they were downloaded before there was a manifest)
+    are added to it if they can be opened, so truncated zipfiles are fetched
+    again.
+
+    Use the Downloader as a context manager, so that the manifest is saved
+    and the connections are closed when it's finished with.
+    """
+
+    def __init__(self, datadir=SETTINGS['data_dir'], connections_per_host=4,
+                 max_workers=16, retries=2, blocksize=2**20, timeout=60,
+                 verbose=False):
+        """
+        Args:
+            datadir (str): path to the top level directory of the datastore,
+                which is where the manifest is kept.
+            connections_per_host (int): maximum number of connections open to
+                each server at any one time.
+            max_workers (int): maximum number of files being downloaded (or
+                checked) at the same time, across all servers.
+            retries (int): number of times to retry (and resume) a failed
+                download before giving up on it.
+            blocksize (int): number of bytes to read from the network and
+                write to disk at a time.
+            timeout (float): seconds to wait on an unresponsive connection.
+            verbose (bool): If True, print the name of each downloaded file.
+        """
+        import collections
+        import concurrent.futures
+        import threading
+        self.datadir = datadir
+        self.manifest_path = os.path.join(datadir, 'manifest.json')
+        self.connections_per_host = connections_per_host
+        self.retries = retries
+        self.blocksize = blocksize
+        self.timeout = timeout
+        self.verbose = verbose
+        self.manifest = self._read_manifest()
+        self._lock = threading.Lock()
+        self._host_slots = {}
+        self._ftp_connections = collections.defaultdict(list)
+        self._pool = concurrent.futures.ThreadPoolExecutor(max_workers)
+        self._stats = []
+        self._unsaved = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exception_type, exception_value, traceback):
+        self.close()
+
+    def close(self):
+        """Wait for any downloads, close the connections & save the manifest."""
+        self._pool.shutdown(wait=True)
+        for connections in self._ftp_connections.values():
+            for ftp in connections:
+                try:
+                    ftp.quit()
+                except Exception:
+                    ftp.close()
+        self._ftp_connections.clear()
+        self.save_manifest()
+
+    def _read_manifest(self):
+        import json
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path) as f:
+                return json.load(f)
+        return {}
+
+    def save_manifest(self):
+        """Write the manifest to disk, atomically replacing the old one."""
+        import json
+        with self._lock:
+            if not os.path.exists(self.datadir):
+                os.makedirs(self.datadir)
+            tmp_path = self.manifest_path + '.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump(self.manifest, f, indent=1, sort_keys=True)
+            os.replace(tmp_path, self.manifest_path)
+            self._unsaved = 0
+
+    def _key(self, path):
+        return os.path.relpath(path, self.datadir)
+
+    def _record(self, path, url, size, sha256):
+        """Add a file to the manifest, saving it every so often."""
+        with self._lock:
+            self.manifest[self._key(path)] = {
+                'url': url, 'size': size, 'sha256': sha256}
+            self._unsaved += 1
+            save = self._unsaved >= 100
+        if save:
+            self.save_manifest()
+
+    def verify(self, path, url=None):
+        """
+        Check whether a file in the datastore is complete and intact.
+
+        Args:
+            path (str): path to the file within the datastore.
+            url (str): where the file came from, in case it has to be added
+                to the manifest.
+        Returns:
+            bool: True if the file's size and checksum match the manifest.
+        """
+        import zipfile
+        if not os.path.isfile(path):
+            return False
+        with self._lock:
+            entry = self.manifest.get(self._key(path))
+        if entry is None:
+            # Downloaded before we had a manifest. A truncated zipfile is
+            # missing its central directory, so can't be opened.
+            if not path.endswith('.zip'):
+                return False
+            try:
+                with zipfile.ZipFile(path):
+                    pass
+            except zipfile.BadZipFile:
+                return False
+            self._record(path, url, os.path.getsize(path), _sha256(path))
+            return True
+        return (os.path.getsize(path) == entry['size'] and
+                _sha256(path) == entry['sha256'])
+
+    def _host_slot(self, host):
+        """The semaphore limiting the connections open to one server."""
+        import threading
+        with self._lock:
+            if host not in self._host_slots:
+                self._host_slots[host] = threading.BoundedSemaphore(
+                    self.connections_per_host)
+            return self._host_slots[host]
+
+    def fetch_all(self, src_urls, dest_files, manifest_files=None,
+                  clobber=False):
+        """
+        Download several URLs at the same time.
+
+        Args:
+            src_urls (list of str): the source URLs to download.
+            dest_files (list of str): the corresponding files to save.
+            manifest_files (list of str): where each of the files will live
+                in the datastore, if they're going to be moved there once
+                they've been downloaded. Files which are already present in
+                the datastore and match the manifest aren't downloaded again.
+                Defaults to dest_files.
+            clobber (bool): If True, download all of the files, even if
+                they're already present.
+        Returns:
+            list: The dest_files which were downloaded.
+
+        If a file cannot be downloaded, the program will issue a warning.
+        """
+        import warnings
+        if manifest_files is None:
+            manifest_files = dest_files
+        assert len(src_urls) == len(dest_files) == len(manifest_files)
+        futures = [
+            self._pool.submit(self._fetch_if_needed, src_url, dest_file,
+                              manifest_file, clobber)
+            for src_url, dest_file, manifest_file
+            in zip(src_urls, dest_files, manifest_files)]
+        downloaded = []
+        error_messages = []
+        for src_url, dest_file, future in zip(src_urls, dest_files, futures):
+            try:
+                if future.result():
+                    downloaded.append(dest_file)
+            except _download_errors as e:
+                error_messages.append(f"{src_url}: {e}")
+        if error_messages:
+            # Use warnings so this gets printed to stderr
+            warnings.warn(
+                f"Download failed for {len(error_messages)} URLs " +
+                f"after {self.retries} retries.\n" +
+                "Here are the failure messages:\n " +
+                " \n".join(error_messages))
+        return downloaded
+
+    def _fetch_if_needed(self, src_url, dest_file, manifest_file, clobber):
+        if not clobber and self.verify(manifest_file, url=src_url):
+            with self._lock:
+                self._stats.append({'url': src_url, 'bytes': 0,
+                                    'seconds': 0.0, 'resumed_from': 0,
+                                    'skipped': True})
+            return False
+        self.fetch(src_url, dest_file, manifest_file=manifest_file)
+        return True
+
+    def fetch(self, src_url, dest_file, manifest_file=None):
+        """
+        Download one URL, resuming a partial download if there is one.
+
+        Args:
+            src_url (str): the source URL to download.
+            dest_file (str): where to save it.
+            manifest_file (str): where the file will live in the datastore.
+                Defaults to dest_file.
+        """
+        if manifest_file is None:
+            manifest_file = dest_file
+        dest_dir = os.path.dirname(dest_file)
+        if dest_dir and not os.path.exists(dest_dir):
+            os.makedirs(dest_dir, exist_ok=True)
+        for attempt in range(self.retries + 1):
+            try:
+                return self._fetch_once(src_url, dest_file, manifest_file)
+            except _download_errors:
+                if attempt == self.retries:
+                    raise
+
+    def _fetch_once(self, src_url, dest_file, manifest_file):
+        import hashlib
+        import time
+        part_file = dest_file + '.part'
+        offset = 0
+        sha256 = hashlib.sha256()
+        if os.path.exists(part_file):
+            # Pick up where the last attempt left off.
+            offset = os.path.getsize(part_file)
+            _sha256(part_file, sha256=sha256)
+        parsed = urllib.parse.urlparse(src_url)
+        start_time = time.monotonic()
+        with self._host_slot(parsed.netloc):
+            if parsed.scheme == 'ftp':
+                offset, expected_size, sha256 = self._fetch_ftp(
+                    parsed, part_file, offset, sha256)
+            else:
+                offset, expected_size, sha256 = self._fetch_http(
+                    src_url, part_file, offset, sha256)
+        seconds = time.monotonic() - start_time
+        size = os.path.getsize(part_file)
+        if expected_size is not None and size != expected_size:
+            raise IOError(f"Downloaded {size} bytes of {src_url} but "
+                          f"expected {expected_size}.")
+        os.replace(part_file, dest_file)
+        self._record(manifest_file, src_url, size, sha256.hexdigest())
+        with self._lock:
+            self._stats.append({'url': src_url, 'bytes': size - offset,
+                                'seconds': seconds, 'resumed_from': offset,
+                                'skipped': False})
+        if self.verbose:
+            print(f"    {os.path.basename(dest_file)}")
+        return dest_file
+
+    def _write_response(self, read, part_file, offset, sha256):
+        """Append (or write) the blocks returned by read() to part_file."""
+        with open(part_file, 'ab' if offset else 'wb') as f:
+            for block in iter(lambda: read(self.blocksize), b''):
+                f.write(block)
+                sha256.update(block)
+
+    def _fetch_http(self, src_url, part_file, offset, sha256):
+        import hashlib
+        request = urllib.request.Request(src_url)
+        if offset:
+            request.add_header('Range', f'bytes={offset}-')
+        try:
+            response = urllib.request.urlopen(request, timeout=self.timeout)
+        except urllib.error.HTTPError as e:
+            if e.code != 416:  # Range Not Satisfiable
+                raise
+            # The partial file is bigger than the file on the server, which
+            # must have changed, so start again.
+            os.remove(part_file)
+            return self._fetch_http(src_url, part_file, 0, hashlib.sha256())
+        with response:
+            if offset and response.status != 206:
+                # The server ignored the Range, and is sending everything.
+                offset = 0
+                sha256 = hashlib.sha256()
+            length = response.headers.get('Content-Length')
+            expected_size = None if length is None else offset + int(length)
+            self._write_response(response.read, part_file, offset, sha256)
+        return offset, expected_size, sha256
+
+    def _fetch_ftp(self, parsed, part_file, offset, sha256):
+        import hashlib
+        ftp = self._ftp_connection(parsed.netloc)
+        try:
+            ftp.voidcmd('TYPE I')
+            try:
+                expected_size = ftp.size(parsed.path)
+            except ftplib.error_perm:
+                expected_size = None
+            if expected_size is not None and offset > expected_size:
+                offset = 0
+                sha256 = hashlib.sha256()
+            with open(part_file, 'ab' if offset else 'wb') as f:
+                def write(block):
+                    f.write(block)
+                    sha256.update(block)
+                ftp.retrbinary(f"RETR {parsed.path}", write,
+                               blocksize=self.blocksize, rest=offset or None)
+        except BaseException:
+            # Don't reuse a connection which might be in a bad state.
+            ftp.close()
+            raise
+        with self._lock:
+            self._ftp_connections[parsed.netloc].append(ftp)
+        return offset, expected_size, sha256
+
+    def _ftp_connection(self, host):
+        """Reuse an idle FTP connection to the host, or log in again."""
+        with self._lock:
+            if self._ftp_connections[host]:
+                return self._ftp_connections[host].pop()
+        hostname, _, port = host.partition(':')
+        ftp = ftplib.FTP(timeout=self.timeout)
+        ftp.connect(hostname, int(port) if port else 21)
+        login_result = ftp.login()
+        assert login_result.startswith("230"), \
+            f"Failed to login to {host}: {login_result}"
+        return ftp
+
+    def stats(self):
+        """
+        Describe the files which have been downloaded (or skipped).
+
+        Returns:
+            pandas.DataFrame: one row per file, with the URL, the number of
+            bytes downloaded, the seconds taken, the size of the partial
+            download it was resumed from, whether it was skipped because it
+            was already present, and the throughput in bytes per second.
+        """
+        import pandas as pd
+        with self._lock:
+            stats = pd.DataFrame(self._stats, columns=[
+                'url', 'bytes', 'seconds', 'resumed_from', 'skipped'])
+        stats['bytes_per_second'] = \
+            stats.bytes / stats.seconds.where(stats.seconds > 0)
+        return stats
+
+
+def _sha256(path, sha256=None, blocksize=2**20):
+    """Calculate (or update) the SHA-256 checksum of a file's contents."""
+    import hashlib
+    if sha256 is None:
+        sha256 = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(blocksize), b''):
+            sha256.update(block)
+    return sha256.hexdigest()
+
+
+def download(source, year, states, datadir=SETTINGS['data_dir'], verbose=True,
+             downloader=None, clobber=False):
     """
     Download the original data for the specified data source and year.
 
     Given a data source and the desired year of data, download the original
     data files from the appropriate federal website, and place them in a
-    temporary directory within the data store. This function does not do any
-    checking to see whether the file already exists, or needs to be updated,
-    and does not do any of the organization of the datastore after download,
-    it simply gets the requested file.
+    temporary directory within the data store. Files which are already
+    present in the datastore, and match the size and checksum recorded when
+    they were downloaded, aren't downloaded again (unless clobber is True).
+    This function does not do any of the organization of the datastore after
+    download, it simply gets the requested files.
 
     Args:
         source (str): the data source to retrieve. Must be one of: 'eia860',
@@ -253,8 +624,14 @@ def download(source, year, states, datadir=SETTINGS['data_dir'], verbose=True):
             function will download all the files for the specified year.
         datadir (str): path to the top level directory of the datastore.
         verbose (bool): If True, print messages about what's happening.
+        downloader (Downloader): the Downloader to fetch the files with,
+            which lets several sources and years share one pool of
+            connections. If None, a Downloader is created just for this call.
+        clobber (bool): If True, download the files even if they're already
+            present in the datastore.
     Returns:
-        outfile (str): path to the local downloaded file.
+        list: paths to the local downloaded files. Files which were already
+        present aren't included.
     """
     assert_valid_param(source=source, year=year, check_month=False)
 
@@ -262,7 +639,7 @@ def download(source, year, states, datadir=SETTINGS['data_dir'], verbose=True):
 
     # Ensure that the temporary download directory exists:
     if not os.path.exists(tmp_dir):
-        os.makedirs(tmp_dir)
+        os.makedirs(tmp_dir, exist_ok=True)
 
     if source == 'epacems':
         src_urls = [source_url(source, year, month=month, state=state)
@@ -270,127 +647,29 @@ def download(source, year, states, datadir=SETTINGS['data_dir'], verbose=True):
                     # month
                     for state in states
                     for month in range(1, 13)]
-        tmp_files = [os.path.join(tmp_dir, os.path.basename(f))
-                     for f in paths_for_year(source, year, states=states)]
     else:
         src_urls = [source_url(source, year)]
-        tmp_files = [os.path.join(
-            tmp_dir, os.path.basename(path(source, year)))]
+    dest_files = paths_for_year(source, year, states=states, datadir=datadir)
+    tmp_files = [os.path.join(tmp_dir, os.path.basename(f))
+                 for f in dest_files]
     if(verbose):
         if source != 'epacems':
             print(
                 f"Downloading {source} data for {year}...\n    {src_urls[0]}")
         else:
             print(f"Downloading {source} data for {year}...")
-    url_schemes = {urllib.parse.urlparse(url).scheme for url in src_urls}
-    # Pass all the URLs at once, rather than looping here, because that way
-    # we can use the same FTP connection for all of the src_urls
-    # (without going all the way to a global FTP cache)
-    if url_schemes == {"ftp"}:
-        _download_FTP(src_urls, tmp_files)
-    else:
-        _download_default(src_urls, tmp_files)
-    return tmp_files
-
-
-def _download_FTP(src_urls, tmp_files, allow_retry=True):
-    assert len(src_urls) == len(tmp_files) > 0
-    import ftplib
-    parsed_urls = [urllib.parse.urlparse(url) for url in src_urls]
-    domains = {url.netloc for url in parsed_urls}
-    within_domain_paths = [url.path for url in parsed_urls]
-    if len(domains) > 1:
-        # This should never be true, but it seems good to check
-        raise NotImplementedError(
-            "I don't yet know how to download from multiple domains")
-    domain = domains.pop()
-    ftp = ftplib.FTP(domain)
-    login_result = ftp.login()
-    assert login_result.startswith("230"), \
-        f"Failed to login to {domain}: {login_result}"
-    url_to_retry = []
-    tmp_to_retry = []
-    error_messages = []
-    for path, tmp_file, src_url in zip(within_domain_paths, tmp_files, src_urls):
-        with open(tmp_file, "wb") as f:
-            try:
-                ftp.retrbinary(f"RETR {path}", f.write)
-            except ftplib.all_errors as e:
-                error_messages.append(e)
-                url_to_retry.append(src_url)
-                tmp_to_retry.append(tmp_file)
-    # Now retry failures recursively
-    num_failed = len(url_to_retry)
-    if num_failed > 0:
-        if allow_retry and len(src_urls) == 1:
-            # If there was only one URL and it failed, retry once.
-            return _download_FTP(url_to_retry, tmp_to_retry, allow_retry=False)
-        elif allow_retry and src_urls != url_to_retry:
-            # If there were multiple URLs and at least one didn't fail,
-            # keep retrying until all fail or all succeed.
-            return _download_FTP(url_to_retry, tmp_to_retry, allow_retry=allow_retry)
-        if url_to_retry == src_urls:
-            err_msg = (
-                f"Download failed for all {num_failed} URLs. " +
-                "Maybe the server is down?\n" +
-                "Here are the failure messages:\n " +
-                " \n".join(error_messages)
-            )
-        if not allow_retry:
-            err_msg = (
-                f"Download failed for {num_failed} URLs and no more " +
-                "retries are allowed.\n" +
-                "Here are the failure messages:\n " +
-                " \n".join(error_messages)
-            )
-        import warnings  # Use warnings so this gets printed to stderr
-        warnings.warn(err_msg)
-
-
-def _download_default(src_urls, tmp_files, allow_retry=True):
-    """Download URLs to files. Designed to be called by `download` function.
-
-    Args:
-        src_urls (list of str): the source URLs to download.
-        tmp_files (list of str): the corresponding files to save.
-        allow_retry (bool): Should the function call itself again to
-            retry the download? (Default will try twice for a single file, or
-            until all files fail)
-    Returns:
-        None
-
-    If the file cannot be downloaded, the program will issue a warning.
-    """
-    assert len(src_urls) == len(tmp_files) > 0
-    url_to_retry = []
-    tmp_to_retry = []
-    for src_url, tmp_file in zip(src_urls, tmp_files):
-        try:
-            outfile, _ = urllib.request.urlretrieve(src_url, filename=tmp_file)
-        except urllib.error.URLError:
-            url_to_retry.append(src_url)
-            tmp_to_retry.append(tmp_to_retry)
-    # Now retry failures recursively
-    num_failed = len(url_to_retry)
-    if num_failed > 0:
-        if allow_retry and len(src_urls) == 1:
-            # If there was only one URL and it failed, retry once.
-            return _download_default(url_to_retry, tmp_to_retry, allow_retry=False)
-        elif allow_retry and src_urls != url_to_retry:
-            # If there were multiple URLs and at least one didn't fail,
-            # keep retrying until all fail or all succeed.
-            return _download_default(url_to_retry, tmp_to_retry, allow_retry=allow_retry)
-        if url_to_retry == src_urls:
-            err_msg = f"ERROR: Download failed for all {num_failed} URLs. Maybe the server is down?"
-        if not allow_retry:
-            err_msg = f"ERROR: Download failed for {num_failed} URLs and no more retries are allowed"
-        import warnings  # Use warnings so this gets printed to stderr
-        warnings.warn(err_msg)
+    if downloader is None:
+        with Downloader(datadir=datadir) as downloader:
+            return downloader.fetch_all(src_urls, tmp_files,
+                                        manifest_files=dest_files,
+                                        clobber=clobber)
+    return downloader.fetch_all(src_urls, tmp_files,
+                                manifest_files=dest_files, clobber=clobber)
 
 
 def organize(source, year, states, unzip=True,
              datadir=SETTINGS['data_dir'],
-             verbose=False, no_download=False):
+             verbose=False, no_download=False, newfiles=None):
     """
     Put a downloaded original data file where it belongs in the datastore.
 
@@ -409,6 +688,9 @@ def organize(source, year, states, unzip=True,
         datadir (str): path to the top level directory of the datastore.
         verbose (bool): If True, print messages about what's happening.
         no_download (bool): If True, the files were not downloaded in this run
+        newfiles (list): the downloaded files to move into the datastore, as
+            returned by download(). Defaults to all of the files for the
+            source and year.
 
     Returns: nothing
     """
@@ -426,16 +708,18 @@ def organize(source, year, states, unzip=True,
 
     tmpdir = os.path.join(datadir, 'tmp')
     # For non-CEMS, the newfiles and destfiles lists will have length 1.
-    newfiles = [os.path.join(tmpdir, os.path.basename(f))
-                for f in paths_for_year(source, year, states)]
-    destfiles = paths_for_year(
-        source, year, states, file=True, datadir=datadir)
+    if newfiles is None:
+        newfiles = [os.path.join(tmpdir, os.path.basename(f))
+                    for f in paths_for_year(source, year, states)]
+    destdir = path(source, year, file=False, datadir=datadir)
+    destfiles = [os.path.join(destdir, os.path.basename(f)) for f in newfiles]
 
     # If we've gotten to this point, we're wiping out the previous version of
     # the data for this source and year... so lets wipe it! Scary!
-    destdir = path(source, year, file=False, datadir=datadir)
+    # The EPA CEMS files are never unzipped, and are downloaded one state-month
+    # at a time, so only the files which were downloaded get replaced.
     if not no_download:
-        if os.path.exists(destdir):
+        if os.path.exists(destdir) and source != 'epacems':
             shutil.rmtree(destdir)
         # move the new file from wherever it is, to its rightful home.
         if not os.path.exists(destdir):
@@ -452,7 +736,7 @@ def organize(source, year, states, unzip=True,
     # except the CEMS, because they're really big and take up 92% less space.
     if(unzip and source != 'epacems'):
         # Unzip the downloaded file in its new home:
-        zip_ref = zipfile.ZipFile(destfile, 'r')
+        zip_ref = zipfile.ZipFile(destfiles[0], 'r')
         zip_ref.extractall(destdir)
         zip_ref.close()
         # Most of the data sources can just be unzipped in place and be done
@@ -470,18 +754,25 @@ def organize(source, year, states, unzip=True,
                     shutil.rmtree(td)
 
 
-def check_if_need_update(source, year, states, datadir, clobber, verbose):
+def check_if_need_update(source, year, states, datadir, clobber, verbose,
+                         downloader=None):
     """
     Do we really need to download the requested data? Only case in which
-    we don't have to do anything is when the downloaded file already exists
-    and clobber is False.
+    we don't have to do anything is when the downloaded file already exists,
+    matches the size and checksum it had when it was downloaded, and clobber
+    is False.
     """
     paths = paths_for_year(source=source, year=year, states=states,
                            datadir=datadir)
+    if downloader is None:
+        with Downloader(datadir=datadir) as downloader:
+            return check_if_need_update(source, year, states, datadir,
+                                        clobber, verbose,
+                                        downloader=downloader)
     need_update = False
     message = None
     for path in paths:
-        if os.path.exists(path):
+        if downloader.verify(path):
             if clobber:
                 message = f'{source} data for {year} already present, CLOBBERING.'
                 need_update = True
@@ -496,7 +787,7 @@ def check_if_need_update(source, year, states, datadir, clobber, verbose):
 
 
 def update(source, year, states, clobber=False, unzip=True, verbose=True,
-           datadir=SETTINGS['data_dir'], no_download=False):
+           datadir=SETTINGS['data_dir'], no_download=False, downloader=None):
     """
     Update the local datastore for the given source and year.
 
@@ -524,14 +815,25 @@ def update(source, year, states, clobber=False, unzip=True, verbose=True,
             that are already present. If False, do download the files. Either
             way, still obey the unzip and clobber settings. (unzip=False and
             no_download=True will do nothing.)
+        downloader (Downloader): the Downloader to fetch the files with. See
+            download() for details.
 
     Returns: nothing
     """
-    need_update = check_if_need_update(source=source, year=year, states=states,
-                                       datadir=datadir, clobber=clobber, verbose=verbose)
-    if need_update:
-        # Otherwise we're downloading:
-        if not no_download:
-            download(source, year, states, datadir=datadir, verbose=verbose)
+    if no_download:
+        need_update = check_if_need_update(
+            source=source, year=year, states=states, datadir=datadir,
+            clobber=clobber, verbose=verbose, downloader=downloader)
+        if need_update:
+            organize(source, year, states, unzip=unzip, datadir=datadir,
+                     verbose=verbose, no_download=no_download)
+        return
+    # download() skips the files which are already present and intact.
+    newfiles = download(source, year, states, datadir=datadir,
+                        verbose=verbose, downloader=downloader,
+                        clobber=clobber)
+    if newfiles:
         organize(source, year, states, unzip=unzip, datadir=datadir,
-                 verbose=verbose, no_download=no_download)
+                 verbose=verbose, newfiles=newfiles)
+    elif verbose:
+        print(f'{source} data for {year} already present, skipping.')
@@ -0,0 +1,259 @@
+"""
+Cache the DataFrames parsed from the EIA spreadsheets on disk.
+
+Parsing the EIA 860 and EIA 923 Excel workbooks is by far the slowest part of
+extracting them, but the workbooks only change once a year. This module
+stores each (source, year, page) DataFrame the first time it's parsed, and
+reads it back on later runs.
+
+Each cached frame is keyed by the SHA-256 of the workbook it came from, and
+by the parameters used to read it (the sheet, the number of rows skipped, and
+the column map from pudl.constants), so a cached frame is never used once the
+workbook or the mapping has changed. Frames are stored as Parquet files when
+they survive the round trip exactly, and pickled otherwise (e.g. when a raw
+column mixes numbers and strings).
+"""
+
+import hashlib
+import os
+import pickle
+import numpy as np
+import pandas as pd
+
+# Increment this to invalidate all the cached frames, e.g. when the code that
+# reads the spreadsheets changes the frames it produces.
+CACHE_VERSION = 1
+
+# The SHA-256 of each workbook, keyed by (path, size, modification time), so
+# that each workbook is only hashed once per process.
+_workbook_checksums = {}
+
+
+def workbook_checksum(path):
+    """Calculate the SHA-256 checksum of a workbook (once per process)."""
+    stat = os.stat(path)
+    memo_key = (os.path.abspath(path), stat.st_size, stat.st_mtime)
+    if memo_key not in _workbook_checksums:
+        sha256 = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(2**20), b''):
+                sha256.update(block)
+        _workbook_checksums[memo_key] = sha256.hexdigest()
+    return _workbook_checksums[memo_key]
+
+
+def _canonical(value):
+    """Turn the read parameters into something with a stable repr()."""
+    if isinstance(value, dict):
+        return sorted(((_canonical(k), _canonical(v))
+                       for k, v in value.items()), key=repr)
+    if isinstance(value, (list, tuple)):
+        return [_canonical(v) for v in value]
+    if isinstance(value, np.integer):
+        return int(value)
+    if isinstance(value, np.floating):
+        return float(value)
+    return value
+
+
+class ExtractCache(object):
+    """
+    An on-disk cache of the pages parsed from one source's spreadsheets.
+
+    The cache only holds one version of each (year, page): storing a frame
+    removes any frames cached for that year and page under different keys.
+    The numbers of hits and misses are kept, so that they can be reported.
+    """
+
+    def __init__(self, cache_dir, source):
+        """
+        Args:
+            cache_dir (str): Directory in which the cached frames are kept.
+                Each source gets its own subdirectory.
+            source (str): The data source, e.g. 'eia923'.
+        """
+        self.cache_dir = os.path.join(cache_dir, source)
+        self.source = source
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, workbook, params):
+        """
+        The cache key for a page read from a workbook with some parameters.
+
+        Args:
+            workbook (str): Path to the workbook.
+            params: Anything else which determines the DataFrame read from
+                the workbook, e.g. the sheet, skiprows and column map.
+        Returns:
+            str: A hex digest identifying the DataFrame.
+        """
+        description = repr((CACHE_VERSION, workbook_checksum(workbook),
+                            _canonical(params)))
+        return hashlib.sha256(description.encode()).hexdigest()[:32]
+
+    def _prefix(self, year, page):
+        return f"{year}_{page}_"
+
+    def _path(self, year, page, key, ext):
+        return os.path.join(self.cache_dir,
+                            f"{self._prefix(year, page)}{key}.{ext}")
+
+    def load(self, year, page, workbook, params):
+        """
+        Read a cached page, if there is an up to date one.
+
+        Returns:
+            pandas.DataFrame: The cached frame, or None if there isn't one.
+        """
+        key = self.key(workbook, params)
+        parquet_path = self._path(year, page, key, 'parquet')
+        pickle_path = self._path(year, page, key, 'pkl')
+        if os.path.exists(parquet_path):
+            df = _read_parquet(parquet_path)
+        elif os.path.exists(pickle_path):
+            with open(pickle_path, 'rb') as f:
+                df = pickle.load(f)
+        else:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return df
+
+    def store(self, year, page, workbook, params, df):
+        """Cache a page, replacing any older version of it."""
+        key = self.key(workbook, params)
+        if not os.path.exists(self.cache_dir):
+            os.makedirs(self.cache_dir, exist_ok=True)
+        prefix = self._prefix(year, page)
+        for filename in os.listdir(self.cache_dir):
+            if filename.startswith(prefix):
+                os.remove(os.path.join(self.cache_dir, filename))
+        parquet_path = self._path(year, page, key, 'parquet')
+        if _write_parquet(df, parquet_path):
+            return
+        pickle_path = self._path(year, page, key, 'pkl')
+        tmp_path = pickle_path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(df, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, pickle_path)
+
+    def get(self, year, page, workbook, params, read):
+        """
+        Read a page from the cache, or parse it and cache it.
+
+        Args:
+            year (int): The year of data.
+            page (str): The page of the source.
+            workbook (str): Path to the workbook the page comes from.
+            params: The parameters used to read the page. See key().
+            read (callable): Called with no arguments to parse the page if it
+                isn't in the cache.
+        Returns:
+            pandas.DataFrame: The page.
+        """
+        df = self.load(year, page, workbook, params)
+        if df is None:
+            df = read()
+            self.store(year, page, workbook, params, df)
+        return df
+
+    def report(self):
+        """Print how many of the pages were found in the cache."""
+        print(f"    {self.source} extract cache: {self.hits} hits, "
+              f"{self.misses} misses.")
+
+
+class LazyExcelFiles(dict):
+    """
+    Excel workbooks, keyed by year, which are only opened when they're used.
+
+    When all of a workbook's pages are in the cache, there's no need to open
+    it at all.
+    """
+
+    def __init__(self, paths):
+        """
+        Args:
+            paths (dict): The path to each year's workbook, keyed by year.
+        """
+        super().__init__()
+        self.paths = paths
+
+    def __missing__(self, year):
+        self[year] = pd.ExcelFile(self.paths[year])
+        return self[year]
+
+
+# The metadata key listing the positions of the object columns, and of those
+# whose nulls were NaN. Arrow may read strings back with a string dtype, and
+# reads string nulls back as None, so both have to be put back.
+_OBJECT_COLUMNS_KEY = b'pudl.object_columns'
+
+
+def _read_parquet(path):
+    import json
+    import pyarrow.parquet as pq
+    table = pq.read_table(path)
+    df = table.to_pandas()
+    metadata = table.schema.metadata or {}
+    object_columns = json.loads(metadata.get(_OBJECT_COLUMNS_KEY, b'{}'))
+    for i in object_columns.get('object', []):
+        df.isetitem(i, df.iloc[:, i].astype(object))
+    for i in object_columns.get('nan', []):
+        col = df.iloc[:, i]
+        df.isetitem(i, col.where(col.notnull(), np.nan))
+    return df
+
+
+def _write_parquet(df, path):
+    """
+    Write a DataFrame to Parquet, if it'll be read back exactly.
+
+    Returns:
+        bool: True if the frame was written, False if it has to be cached
+        some other way.
+    """
+    import json
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        return False
+    object_columns = {'object': [], 'nan': []}
+    for i, (_, col) in enumerate(df.items()):
+        if col.dtype == object:
+            object_columns['object'].append(i)
+            if col.isnull().any():
+                object_columns['nan'].append(i)
+    tmp_path = path + '.tmp'
+    try:
+        table = pa.Table.from_pandas(df)
+        metadata = dict(table.schema.metadata or {})
+        metadata[_OBJECT_COLUMNS_KEY] = json.dumps(object_columns).encode()
+        pq.write_table(table.replace_schema_metadata(metadata), tmp_path)
+        identical = _identical(df, _read_parquet(tmp_path))
+    except (pa.ArrowException, TypeError, ValueError):
+        identical = False
+    if not identical:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return False
+    os.replace(tmp_path, path)
+    return True
+
+
+def _identical(df, other):
+    """Whether two frames have the same labels, dtypes, values and nulls."""
+    if not (df.columns.equals(other.columns) and
+            df.index.equals(other.index) and
+            df.dtypes.equals(other.dtypes) and
+            df.equals(other)):
+        return False
+    # DataFrame.equals() doesn't distinguish None from NaN, or 1 from 1.0 in
+    # an object column, so check the types of the values too.
+    for (_, col), (_, other_col) in zip(df.items(), other.items()):
+        if col.dtype == object and not (
+                col.map(type).values == other_col.map(type).values).all():
+            return False
+    return True
@@ -9,8 +9,10 @@ This code is for use analyzing EIA Form 860 data.
 import pandas as pd
 import os.path
 import glob
+import time
 from pudl.settings import SETTINGS
 import pudl.constants as pc
+import pudl.extract.cache
 
 ###########################################################################
 # Helper functions & other objects to ingest & process Energy Information
@@ -134,9 +136,41 @@ def get_eia860_column_map(page, year):
     return (sheet_name, skiprows, column_map)
 
 
+def read_eia860_sheet(page, year, eia860_xlsx):
+    """
+    Read one page of one year of EIA860 data, and standardize its columns.
+
+    Args:
+        page (str): The string label indicating which page of the EIA860 we
+            are attempting to read in.
+        year (int): The year of data being read.
+        eia860_xlsx (pandas.ExcelFile or str): The EIA860 workbook containing
+            that page for that year, or the path to it.
+
+    Returns:
+        pandas.DataFrame: The page's data, with canonical column names.
+    """
+    sheet_name, skiprows, column_map = get_eia860_column_map(page, year)
+    newdata = pd.read_excel(eia860_xlsx,
+                            sheet_name=sheet_name,
+                            skiprows=skiprows)
+    # Clean column names: lowercase, underscores instead of white space,
+    # no non-alphanumeric characters
+    newdata.columns = newdata.columns.str.replace('[^0-9a-zA-Z]+', ' ',
+                                                  regex=True)
+    newdata.columns = newdata.columns.str.strip().str.lower()
+    newdata.columns = newdata.columns.str.replace(' ', '_')
+
+    # boiler_generator_assn tab is missing a YEAR column. Add it!
+    if 'report_year' not in newdata.columns:
+        newdata['report_year'] = year
+
+    return newdata.rename(columns=column_map)
+
+
 def get_eia860_page(page, eia860_xlsx,
                     years=pc.working_years['eia860'],
-                    verbose=True):
+                    verbose=True, cache=None):
     """
     Read a single table from several years of EIA860 data. Return a DataFrame.
 
@@ -147,11 +181,34 @@ def get_eia860_page(page, eia860_xlsx,
             - 'boiler_generator_assn'
 
       years (list): The set of years to read into the dataframe.
+      cache (pudl.extract.cache.ExtractCache): If not None, the yearly pages
+        are read from this cache when they're up to date, and stored in it
+        when they aren't. eia860_xlsx must then be a
+        pudl.extract.cache.LazyExcelFiles, so the workbooks can be checked.
 
     Returns:
         pandas.DataFrame: A dataframe containing the data from the selected
             page and selected years from EIA 860.
     """
+    _check_eia860_page(page, years)
+    if verbose:
+        print('Converting EIA 860 {} to DataFrame...'.format(page))
+
+    yearly_dfs = []
+    for yr in years:
+        if cache is None:
+            yearly_dfs.append(read_eia860_sheet(page, yr, eia860_xlsx[yr]))
+        else:
+            yearly_dfs.append(cache.get(
+                yr, page, eia860_xlsx.paths[yr],
+                get_eia860_column_map(page, yr),
+                lambda yr=yr: read_eia860_sheet(page, yr, eia860_xlsx[yr])))
+    if not yearly_dfs:
+        return pd.DataFrame()
+    return pd.concat(yearly_dfs)
+
+
+def _check_eia860_page(page, years):
     if years:
         assert min(years) >= min(pc.working_years['eia860']),\
             "EIA860 works for 2011 and later. {} requested.".format(min(years))
@@ -161,34 +218,10 @@ def get_eia860_page(page, eia860_xlsx,
             "The generators_eia860 table only works when years include 2012 and\
             before."
 
-    if verbose:
-        print('Converting EIA 860 {} to DataFrame...'.format(page))
-
-    df = pd.DataFrame()
-    for yr in years:
-        sheet_name, skiprows, column_map = get_eia860_column_map(page, yr)
-        newdata = pd.read_excel(eia860_xlsx[yr],
-                                sheet_name=sheet_name,
-                                skiprows=skiprows)
-        # Clean column names: lowercase, underscores instead of white space,
-        # no non-alphanumeric characters
-        newdata.columns = newdata.columns.str.replace('[^0-9a-zA-Z]+', ' ')
-        newdata.columns = newdata.columns.str.strip().str.lower()
-        newdata.columns = newdata.columns.str.replace(' ', '_')
-
-        # boiler_generator_assn tab is missing a YEAR column. Add it!
-        if 'report_year' not in newdata.columns:
-            newdata['report_year'] = yr
-
-        newdata = newdata.rename(columns=column_map)
-
-        df = df.append(newdata)
-    return df
-
 
 def create_dfs_eia860(files=pc.files_eia860,
                       eia860_years=pc.working_years['eia860'],
-                      verbose=True):
+                      verbose=True, cache=None):
     """
     Create a dictionary of pages (keys) to dataframes (values) from eia860
     tabs.
@@ -196,23 +229,31 @@ def create_dfs_eia860(files=pc.files_eia860,
     Args:
         a list of eia860 files
         a list of years
+        an optional pudl.extract.cache.ExtractCache for the pages
 
     Returns:
         dictionary of pages (key) to dataframes (values)
 
     """
     # Prep for ingesting EIA860
-    # Create excel objects
+    # Create excel objects. With a cache, they're only opened if some of
+    # their pages aren't cached.
     eia860_dfs = {}
     for f in files:
-        eia860_xlsx = get_eia860_xlsx(eia860_years, f, verbose=verbose)
+        if cache is None:
+            eia860_xlsx = get_eia860_xlsx(eia860_years, f, verbose=verbose)
+        else:
+            eia860_xlsx = pudl.extract.cache.LazyExcelFiles(
+                {yr: get_eia860_file(yr, pc.files_dict_eia860[f])
+                 for yr in eia860_years})
         # Create DataFrames
         pages = pc.file_pages_eia860[f]
 
         for page in pages:
             eia860_dfs[page] = get_eia860_page(page, eia860_xlsx,
                                                years=eia860_years,
-                                               verbose=verbose)
+                                               verbose=verbose,
+                                               cache=cache)
     return eia860_dfs
 
 
@@ -250,8 +291,134 @@ def get_eia860_plants(years, eia860_xlsx):
                              years=recent_years)
 
 
+def _read_eia860_workbook(pages, year, workbook):
+    """
+    Read several pages of one EIA 860 workbook in a worker, timing each.
+
+    The workbook is only opened and parsed once, however many of its pages
+    are read.
+
+    Returns:
+        tuple: The seconds taken to open the workbook, and a dict with a
+        (DataFrame, seconds) tuple for each page.
+    """
+    results = {}
+    start = time.monotonic()
+    with pd.ExcelFile(workbook) as xlsx:
+        open_seconds = time.monotonic() - start
+        for page in pages:
+            start = time.monotonic()
+            df = read_eia860_sheet(page, year, xlsx)
+            results[page] = (df, time.monotonic() - start)
+    return open_seconds, results
+
+
+def _print_timing(timings):
+    """Print how long each (file, year, page) took, slowest first."""
+    timings = timings.sort_values('seconds', ascending=False)
+    print("    EIA 860 read times:")
+    for row in timings.itertuples():
+        rows = '' if pd.isna(row.rows) else '{} rows'.format(row.rows)
+        print("        {:<12} {} {:<22} {:>13} {:>7.2f} s".format(
+            row.file, row.year, row.page, rows, row.seconds))
+
+
+def _extract_parallel(files, eia860_years, verbose, workers,
+                      max_open_workbooks=None, cache=None):
+    """
+    Read every (file, year, page) of EIA 860 in a pool of worker processes.
+
+    Each (file, year) workbook is read by a worker process which opens it
+    once, reads all of its pages that are needed, and closes it again, so
+    no more than max_open_workbooks workbooks are open (and in memory) at
+    once. The pages are put back together in the same order as the serial
+    extraction, so the results are identical. Pages which are already in the
+    cache aren't read by the workers at all.
+
+    Returns:
+        tuple: The raw DataFrames keyed by page, and a DataFrame with the
+        file, year, page, rows and seconds taken by each page read by the
+        workers. The time taken to open each workbook has a row of its own,
+        with the page '(open)' and no rows.
+    """
+    import concurrent.futures
+    for f in files:
+        for page in pc.file_pages_eia860[f]:
+            _check_eia860_page(page, eia860_years)
+    if max_open_workbooks is not None:
+        workers = min(workers, max_open_workbooks)
+    workbooks = {(f, yr): get_eia860_file(yr, pc.files_dict_eia860[f])
+                 for f in files for yr in eia860_years}
+    units = [(f, yr, page) for f in files for page in pc.file_pages_eia860[f]
+             for yr in eia860_years]
+    cached = {}
+    if cache is not None:
+        for f, yr, page in units:
+            df = cache.load(yr, page, workbooks[(f, yr)],
+                            get_eia860_column_map(page, yr))
+            if df is not None:
+                cached[(f, yr, page)] = df
+    timings = []
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {}
+        for (f, yr), workbook in workbooks.items():
+            pages = [page for page in pc.file_pages_eia860[f]
+                     if (f, yr, page) not in cached]
+            if pages:
+                futures[(f, yr)] = pool.submit(_read_eia860_workbook, pages,
+                                               yr, workbook)
+        eia860_dfs = {}
+        for f in files:
+            for page in pc.file_pages_eia860[f]:
+                if verbose:
+                    print('Converting EIA 860 {} to DataFrame...'.format(page))
+                yearly_dfs = []
+                for yr in eia860_years:
+                    if (f, yr, page) in cached:
+                        yearly_dfs.append(cached[(f, yr, page)])
+                        continue
+                    df, seconds = futures[(f, yr)].result()[1][page]
+                    timings.append((f, yr, page, len(df), seconds))
+                    if cache is not None:
+                        cache.store(yr, page, workbooks[(f, yr)],
+                                    get_eia860_column_map(page, yr), df)
+                    yearly_dfs.append(df)
+                eia860_dfs[page] = pd.concat(yearly_dfs)
+        for (f, yr), future in futures.items():
+            timings.append((f, yr, '(open)', None, future.result()[0]))
+    timings = pd.DataFrame(timings,
+                           columns=['file', 'year', 'page', 'rows', 'seconds'])
+    timings['rows'] = timings.rows.astype('Int64')
+    return eia860_dfs, timings
+
+
 def extract(eia860_years=pc.working_years['eia860'],
-            verbose=True):
+            verbose=True, cache_dir=None, workers=1,
+            max_open_workbooks=None):
+    """
+    Extract all EIA 860 tables.
+
+    Args:
+        eia860_years (list): The years of data to extract.
+        verbose (bool): Whether to print progress messages.
+        cache_dir (str): If not None, each (year, page) is cached under this
+            directory after it's been read, and later extractions read it
+            from there until the workbook or its column map changes. See
+            pudl.extract.cache.
+        workers (int): Number of processes used to read the spreadsheets.
+            With 1 (the default) they're read serially in this process. With
+            more, each (file, year) workbook is read by a worker process,
+            and the time taken to open each workbook and read each of its
+            pages is reported if verbose. If None, use one
+            worker per CPU.
+        max_open_workbooks (int): The most workbooks the worker processes
+            may have open at once, which bounds the memory they need. Each
+            worker has one open at a time, so this caps the number of
+            workers. Defaults to no limit beyond the number of workers.
+
+    Returns:
+        dict: The raw DataFrames, keyed by the name of the EIA 860 page.
+    """
     # Prep for ingesting EIA860
     # create raw 860 dfs from spreadsheets
     eia860_raw_dfs = {}
@@ -260,7 +427,21 @@ def extract(eia860_years=pc.working_years['eia860'],
             print('Not extracting EIA 860.')
         return eia860_raw_dfs
 
-    eia860_raw_dfs = create_dfs_eia860(files=pc.files_eia860,
-                                       eia860_years=eia860_years,
-                                       verbose=verbose)
+    cache = None
+    if cache_dir is not None:
+        cache = pudl.extract.cache.ExtractCache(cache_dir, 'eia860')
+    if workers is None:
+        workers = os.cpu_count()
+    if workers > 1:
+        eia860_raw_dfs, timings = _extract_parallel(
+            pc.files_eia860, eia860_years, verbose, workers,
+            max_open_workbooks=max_open_workbooks, cache=cache)
+        if verbose and not timings.empty:
+            _print_timing(timings)
+    else:
+        eia860_raw_dfs = create_dfs_eia860(files=pc.files_eia860,
+                                           eia860_years=eia860_years,
+                                           verbose=verbose, cache=cache)
+    if verbose and cache is not None:
+        cache.report()
     return eia860_raw_dfs
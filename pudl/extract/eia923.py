@@ -12,6 +12,8 @@ import os.path
 import glob
 from pudl.settings import SETTINGS
 import pudl.constants as pc
+import pudl.extract.cache
+import pudl.helpers
 
 ###########################################################################
 # Helper functions & other objects to ingest & process Energy Information
@@ -116,9 +118,83 @@ def get_eia923_column_map(page, year):
     return (sheet_name, skiprows, column_map)
 
 
+def read_eia923_sheet(page, year, eia923_xlsx):
+    """
+    Read one page of one year of EIA923 data, and standardize its columns.
+
+    This is the unit of work for the EIA 923 extraction. It's a module level
+    function so that it can be pickled and handed off to worker processes.
+
+    Args:
+        page (str): The string label indicating which page of the EIA923 we
+            are attempting to read in. See get_eia923_page for the options.
+        year (int): The year of data being read.
+        eia923_xlsx (pandas.ExcelFile or str): The EIA923 workbook for that
+            year, or the path to it.
+
+    Returns:
+        pandas.DataFrame: The page's data, with canonical column names, and
+            without the state index records.
+    """
+    sheet_name, skiprows, column_map = get_eia923_column_map(page, year)
+    newdata = pd.read_excel(eia923_xlsx,
+                            sheet_name=sheet_name,
+                            skiprows=skiprows)
+
+    # Clean column names: lowercase, underscores instead of white space,
+    # no non-alphanumeric characters
+    newdata.columns = newdata.columns.str.replace('[^0-9a-zA-Z]+', ' ',
+                                                  regex=True)
+    newdata.columns = newdata.columns.str.strip().str.lower()
+    newdata.columns = newdata.columns.str.replace(' ', '_')
+
+    # Drop columns that start with "reserved" because they are empty
+    to_drop = [c for c in newdata.columns if c[:8] == 'reserved']
+    newdata.drop(to_drop, axis=1, inplace=True)
+
+    # stocks tab is missing a YEAR column for some reason. Add it!
+    if page == 'stocks':
+        newdata['report_year'] = year
+
+    newdata = newdata.rename(columns=column_map)
+    if page == 'stocks':
+        newdata = newdata.rename(columns={
+            'unnamed_0': 'census_division_and_state'})
+
+    # Drop the fields with plant_id_eia 99999 or 999999.
+    # These are state index
+    if page != 'stocks':
+        newdata = newdata[~newdata.plant_id_eia.isin([99999, 999999])]
+
+    return newdata
+
+
+def _concat_eia923_years(yearly_dfs):
+    """Stack the yearly frames of a page, in the order they were read."""
+    if not yearly_dfs:
+        return pd.DataFrame()
+    # Concatenating once is equivalent to appending each year in turn (which
+    # is what we used to do) but doesn't copy everything once per year.
+    return pd.concat(yearly_dfs)
+
+
+def _read_eia923_sheets(page, years, eia923_xlsx, cache=None):
+    """Read a page from each year's workbook, or from the cache."""
+    yearly_dfs = []
+    for yr in years:
+        if cache is None:
+            yearly_dfs.append(read_eia923_sheet(page, yr, eia923_xlsx[yr]))
+        else:
+            yearly_dfs.append(cache.get(
+                yr, page, get_eia923_file(yr),
+                get_eia923_column_map(page, yr),
+                lambda yr=yr: read_eia923_sheet(page, yr, eia923_xlsx[yr])))
+    return _concat_eia923_years(yearly_dfs)
+
+
 def get_eia923_page(page, eia923_xlsx,
                     years=[2011, 2012, 2013, 2014, 2015, 2016],
-                    verbose=True):
+                    verbose=True, cache=None):
     """
     Read a single table from several years of EIA923 data. Return a DataFrame.
 
@@ -134,52 +210,25 @@ def get_eia923_page(page, eia923_xlsx,
             - 'plant_frame'
 
       years (list): The set of years to read into the dataframe.
+      cache (pudl.extract.cache.ExtractCache): If not None, the yearly pages
+        are read from this cache when they're up to date, and stored in it
+        when they aren't.
 
     Returns:
         pandas.DataFrame: A dataframe containing the data from the selected
             page and selected years from EIA 923.
     """
-    assert min(years) >= min(pc.working_years['eia923']),\
-        "EIA923 works for 2009 and later. {} requested.".format(min(years))
-    assert page in pc.tab_map_eia923.columns and page != 'year_index',\
-        "Unrecognized EIA 923 page: {}".format(page)
-
+    _check_eia923_page(page, years)
     if verbose:
         print('Converting EIA 923 {} to DataFrame...'.format(page))
-    df = pd.DataFrame()
-    for yr in years:
-        sheet_name, skiprows, column_map = get_eia923_column_map(page, yr)
-        newdata = pd.read_excel(eia923_xlsx[yr],
-                                sheet_name=sheet_name,
-                                skiprows=skiprows)
-
-        # Clean column names: lowercase, underscores instead of white space,
-        # no non-alphanumeric characters
-        newdata.columns = newdata.columns.str.replace('[^0-9a-zA-Z]+', ' ')
-        newdata.columns = newdata.columns.str.strip().str.lower()
-        newdata.columns = newdata.columns.str.replace(' ', '_')
+    return _read_eia923_sheets(page, years, eia923_xlsx, cache=cache)
 
-        # Drop columns that start with "reserved" because they are empty
-        to_drop = [c for c in newdata.columns if c[:8] == 'reserved']
-        newdata.drop(to_drop, axis=1, inplace=True)
 
-        # stocks tab is missing a YEAR column for some reason. Add it!
-        if page == 'stocks':
-            newdata['report_year'] = yr
-
-        newdata = newdata.rename(columns=column_map)
-        if page == 'stocks':
-            newdata = newdata.rename(columns={
-                'unnamed_0': 'census_division_and_state'})
-
-        # Drop the fields with plant_id_eia 99999 or 999999.
-        # These are state index
-        if page != 'stocks':
-            newdata = newdata[~newdata.plant_id_eia.isin([99999, 999999])]
-
-        df = df.append(newdata)
-
-    return df
+def _check_eia923_page(page, years):
+    assert min(years) >= min(pc.working_years['eia923']),\
+        "EIA923 works for 2009 and later. {} requested.".format(min(years))
+    assert page in pc.tab_map_eia923.columns and page != 'year_index',\
+        "Unrecognized EIA 923 page: {}".format(page)
 
 
 def get_eia923_xlsx(years, verbose=True):
@@ -229,50 +278,126 @@ def yearly_to_monthly_eia923(df, md):
         pandas.DataFrame: A dataframe containing the same data as was passed in
             via df, but with monthly records instead of annual records.
     """
-    # Pull out each month's worth of data, merge it with the common columns,
-    # rename columns to match the PUDL DB, add an appropriate month column,
-    # and insert it into the PUDL DB.
-    yearly = df.copy()
-    monthly = pd.DataFrame()
-
-    for m in md.keys():
-        # Grab just the columns for the month we're working on.
-        this_month = yearly.filter(regex=md[m])
-        # Drop this month's data from the yearly data frame.
-        yearly.drop(this_month.columns, axis=1, inplace=True)
-        # Rename this month's columns to get rid of the month reference.
-        this_month.columns = this_month.columns.str.replace(md[m], '')
-        # Add a numerical month column corresponding to this month.
-        this_month['month'] = m
-        # Add this month's data to the monthly DataFrame we're building.
-        monthly = pd.concat([monthly, this_month], sort=True)
-
-    # Merge the monthly data we've built up with the remaining fields in the
-    # data frame we started with -- all of which should be independent of the
-    # month, and apply across all 12 of the monthly records created from each
-    # of the # initial annual records.
-    return yearly.merge(monthly, left_index=True, right_index=True)
+    # Stack each month's worth of data into 12 records per annual record,
+    # alongside the common columns, in a single pass.
+    return pudl.helpers.unpivot_months(df, md, month_col='month')
+
+
+def _read_eia923_workbook(pages, year, workbook):
+    """
+    Read several pages of one year's EIA 923 workbook in a worker.
+
+    The workbook is only opened and parsed once, however many of its pages
+    are read.
+
+    Returns:
+        dict: The DataFrame of each page, as read by read_eia923_sheet.
+    """
+    with pd.ExcelFile(workbook) as xlsx:
+        return {page: read_eia923_sheet(page, year, xlsx) for page in pages}
+
+
+def _extract_parallel(pages, eia923_years, verbose, workers, cache=None):
+    """
+    Read every (year, page) of EIA 923 in a pool of worker processes.
+
+    Each year's workbook is read by a worker which opens it once, and
+    returns all of its pages that are needed with their columns already
+    standardized. The pages are put back together in the same page and year
+    order as the serial extraction, so the results are identical. Pages
+    which are already in the cache aren't read by the workers at all.
+    """
+    import concurrent.futures
+    for page in pages:
+        _check_eia923_page(page, eia923_years)
+    eia923_files = {yr: get_eia923_file(yr) for yr in eia923_years}
+    cached = {}
+    if cache is not None:
+        for page in pages:
+            for yr in eia923_years:
+                df = cache.load(yr, page, eia923_files[yr],
+                                get_eia923_column_map(page, yr))
+                if df is not None:
+                    cached[(page, yr)] = df
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {}
+        for yr in eia923_years:
+            uncached = [page for page in pages if (page, yr) not in cached]
+            if uncached:
+                futures[yr] = pool.submit(_read_eia923_workbook, uncached, yr,
+                                          eia923_files[yr])
+        eia923_raw_dfs = {}
+        for page in pages:
+            if verbose:
+                print('Converting EIA 923 {} to DataFrame...'.format(page))
+            yearly_dfs = []
+            for yr in eia923_years:
+                if (page, yr) in cached:
+                    yearly_dfs.append(cached[(page, yr)])
+                    continue
+                df = futures[yr].result()[page]
+                if cache is not None:
+                    cache.store(yr, page, eia923_files[yr],
+                                get_eia923_column_map(page, yr), df)
+                yearly_dfs.append(df)
+            eia923_raw_dfs[page] = _concat_eia923_years(yearly_dfs)
+    return eia923_raw_dfs
 
 
 def extract(eia923_years=pc.working_years['eia923'],
-            verbose=True):
-    """Extract all EIA 923 tables."""
+            verbose=True, workers=1, cache_dir=None):
+    """
+    Extract all EIA 923 tables.
+
+    Args:
+        eia923_years (list): The years of data to extract.
+        verbose (bool): Whether to print progress messages.
+        workers (int): Number of processes used to read the spreadsheets.
+            With 1 (the default) they're read serially in this process. With
+            more, each year's workbook is read by a worker process. If None,
+            use one worker per CPU.
+        cache_dir (str): If not None, each (year, page) is cached under this
+            directory after it's been read, and later extractions read it
+            from there until the workbook or its column map changes. See
+            pudl.extract.cache.
+
+    Returns:
+        dict: The raw DataFrames, keyed by the name of the EIA 923 page.
+    """
     eia923_raw_dfs = {}
     if not eia923_years:
         if verbose:
             print('Not extracting EIA 923.')
         return eia923_raw_dfs
 
-    # Prep for ingesting EIA923
-    # Create excel objects
-    eia923_xlsx = get_eia923_xlsx(eia923_years,
-                                  verbose=verbose)
-
-    # Create DataFrames
-    for page in pc.tab_map_eia923.columns:
-        if page != 'plant_frame':
+    pages = [page for page in pc.tab_map_eia923.columns
+             if page != 'plant_frame']
+    cache = None
+    if cache_dir is not None:
+        cache = pudl.extract.cache.ExtractCache(cache_dir, 'eia923')
+    if workers is None:
+        workers = os.cpu_count()
+    if workers > 1:
+        eia923_raw_dfs = _extract_parallel(pages, eia923_years, verbose,
+                                           workers, cache=cache)
+    else:
+        # Prep for ingesting EIA923
+        # Create excel objects. With a cache, they're only opened if some of
+        # their pages aren't cached.
+        if cache is None:
+            eia923_xlsx = get_eia923_xlsx(eia923_years,
+                                          verbose=verbose)
+        else:
+            eia923_xlsx = pudl.extract.cache.LazyExcelFiles(
+                {yr: get_eia923_file(yr) for yr in eia923_years})
+
+        # Create DataFrames
+        for page in pages:
             eia923_raw_dfs[page] = get_eia923_page(page, eia923_xlsx,
                                                    years=eia923_years,
-                                                   verbose=verbose)
+                                                   verbose=verbose,
+                                                   cache=cache)
 
+    if verbose and cache is not None:
+        cache.report()
     return eia923_raw_dfs
@@ -4,11 +4,107 @@ Retrieve data from EPA CEMS hourly zipped CSVs.
 This modules pulls data from EPA's published CSV files.
 """
 import glob
+import hashlib
+import io
 import os
 import pandas as pd
 import numpy as np
+import sqlalchemy as sa
 from pudl.settings import SETTINGS
 import pudl.constants as pc
+import pudl.models.epacems
+
+
+# Columns which are in the raw CSVs, but not in the HourlyEmissions model,
+# either because they're transformed into other columns, or dropped.
+_epacems_raw_only_dtypes = {
+    # A state-month file only has ~30 distinct dates, so read them as codes.
+    "op_date": "category",
+    "op_hour": np.int8,
+    # op_time becomes an interval, so it needs more precision than a REAL.
+    "op_time": np.float64,
+    "so2_rate_lbs_mmbtu": np.float32,
+    "so2_rate_measure_flg": "category",
+    "co2_rate_tons_mmbtu": np.float32,
+    "co2_rate_measure_flg": "category",
+}
+
+
+def _sqlalchemy_to_pandas_dtype(column):
+    """
+    Choose a compact pandas dtype for reading a column of the CEMS CSVs.
+
+    Enum columns are read as (unconstrained) categoricals, and get their full
+    set of categories later in encode_epacems_enums(). Nullable integer
+    columns have to be read as floats, because numpy integers can't hold NA.
+
+    Args:
+        column (sqlalchemy.Column): A column of the HourlyEmissions model.
+    Returns:
+        The dtype to use when reading the column with pandas.read_csv.
+    """
+    if isinstance(column.type, sa.Enum):
+        return "category"
+    if isinstance(column.type, sa.REAL):
+        return np.float32
+    if isinstance(column.type, sa.SmallInteger):
+        return np.float32 if column.nullable else np.int16
+    if isinstance(column.type, sa.Integer):
+        return np.float32 if column.nullable else np.int32
+    if isinstance(column.type, sa.String):
+        return "category"
+    return None
+
+
+def epacems_read_dtypes():
+    """
+    Build the read_csv dtype schema for the raw EPA CEMS CSV files.
+
+    The schema is derived from the HourlyEmissions model, and keyed by the
+    original EPA column names. Because EPA has used several different names
+    for the same column over the years, every name in the
+    pc.epacems_rename_dict is included, and pandas ignores the ones which
+    aren't present in any given file.
+
+    Returns:
+        dict: raw EPA column name => pandas dtype.
+    """
+    pudl_dtypes = dict(_epacems_raw_only_dtypes)
+    for column in pudl.models.epacems.HourlyEmissions.__table__.columns:
+        dtype = _sqlalchemy_to_pandas_dtype(column)
+        if dtype is not None:
+            pudl_dtypes[column.name] = dtype
+    return {raw_col: pudl_dtypes[pudl_col]
+            for raw_col, pudl_col in pc.epacems_rename_dict.items()
+            if pudl_col in pudl_dtypes}
+
+
+def encode_epacems_enums(df):
+    """
+    Give the enumerated CEMS columns the full set of allowed categories.
+
+    Using the same categories for every state-month DataFrame means they can
+    be concatenated without falling back to object columns. Values that
+    aren't allowed by the database Enum would be silently turned into NA by
+    the conversion, so we check for them first.
+
+    Args:
+        df (pandas.DataFrame): A CEMS DataFrame, with PUDL column names.
+    Returns:
+        The same DataFrame, with its enum columns as fixed categoricals.
+    """
+    for column in pudl.models.epacems.HourlyEmissions.__table__.columns:
+        if not isinstance(column.type, sa.Enum) or column.name not in df:
+            continue
+        categories = column.type.enums
+        if df[column.name].dtype.name != "category":
+            df[column.name] = df[column.name].astype("category")
+        unexpected = set(df[column.name].cat.categories) - set(categories)
+        assert not unexpected, (
+            f"Unexpected values in EPA CEMS column {column.name}: "
+            f"{unexpected}")
+        df[column.name] = df[column.name].cat.set_categories(categories)
+    return df
 
 
 def get_epacems_dir(year):
@@ -113,35 +209,405 @@ def drop_calculated_rates(df):
     return df
 
 
-def extract(epacems_years, states, verbose):
+def read_cems_csv(filename, typed=True):
     """
-    Extract the EPA CEMS hourly data.
+    Read one EPA CEMS state-month file and harmonize its columns.
 
-    This function is the main function of this file. It returns a generator
-    for extracted DataFrames.
+    This is the unit of work for the EPA CEMS extraction. It's a module level
+    function so that it can be pickled and handed off to worker processes.
+
+    Args:
+        filename (str): Path to a zipped EPA CEMS CSV file, or a file-like
+            object holding its contents (see read_epacems_zip).
+        typed (bool): If True (the default) read the file using the dtypes
+            from epacems_read_dtypes(), and encode the enumerated columns as
+            categoricals. If False, let pandas infer the types, which uses
+            roughly twice as much memory.
+    Returns:
+        pandas.DataFrame: The raw CEMS data, with PUDL column names, the
+        facility_id and unit_id_epa columns guaranteed to exist, and the
+        calculated rate columns removed.
     """
-    # TODO: this is really slow. Can we do some parallel processing?
-    if verbose:
-        print("Reading EPA CEMS data...")
+    if typed:
+        df = pd.read_csv(filename, dtype=epacems_read_dtypes(),
+                         compression='zip')
+    else:
+        df = pd.read_csv(filename, low_memory=False, compression='zip')
+    return _harmonize_cems_columns(df, typed)
+
+
+def read_cems_csv_chunks(filename, chunksize, typed=True):
+    """
+    Stream one EPA CEMS state-month file in chunks of rows.
+
+    The CSV is decompressed from the zipfile as it's parsed, so the memory
+    needed is bounded by the chunksize rather than by the size of the file.
+
+    Args:
+        filename (str): Path to a zipped EPA CEMS CSV file, or a file-like
+            object holding its contents (see read_epacems_zip).
+        chunksize (int): Number of rows in each chunk.
+        typed (bool): Whether to use the explicit dtypes. See read_cems_csv.
+    Returns:
+        generator: yields pandas.DataFrames of at most chunksize rows, each
+        harmonized just like the output of read_cems_csv.
+    """
+    if typed:
+        reader = pd.read_csv(filename, dtype=epacems_read_dtypes(),
+                             chunksize=chunksize, compression='zip')
+    else:
+        reader = pd.read_csv(filename, low_memory=False, chunksize=chunksize,
+                             compression='zip')
+    with reader:
+        for df in reader:
+            yield _harmonize_cems_columns(df, typed)
+
+
+def _harmonize_cems_columns(df, typed):
+    """Rename, add and drop the raw CEMS columns, and encode the enums."""
+    df = (
+        df.rename(columns=pc.epacems_rename_dict)
+        .pipe(add_facility_id_unit_id_epa)
+        .pipe(drop_calculated_rates)
+    )
+    if typed:
+        df = encode_epacems_enums(df)
+    return df
+
+
+def epacems_partitions(epacems_years, states):
+    """Generate the (year, month, state) partitions to extract, in order."""
     for year in epacems_years:
-        if verbose:
-            print("    {}...".format(year))
         # The keys of the us_states dictionary are the state abbrevs
         for state in states:
             for month in range(1, 13):
-                filename = get_epacems_file(year, month, state)
-
-                if verbose:
-                    print(f"        Extracting: {filename}")
-                # Return a dictionary where the key identifies this dataset
-                # (just like the other extract functions), but unlike the
-                # others, this is yielded as a generator (and it's a one-item
-                # dictionary).
-                # TODO: set types explicitly
-                df = (
-                    pd.read_csv(filename, low_memory=False)
-                    .rename(columns=pc.epacems_rename_dict)
-                    .pipe(add_facility_id_unit_id_epa)
-                    .pipe(drop_calculated_rates)
-                )
-                yield {(year, month, state): df}
+                yield (year, month, state)
+
+
+def get_epacems_checksum(filename, blocksize=2**20):
+    """
+    Calculate the SHA-256 checksum of an EPA CEMS zipfile.
+
+    Args:
+        filename (str): Path to an EPA CEMS zipfile.
+        blocksize (int): Number of bytes to read from the file at a time.
+    Returns:
+        str: The hex digest of the file's contents.
+    """
+    sha256 = hashlib.sha256()
+    with open(filename, 'rb') as f:
+        for block in iter(lambda: f.read(blocksize), b''):
+            sha256.update(block)
+    return sha256.hexdigest()
+
+
+def read_epacems_zip(filename):
+    """
+    Read an EPA CEMS zipfile into memory, and calculate its checksum.
+
+    The zipfile is small compared to the CSV inside it, so reading the whole
+    thing lets the same bytes be both hashed and parsed, rather than reading
+    the file twice.
+
+    Args:
+        filename (str): Path to an EPA CEMS zipfile.
+    Returns:
+        tuple: A file-like object holding the zipfile, which can be passed to
+        read_cems_csv or read_cems_csv_chunks, and the SHA-256 hex digest of
+        its contents.
+    """
+    with open(filename, 'rb') as f:
+        data = f.read()
+    return io.BytesIO(data), hashlib.sha256(data).hexdigest()
+
+
+def read_cems_csv_checksum(filename):
+    """Read one EPA CEMS file (see read_cems_csv), and its checksum."""
+    source, checksum = read_epacems_zip(filename)
+    return read_cems_csv(source), checksum
+
+
+def get_epacems_checksums(partitions, workers=1):
+    """
+    Calculate the checksums of the EPA CEMS files for several partitions.
+
+    Hashing releases the GIL, so with more than one worker the files are
+    hashed in a pool of threads.
+
+    Args:
+        partitions (iterable): (year, month, state) tuples.
+        workers (int): Number of files to hash at the same time.
+    Returns:
+        dict: The SHA-256 hex digest of each partition's file, keyed by the
+        (year, month, state) tuple.
+    """
+    partitions = list(partitions)
+    filenames = [get_epacems_file(*yr_mo_st) for yr_mo_st in partitions]
+    if workers is None or workers > 1:
+        import concurrent.futures
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as ex:
+            checksums = list(ex.map(get_epacems_checksum, filenames))
+    else:
+        checksums = [get_epacems_checksum(f) for f in filenames]
+    return dict(zip(partitions, checksums))
+
+
+def _print_progress(yr_mo_st, filename, year_starts):
+    """Print the year (once) and the name of each file as it's extracted."""
+    if yr_mo_st in year_starts:
+        print("    {}...".format(yr_mo_st[0]))
+    print(f"        Extracting: {filename}")
+
+
+def _year_starts(partitions):
+    """Find the first partition of each year, for the progress messages."""
+    starts = set()
+    previous_year = None
+    for yr_mo_st in partitions:
+        if yr_mo_st[0] != previous_year:
+            starts.add(yr_mo_st)
+            previous_year = yr_mo_st[0]
+    return starts
+
+
+def _extract_serial(partitions, verbose, chunksize=None, checksums=None):
+    """Read the EPA CEMS files one after another in this process."""
+    year_starts = _year_starts(partitions)
+    for yr_mo_st in partitions:
+        filename = get_epacems_file(*yr_mo_st)
+        if verbose:
+            _print_progress(yr_mo_st, filename, year_starts)
+        source = filename
+        if checksums is not None:
+            source, checksums[yr_mo_st] = read_epacems_zip(filename)
+        # Return a dictionary where the key identifies this dataset
+        # (just like the other extract functions), but unlike the
+        # others, this is yielded as a generator (and it's a one-item
+        # dictionary).
+        if chunksize is None:
+            yield {yr_mo_st: read_cems_csv(source)}
+        else:
+            for chunk in read_cems_csv_chunks(source, chunksize):
+                yield {yr_mo_st: chunk}
+
+
+def _extract_parallel(partitions, verbose, workers, max_in_flight,
+                      checksums=None):
+    """
+    Read the EPA CEMS files in a pool of worker processes.
+
+    Files are submitted to the pool in the same order as the serial
+    extraction, and the results are yielded back in that order too. At most
+    max_in_flight files are being read (or waiting to be consumed) at any
+    time, which caps the number of raw DataFrames held in memory while still
+    keeping all the workers busy.
+    """
+    import collections
+    import concurrent.futures
+
+    year_starts = _year_starts(partitions)
+    pending = collections.deque()
+    read = read_cems_csv if checksums is None else read_cems_csv_checksum
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+        try:
+            for yr_mo_st in partitions:
+                filename = get_epacems_file(*yr_mo_st)
+                if len(pending) >= max_in_flight:
+                    yield _collect_cems_future(pending.popleft(), year_starts,
+                                               verbose, checksums)
+                pending.append(
+                    (yr_mo_st, filename, pool.submit(read, filename)))
+            while pending:
+                yield _collect_cems_future(pending.popleft(), year_starts,
+                                           verbose, checksums)
+        finally:
+            # If the consumer stopped early, or a worker failed, don't bother
+            # reading the files that are still queued up.
+            for _, _, future in pending:
+                future.cancel()
+
+
+def _collect_cems_future(pending_item, year_starts, verbose, checksums=None):
+    """Wait for one submitted CEMS file and wrap it in a one-item dict."""
+    yr_mo_st, filename, future = pending_item
+    if verbose:
+        _print_progress(yr_mo_st, filename, year_starts)
+    if checksums is None:
+        return {yr_mo_st: future.result()}
+    df, checksums[yr_mo_st] = future.result()
+    return {yr_mo_st: df}
+
+
+# The chunk queues & stop event of a worker process doing chunked extraction,
+# set up by _init_cems_chunk_worker.
+_chunk_queues = None
+_chunk_stop = None
+
+
+def _init_cems_chunk_worker(chunk_queues, stop):
+    """Hand the chunk queues & stop event to a new worker process."""
+    global _chunk_queues, _chunk_stop
+    _chunk_queues, _chunk_stop = chunk_queues, stop
+    # If the extraction fails, the consumer stops reading the queues, and
+    # the worker mustn't hang on exit trying to flush chunks into them.
+    for chunk_queue in chunk_queues:
+        chunk_queue.cancel_join_thread()
+
+
+def _queue_cems_chunks(filename, chunksize, slot, checksum=False):
+    """
+    Read one CEMS file in chunks, and hand them over through a queue.
+
+    This is the unit of work for the chunked parallel extraction. The chunks
+    go straight to the consumer through the worker's chunk queue number slot
+    (see _init_cems_chunk_worker). The queue is bounded, so the worker waits
+    for the consumer to catch up rather than reading the whole file into
+    memory. A None on the queue marks the end of the file, whether or not it
+    was read successfully. With checksum, the file's checksum is returned
+    (see read_epacems_zip).
+    """
+    import queue
+    chunk_queue = _chunk_queues[slot]
+    source, file_checksum = filename, None
+    try:
+        if checksum:
+            source, file_checksum = read_epacems_zip(filename)
+        for chunk in read_cems_csv_chunks(source, chunksize):
+            while True:
+                if _chunk_stop.is_set():
+                    return None
+                try:
+                    chunk_queue.put(chunk, timeout=1)
+                    break
+                except queue.Full:
+                    pass
+    finally:
+        if not _chunk_stop.is_set():
+            chunk_queue.put(None)
+    return file_checksum
+
+
+def _extract_parallel_chunked(partitions, verbose, workers, max_in_flight,
+                              chunksize, checksums=None):
+    """
+    Stream the EPA CEMS files in chunks from a pool of worker processes.
+
+    Like _extract_parallel, but each worker passes its file back a chunk at a
+    time through a small bounded queue, so no process ever holds more than a
+    few chunks of any file in memory. There's one queue for each of the
+    max_in_flight files being read at once, and each chunk is pickled once,
+    going straight from the worker to this process. The chunks are yielded
+    in file order.
+    """
+    import collections
+    import concurrent.futures
+    import multiprocessing
+
+    year_starts = _year_starts(partitions)
+    pending = collections.deque()
+    chunk_queues = [multiprocessing.Queue(maxsize=2)
+                    for _ in range(max_in_flight)]
+    free_slots = collections.deque(range(max_in_flight))
+    stop = multiprocessing.Event()
+    with concurrent.futures.ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_cems_chunk_worker,
+            initargs=(chunk_queues, stop)) as pool:
+        try:
+            for yr_mo_st in partitions:
+                filename = get_epacems_file(*yr_mo_st)
+                if not free_slots:
+                    yield from _collect_cems_chunks(
+                        pending.popleft(), chunk_queues, free_slots,
+                        year_starts, verbose, checksums)
+                slot = free_slots.popleft()
+                future = pool.submit(_queue_cems_chunks, filename, chunksize,
+                                     slot, checksum=checksums is not None)
+                pending.append((yr_mo_st, filename, future, slot))
+            while pending:
+                yield from _collect_cems_chunks(
+                    pending.popleft(), chunk_queues, free_slots,
+                    year_starts, verbose, checksums)
+        finally:
+            # Let any workers which are waiting on a full queue give up.
+            stop.set()
+            for _, _, future, _ in pending:
+                future.cancel()
+
+
+def _collect_cems_chunks(pending_item, chunk_queues, free_slots, year_starts,
+                         verbose, checksums=None):
+    """Yield the chunks of one submitted CEMS file as one-item dicts."""
+    yr_mo_st, filename, future, slot = pending_item
+    if verbose:
+        _print_progress(yr_mo_st, filename, year_starts)
+    while True:
+        chunk = chunk_queues[slot].get()
+        if chunk is None:
+            break
+        yield {yr_mo_st: chunk}
+    # The whole file has come through, so its queue can be used again.
+    free_slots.append(slot)
+    # Raise the worker's exception, if it failed partway through the file.
+    file_checksum = future.result()
+    if checksums is not None:
+        checksums[yr_mo_st] = file_checksum
+
+
+def extract(epacems_years, states, verbose, workers=1, max_in_flight=None,
+            partitions=None, chunksize=None, checksums=None):
+    """
+    Extract the EPA CEMS hourly data.
+
+    This function is the main function of this file. It returns a generator
+    for extracted DataFrames. Each item is a one-item dictionary where the key
+    identifies the dataset as a (year, month, state) tuple (just like the
+    other extract functions), and the value is the DataFrame.
+
+    Args:
+        epacems_years (iterable): The years of data to extract.
+        states (list): The state abbreviations to extract.
+        verbose (bool): Whether to print progress messages.
+        workers (int): Number of processes to use to read the files. With 1
+            (the default) the files are read serially in this process. If
+            None, use one worker per CPU.
+        max_in_flight (int): Maximum number of files to be read ahead of the
+            consumer when using more than one worker. This bounds the memory
+            used by the extraction. Defaults to twice the number of workers.
+        partitions (iterable): If given, only extract these (year, month,
+            state) partitions, in this order, instead of every month of
+            epacems_years and states.
+        chunksize (int): If given, stream each file in chunks of at most this
+            many rows, rather than reading whole files. Each chunk is yielded
+            in its own dict, so the same (year, month, state) key is yielded
+            several times in a row for larger files. This bounds the memory
+            used to read each file.
+        checksums (dict): If given, the SHA-256 checksum of each file is
+            added to it as the file is extracted, keyed by (year, month,
+            state). The checksum is calculated from the same bytes that are
+            parsed (see read_epacems_zip), so each file is only read once.
+    Returns:
+        generator: yields {(year, month, state): pandas.DataFrame} dicts in
+        year, state, month order (or the order of partitions), regardless of
+        the number of workers.
+    """
+    if verbose:
+        print("Reading EPA CEMS data...")
+    if partitions is None:
+        partitions = epacems_partitions(epacems_years, states)
+    partitions = list(partitions)
+    if workers is None:
+        workers = os.cpu_count()
+    if workers <= 1:
+        yield from _extract_serial(partitions, verbose, chunksize=chunksize,
+                                   checksums=checksums)
+    else:
+        if max_in_flight is None:
+            max_in_flight = 2 * workers
+        assert max_in_flight >= 1, "max_in_flight must be at least 1."
+        if chunksize is None:
+            yield from _extract_parallel(partitions, verbose, workers,
+                                         max_in_flight, checksums=checksums)
+        else:
+            yield from _extract_parallel_chunked(
+                partitions, verbose, workers, max_in_flight, chunksize,
+                checksums=checksums)
@@ -3,11 +3,13 @@ import os.path
 import string
 import re
 import datetime
+import numpy as np
 import pandas as pd
 import sqlalchemy as sa
 import dbfread
 from pudl.settings import SETTINGS
 import pudl.constants as pc
+import pudl.load
 
 # MetaData object will contain the ferc1 database schema.
 ferc1_meta = sa.MetaData()
@@ -50,6 +52,11 @@ def dbc_filename(year, basedir=SETTINGS['ferc1_data_dir']):
     return os.path.join(datadir(year, basedir), 'F1_PUB.DBC')
 
 
+# Compiled regexes matching runs of at least min printable characters, keyed
+# by min.
+_printable_runs = {}
+
+
 def get_strings(filename, min=4):
     """
     Extract printable strings from a binary and return them as a generator.
@@ -58,52 +65,55 @@ def get_strings(filename, min=4):
     grabbing database table and column names from the F1_PUB.DBC file that is
     distributed with the FERC Form 1 data.
     """
+    if min not in _printable_runs:
+        _printable_runs[min] = re.compile(
+            '[{}]{{{},}}'.format(re.escape(string.printable), max(min, 1)))
     with open(filename, errors="ignore") as f:
-        result = ""
-        for c in f.read():
-            if c in string.printable:
-                result += c
-                continue
-            if len(result) >= min:
-                yield result
-            result = ""
-        if len(result) >= min:  # catch result at EOF
-            yield result
+        text = f.read()
+    for match in _printable_runs[min].finditer(text):
+        yield match.group()
 
 
-def extract_dbc_tables(year, minstring=4, basedir=SETTINGS['ferc1_data_dir']):
-    """Extract the names of all the tables and fields from FERC Form 1 DB.
+# Increment this to invalidate the DBC catalogs persisted on disk, e.g. when
+# the way they're parsed changes.
+DBC_CATALOG_VERSION = 1
 
-    This function reads all the strings in the given DBC database file for the
-    and picks out the ones that appear to be database table names, and their
-    subsequent table field names, for use in re-naming the truncated columns
-    extracted from the corresponding DBF files (which are limited to having
-    only 10 characters in their names.) Strings must have at least min
-    printable characters.
+# The DBC catalogs which have already been read, keyed by (year, basedir,
+# minstring). Each is stored with the stamp of the files it was read from.
+_dbc_catalogs = {}
 
-    Returns:
 
-        dict: A dictionary whose keys are the long table names extracted from
-            the DBC file, and whose values are lists of pairs of values, the
-            first of which is the full name of each field in the table with the
-            same name as the key, and the second of which is the truncated
-            (<=10 character) long name of that field as found in the DBF file.
+def _dbc_catalog_stamp(year, basedir):
+    """The name, modification time & size of the files a catalog is read from.
 
-    TODO: This routine shouldn't refer to any particular year of data, but
-    right now it depends on the ferc1_dbf2tbl dictionary, which was generated
-    from the 2015 Form 1 database.
+    The catalog depends on the DBC file, and on the field names of each of
+    the DBF files which is present.
     """
+    filenames = [dbc_filename(year, basedir)] + \
+        [os.path.join(datadir(year, basedir), '{}.DBF'.format(dbf))
+         for dbf in pc.ferc1_dbf2tbl.keys()]
+    stamp = []
+    for filename in filenames:
+        if os.path.isfile(filename):
+            stat = os.stat(filename)
+            stamp.append([os.path.basename(filename),
+                          stat.st_mtime_ns, stat.st_size])
+    return stamp
+
+
+def _parse_dbc_catalog(year, minstring, basedir):
+    """Read the catalog of table & field names from the DBC & DBF files."""
     # Extract all the strings longer than "min" from the DBC file
-    dbc_strs = list(get_strings(dbc_filename(year), min=minstring))
+    dbc_strs = list(get_strings(dbc_filename(year, basedir), min=minstring))
 
     # Get rid of leading & trailing whitespace in the strings:
     dbc_strs = [s.strip() for s in dbc_strs]
 
     # Get rid of all the empty strings:
-    dbc_strs = [s for s in dbc_strs if s is not '']
+    dbc_strs = [s for s in dbc_strs if s != '']
 
     # Collapse all whitespace to a single space:
-    dbc_strs = [re.sub('\s+', ' ', s) for s in dbc_strs]
+    dbc_strs = [re.sub(r'\s+', ' ', s) for s in dbc_strs]
 
     # Pull out only strings that begin with Table or Field
     dbc_strs = [s for s in dbc_strs if re.match('(^Table|^Field)', s)]
@@ -122,33 +132,103 @@ def extract_dbc_tables(year, minstring=4, basedir=SETTINGS['ferc1_data_dir']):
 
     # strip leading & trailing whitespace from the lists, and get rid of empty
     # strings:
-    dbc_list = [s.strip() for s in dbc_list if s is not '']
+    dbc_list = [s.strip() for s in dbc_list if s != '']
 
     # Create a dictionary using the first element of these strings (the table
-    # name) as the key, and the list of field names as the values, and return
-    # it:
+    # name) as the key, and the list of field names as the values:
     tf_dict = {}
     for tbl in dbc_list:
         x = tbl.split()
         tf_dict[x[0]] = x[1:]
 
-    tf_doubledict = {}
+    catalog = {}
     for dbf in pc.ferc1_dbf2tbl.keys():
         filename = os.path.join(datadir(year, basedir), '{}.DBF'.format(dbf))
         if os.path.isfile(filename):
-            dbf_fields = dbfread.DBF(filename).field_names
-            dbf_fields = [f for f in dbf_fields if f != '_NullFlags']
-            tf_doubledict[pc.ferc1_dbf2tbl[dbf]] = \
-                {k: v for k, v in
-                    zip(dbf_fields, tf_dict[pc.ferc1_dbf2tbl[dbf]])}
-            assert(len(tf_dict[pc.ferc1_dbf2tbl[dbf]]) == len(dbf_fields))
+            table_name = pc.ferc1_dbf2tbl[dbf]
+            dbf_fields = [f for f in dbfread.DBF(filename).fields
+                          if f.name != '_NullFlags']
+            assert(len(tf_dict[table_name]) == len(dbf_fields))
+            catalog[table_name] = [
+                [f.name, long_name, f.type, f.length]
+                for f, long_name in zip(dbf_fields, tf_dict[table_name])]
 
     # Insofar as we are able, make sure that the fields match each other
-    for k in tf_doubledict.keys():
-        for sn, ln in zip(tf_doubledict[k].keys(), tf_doubledict[k].values()):
+    for fields in catalog.values():
+        for sn, ln, _, _ in fields:
             assert(ln[:8] == sn.lower()[:8])
 
-    return tf_doubledict
+    return catalog
+
+
+def read_dbc_catalog(year, minstring=4, basedir=SETTINGS['ferc1_data_dir'],
+                     cache_dir=SETTINGS['ferc1_dbc_cache_dir']):
+    """
+    Read the names & types of the fields in each of a year's FERC 1 tables.
+
+    Reading the catalog means scanning the whole F1_PUB.DBC file and the
+    header of every DBF file, so each catalog is kept once it's been read,
+    both in memory and (unless cache_dir is None) on disk, until any of
+    those files change.
+
+    Returns:
+
+        dict: The fields of each table whose DBF file is present, keyed by
+            table name. Each field is a list of its truncated DBF field name,
+            its full name from the DBC file, its DBF type, and its length.
+    """
+    import json
+    memo_key = (year, os.path.abspath(basedir), minstring)
+    stamp = _dbc_catalog_stamp(year, basedir)
+    if memo_key in _dbc_catalogs and _dbc_catalogs[memo_key][0] == stamp:
+        return _dbc_catalogs[memo_key][1]
+
+    header = {'version': DBC_CATALOG_VERSION, 'basedir': memo_key[1],
+              'minstring': minstring, 'stamp': stamp}
+    catalog = None
+    if cache_dir is not None:
+        cache_file = os.path.join(cache_dir, 'dbc_{}.json'.format(year))
+        if os.path.isfile(cache_file):
+            with open(cache_file) as f:
+                cached = json.load(f)
+            if cached['header'] == header:
+                catalog = cached['catalog']
+    if catalog is None:
+        catalog = _parse_dbc_catalog(year, minstring, basedir)
+        if cache_dir is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+            with open(cache_file + '.tmp', 'w') as f:
+                json.dump({'header': header, 'catalog': catalog}, f)
+            os.replace(cache_file + '.tmp', cache_file)
+    _dbc_catalogs[memo_key] = (stamp, catalog)
+    return catalog
+
+
+def extract_dbc_tables(year, minstring=4, basedir=SETTINGS['ferc1_data_dir']):
+    """Extract the names of all the tables and fields from FERC Form 1 DB.
+
+    This function reads all the strings in the given DBC database file for the
+    and picks out the ones that appear to be database table names, and their
+    subsequent table field names, for use in re-naming the truncated columns
+    extracted from the corresponding DBF files (which are limited to having
+    only 10 characters in their names.) Strings must have at least min
+    printable characters. The names are read using read_dbc_catalog(), so
+    they're only extracted again when the files change.
+
+    Returns:
+
+        dict: A dictionary whose keys are the long table names extracted from
+            the DBC file, and whose values are dictionaries mapping the
+            truncated (<=10 character) name of each field in the table as
+            found in the DBF file to the full name of that field.
+
+    TODO: This routine shouldn't refer to any particular year of data, but
+    right now it depends on the ferc1_dbf2tbl dictionary, which was generated
+    from the 2015 Form 1 database.
+    """
+    catalog = read_dbc_catalog(year, minstring=minstring, basedir=basedir)
+    return {table_name: {sn: ln for sn, ln, _, _ in fields}
+            for table_name, fields in catalog.items()}
 
 
 def define_db(refyear, ferc1_tables, ferc1_meta,
@@ -170,7 +250,9 @@ def define_db(refyear, ferc1_tables, ferc1_meta,
         ferc1_meta (SQLAlchemy MetaData): SQLAlchemy MetaData object
             to store the schema in.
     """
-    ferc1_tblmap = extract_dbc_tables(refyear)
+    # The fields of each table, read from the DBC & DBF files (or from the
+    # catalog saved the last time they were read).
+    ferc1_catalog = read_dbc_catalog(refyear, basedir=basedir)
     # Translate the list of FERC Form 1 database tables that has
     # been passed in into a list of DBF files prefixes:
     dbfs = [pc.ferc1_tbl2dbf[table] for table in ferc1_tables]
@@ -184,25 +266,17 @@ def define_db(refyear, ferc1_tables, ferc1_meta,
     ferc1_meta.clear()
 
     for dbf in dbfs:
-        dbf_filename = os.path.join(datadir(refyear, basedir),
-                                    '{}.DBF'.format(dbf))
-        ferc1_dbf = dbfread.DBF(dbf_filename)
-
         # And the corresponding SQLAlchemy Table object:
         table_name = pc.ferc1_dbf2tbl[dbf]
         ferc1_sql = sa.Table(table_name, ferc1_meta)
 
-        # _NullFlags isn't a "real" data field... remove it.
-        fields = [f for f in ferc1_dbf.fields if not re.match(
-            '_NullFlags', f.name)]
-
-        for field in fields:
-            col_name = ferc1_tblmap[pc.ferc1_dbf2tbl[dbf]][field.name]
-            col_type = pc.dbf_typemap[field.type]
+        # The catalog leaves out _NullFlags, which isn't a "real" data field.
+        for _, col_name, field_type, field_length in ferc1_catalog[table_name]:
+            col_type = pc.dbf_typemap[field_type]
 
             # String/VarChar is the only type that really NEEDS a length
             if col_type == sa.String:
-                col_type = col_type(length=field.length)
+                col_type = col_type(length=field_length)
 
             # This eliminates the "footnote" fields which all mirror database
             # fields, but end with _f. We have not yet integrated the footnotes
@@ -234,17 +308,321 @@ def define_db(refyear, ferc1_tables, ferc1_meta,
             )
 
 
+# The numpy dtypes of the DBF fields which are decoded from their raw bytes,
+# keyed by DBF field type. Other types are read using dbfread.
+_dbf_field_dtypes = {
+    'C': 'S{}',
+    'D': 'S{}',
+    'F': 'S{}',
+    'N': 'S{}',
+    'L': 'S{}',
+    'I': '<i4',
+    'T': '<u8',
+}
+
+# The Julian day number of 1970-01-01.
+_JULIAN_UNIX_EPOCH = 2440588
+
+
+def _decode_dbf_numbers(raw, decimal_comma=False):
+    """Decode N & F fields: blank is NaN, padding with * is ignored."""
+    values = np.char.strip(np.char.strip(raw), b'*')
+    blank = values == b''
+    values = values[~blank]
+    if decimal_comma:
+        values = np.char.replace(values, b',', b'.')
+    numbers = np.full(len(raw), np.nan)
+    numbers[~blank] = values.astype(np.float64)
+    return numbers
+
+
+def _decode_dbf_logicals(raw):
+    """Decode L fields as True, False or None."""
+    values = np.full(len(raw), None, dtype=object)
+    values[np.isin(raw, [b'T', b't', b'Y', b'y'])] = True
+    values[np.isin(raw, [b'F', b'f', b'N', b'n'])] = False
+    # numpy drops the trailing NUL bytes, so b'\0' comes out as b''.
+    bad = ~np.isin(raw, [b'T', b't', b'Y', b'y', b'F', b'f', b'N', b'n',
+                         b'?', b' ', b''])
+    if bad.any():
+        raise ValueError('Illegal value for logical field: {!r}'.format(
+            raw[bad][0]))
+    return values
+
+
+def _decode_dbf_dates(raw):
+    """Decode D fields (YYYYMMDD). Blanks or zeros are NaT."""
+    null = np.char.strip(raw, b' 0') == b''
+    values = pd.Series(raw).str.decode('ascii').where(~null)
+    return pd.to_datetime(values, format='%Y%m%d').values.astype(
+        'datetime64[ns]')
+
+
+def _decode_dbf_datetimes(raw):
+    """Decode T fields: the Julian day and milliseconds since midnight."""
+    day = (raw & 0xffffffff).astype(np.int64)
+    msec = (raw >> 32).astype(np.int64)
+    # All spaces is blank, and so is day 0.
+    null = (raw == 0x2020202020202020) | (day == 0)
+    values = ((day - _JULIAN_UNIX_EPOCH) * 86400000 + msec)
+    values = values.astype('datetime64[ms]').astype('datetime64[ns]')
+    values[null] = np.datetime64('NaT')
+    return values
+
+
+def _dbf_decoders(encoding):
+    """Functions which decode raw DBF fields, keyed by DBF field type."""
+    def decode_chars(raw):
+        # numpy drops trailing NUL bytes, so only the spaces are left.
+        return np.char.decode(np.char.rstrip(raw, b' '),
+                              encoding).astype(object)
+    return {
+        'C': decode_chars,
+        'D': _decode_dbf_dates,
+        'F': _decode_dbf_numbers,
+        # Numeric fields may have a decimal comma, but floats may not.
+        'N': lambda raw: _decode_dbf_numbers(raw, decimal_comma=True),
+        'L': _decode_dbf_logicals,
+        'I': lambda raw: raw.astype(np.int64),
+        'T': _decode_dbf_datetimes,
+    }
+
+
+def read_dbf_chunks(filename, columns, chunk_records=100000):
+    """
+    Read the records of a DBF file into DataFrames, a chunk at a time.
+
+    The fields are decoded column by column from the fixed width records,
+    giving the same values dbfread would (numbers are floats, blank numbers
+    and dates are NaN/NaT, and deleted records are skipped), but without any
+    per-record Python. If any of the fields are of a type that isn't decoded
+    this way, dbfread is used to read the records instead.
+
+    Args:
+        filename (str): The DBF file to read.
+        columns (dict): The DBF fields to read, mapped to the names of the
+            DataFrame columns they're read into.
+        chunk_records (int): The most records to put in each DataFrame.
+    Yields:
+        pandas.DataFrame: The records, with the columns in the same order
+        as columns.
+    """
+    dbf = dbfread.DBF(filename)
+    fields = {f.name: f for f in dbf.fields}
+    if any(fields[name].type not in _dbf_field_dtypes for name in columns):
+        yield from _read_dbf_records(dbf, columns, chunk_records)
+        return
+
+    # Every field is in the dtype, so that the records line up, but the ones
+    # which aren't needed are left as raw bytes.
+    record_dtype = np.dtype(
+        [('_deleted', 'u1')] +
+        [(f.name, _dbf_field_dtypes[f.type].format(f.length)
+          if f.name in columns else 'V{}'.format(f.length))
+         for f in dbf.fields])
+    assert record_dtype.itemsize == dbf.header.recordlen
+    decoders = _dbf_decoders(dbf.encoding)
+    with open(filename, 'rb') as f:
+        f.seek(dbf.header.headerlen)
+        while True:
+            buf = f.read(chunk_records * record_dtype.itemsize)
+            records = np.frombuffer(
+                buf, dtype=record_dtype,
+                count=len(buf) // record_dtype.itemsize)
+            # An end of file marker where a record would start ends them.
+            eof = np.flatnonzero(records['_deleted'] == 0x1a)
+            if len(eof):
+                records = records[:eof[0]]
+            # Deleted records are marked with a * instead of a space.
+            records = records[records['_deleted'] == 0x20]
+            if len(records):
+                yield pd.DataFrame({
+                    col: decoders[fields[name].type](records[name])
+                    for name, col in columns.items()})
+            if len(eof) or len(buf) < chunk_records * record_dtype.itemsize:
+                break
+
+
+def _read_dbf_records(dbf, columns, chunk_records):
+    """Read the records of a DBF file into DataFrames using dbfread."""
+    chunk = []
+    for record in dbf:
+        chunk.append([record[name] for name in columns])
+        if len(chunk) == chunk_records:
+            yield pd.DataFrame(chunk, columns=list(columns.values()))
+            chunk = []
+    if chunk:
+        yield pd.DataFrame(chunk, columns=list(columns.values()))
+
+
+def _copy_dbf_records(conn, tbl, dfs, columns, on_conflict_do_nothing=False):
+    """
+    COPY a DBF file's records into a table, in one transaction.
+
+    With on_conflict_do_nothing, the records are copied into a temporary
+    staging table first, and then inserted in their original order, skipping
+    any which conflict with records that are already in the table (or
+    earlier in the file), just like INSERT ... ON CONFLICT DO NOTHING.
+    """
+    with conn.begin():
+        if not on_conflict_do_nothing:
+            pudl.load.binary_copy(dfs, tbl, conn, columns,
+                                  empty_strings_null=False)
+            return
+        staging = sa.Table(
+            '{}_staging'.format(tbl.name), sa.MetaData(),
+            sa.Column('staging_row', sa.BigInteger, primary_key=True),
+            *[sa.Column(col, tbl.columns[col].type) for col in columns],
+            prefixes=['TEMPORARY'], postgresql_on_commit='DROP')
+        staging.create(conn)
+        pudl.load.binary_copy(dfs, staging, conn, columns,
+                              empty_strings_null=False)
+        select = sa.select([staging.columns[col] for col in columns]).\
+            order_by(staging.columns.staging_row)
+        conn.execute(sa.dialects.postgresql.insert(tbl).
+                     from_select(columns, select).
+                     on_conflict_do_nothing())
+
+
+# Respondents whose records are left out of the FERC Form 1 DB.
+_bad_respondents = [515, ]
+
+
+def _read_dbf_table(filename, columns):
+    """Read the records of one DBF file, less those of the bad respondents."""
+    for df in read_dbf_chunks(filename, columns):
+        yield df[~df.respondent_id.isin(_bad_respondents)]
+
+
+def _read_dbf_file(filename, columns):
+    """
+    Read all of the records of one DBF file into a single DataFrame.
+
+    This is the unit of work for the parallel ingest, run in the worker
+    processes.
+    """
+    dfs = list(_read_dbf_table(filename, columns))
+    if not dfs:
+        return pd.DataFrame(columns=list(columns.values()))
+    return pd.concat(dfs, ignore_index=True)
+
+
+def _load_dbf_records(engine, tbl, df, columns):
+    """COPY one DBF file's records into a table using a new connection."""
+    with engine.connect() as conn:
+        _copy_dbf_records(conn, tbl, [df], columns)
+
+
+def _collect_dbf_future(pending_item):
+    """Wait for one submitted DBF file to be read."""
+    unit, future = pending_item
+    return unit, future.result()
+
+
+def _init_db_serial(conn, units, basedir, verbose):
+    """Read the FERC Form 1 DBF files one at a time, in this process."""
+    last_year = None
+    for year, dbf, sql_table, columns in units:
+        if verbose and year != last_year:
+            print("Ingesting FERC Form 1 Data from {}...".format(year))
+        last_year = year
+        dbf_filename = os.path.join(datadir(year, basedir),
+                                    '{}.DBF'.format(dbf))
+        # If we're reading in multiple years of FERC Form 1 data, we
+        # need to avoid collisions in the f1_respondent_id table, which
+        # does not have a year field... F1_1 is the DBF file that stores
+        # this table:
+        _copy_dbf_records(conn, sql_table,
+                          _read_dbf_table(dbf_filename, columns),
+                          list(columns.values()),
+                          on_conflict_do_nothing=(dbf == 'F1_1'))
+
+
+def _init_db_parallel(engine, conn, units, basedir, workers, max_in_flight,
+                      copy_writers, verbose):
+    """
+    Read the FERC Form 1 DBF files in a pool of worker processes.
+
+    Every year's respondents are read and loaded before any of the data
+    tables, in year order, so that the first year a respondent appears in
+    wins (as in the serial ingest) and the data tables' foreign keys to
+    f1_respondent_id always hold. The data tables are then loaded as their
+    DBF files come back from the workers, either in this thread or by a pool
+    of copy_writers threads. At most max_in_flight DBF files are being read,
+    or waiting to be loaded, at any time.
+    """
+    import collections
+    import concurrent.futures
+
+    # Sorting is stable, so the years stay in order.
+    units = sorted(units, key=lambda unit: unit[1] != 'F1_1')
+    pending = collections.deque()
+    loads = collections.deque()
+    writer_pool = None
+    if copy_writers > 0:
+        writer_pool = concurrent.futures.ThreadPoolExecutor(
+            max_workers=copy_writers)
+
+    def load(unit, df):
+        year, dbf, sql_table, columns = unit
+        if verbose:
+            print("Ingesting FERC Form 1 {} from {}...".format(
+                sql_table.name, year))
+        columns = list(columns.values())
+        if dbf == 'F1_1':
+            _copy_dbf_records(conn, sql_table, [df], columns,
+                              on_conflict_do_nothing=True)
+        elif writer_pool is None:
+            _copy_dbf_records(conn, sql_table, [df], columns)
+        else:
+            # Wait for the writers to catch up, rather than holding more and
+            # more DataFrames in memory.
+            while len(loads) >= max_in_flight:
+                loads.popleft().result()
+            loads.append(writer_pool.submit(_load_dbf_records, engine,
+                                            sql_table, df, columns))
+
+    try:
+        with concurrent.futures.ProcessPoolExecutor(
+                max_workers=workers) as pool:
+            try:
+                for unit in units:
+                    year, dbf, _, columns = unit
+                    if len(pending) >= max_in_flight:
+                        load(*_collect_dbf_future(pending.popleft()))
+                    dbf_filename = os.path.join(datadir(year, basedir),
+                                                '{}.DBF'.format(dbf))
+                    pending.append((unit, pool.submit(
+                        _read_dbf_file, dbf_filename, columns)))
+                while pending:
+                    load(*_collect_dbf_future(pending.popleft()))
+            finally:
+                # If anything failed, don't bother reading the files that
+                # are still queued up.
+                for _, future in pending:
+                    future.cancel()
+        while loads:
+            loads.popleft().result()
+    finally:
+        if writer_pool is not None:
+            writer_pool.shutdown(wait=True)
+
+
 def init_db(ferc1_tables=pc.ferc1_default_tables,
             refyear=max(pc.working_years['ferc1']),
             years=pc.working_years['ferc1'],
             basedir=SETTINGS['ferc1_data_dir'],
             def_db=True,
             verbose=True,
-            testing=False):
+            testing=False,
+            workers=1,
+            max_in_flight=None,
+            copy_writers=0):
     """Assuming an empty FERC Form 1 DB, create tables and insert data.
 
-    This function uses dbfread and SQLAlchemy to migrate a set of FERC Form 1
-    database tables from the provided DBF format into a postgres database.
+    This function reads a set of FERC Form 1 database tables from the
+    provided DBF files, decoding their records into DataFrames a chunk at a
+    time, and loads them into a postgres database using binary COPY.
 
     Args:
 
@@ -254,6 +632,16 @@ def init_db(ferc1_tables=pc.ferc1_default_tables,
             template.
         years (list): The set of years to read from FERC Form 1 dbf database
             into the FERC Form 1 DB.
+        workers (int): Number of processes used to read the DBF files. With
+            1 (the default) they're read one at a time in this process. With
+            more, each year's DBF files are read by the worker processes. If
+            None, use one worker per CPU.
+        max_in_flight (int): Maximum number of DBF files read ahead of being
+            loaded, when using multiple workers. Defaults to twice the number
+            of workers.
+        copy_writers (int): Number of threads (each with its own database
+            connection) used to load the data tables when using multiple
+            workers. With 0 (the default) they're loaded by this thread.
     """
     if verbose:
         print("Start ferc mirror db ingest at {}".format(datetime.datetime.now().
@@ -269,7 +657,7 @@ def init_db(ferc1_tables=pc.ferc1_default_tables,
     # This function (see below) uses metadata from the DBF files to define a
     # postgres database structure suitable for accepting the FERC Form 1 data
     if def_db:
-        define_db(refyear, ferc1_tables, ferc1_meta)
+        define_db(refyear, ferc1_tables, ferc1_meta, basedir=basedir)
 
     # Wipe the DB and start over...
     drop_tables(ferc1_engine)
@@ -281,49 +669,36 @@ def init_db(ferc1_tables=pc.ferc1_default_tables,
     # This awkward dictionary of dictionaries lets us map from a DBF file
     # to a couple of lists -- one of the short field names from the DBF file,
     # and the other the full names that we want to have the SQL database...
-    ferc1_tblmap = extract_dbc_tables(refyear)
+    ferc1_tblmap = extract_dbc_tables(refyear, basedir=basedir)
 
     # Translate the list of FERC Form 1 database tables that has
     # been passed in into a list of DBF files prefixes:
     dbfs = [pc.ferc1_tbl2dbf[table] for table in ferc1_tables]
 
+    # Each DBF file is read into its SQL table, with only the DBF fields that
+    # have columns in the database, renamed as they're read.
+    units = []
     for year in years:
-        if verbose:
-            print("Ingesting FERC Form 1 Data from {}...".format(year))
         for dbf in dbfs:
-            dbf_filename = os.path.join(datadir(year, basedir),
-                                        '{}.DBF'.format(dbf))
-            dbf_table = dbfread.DBF(dbf_filename, load=True)
-
             # pc.ferc1_dbf2tbl is a dictionary mapping DBF files to SQL table
             # names
-            sql_table_name = pc.ferc1_dbf2tbl[dbf]
-            sql_stmt = sa.dialects.postgresql.insert(
-                ferc1_meta.tables[sql_table_name])
-
-            # Build up a list of dictionaries to INSERT into the postgres
-            # database. Each dictionary is one record. Within each dictionary
-            # the keys are the field names, and the values are the values for
-            # that field.
-            sql_records = []
-            bad_respondents = [515, ]
-            for dbf_rec in dbf_table.records:
-                sql_rec = {}
-                for d, s in ferc1_tblmap[sql_table_name].items():
-                    sql_rec[s] = dbf_rec[d]
-                if sql_rec['respondent_id'] not in bad_respondents:
-                    sql_records.append(sql_rec)
-
-            # If we're reading in multiple years of FERC Form 1 data, we
-            # need to avoid collisions in the f1_respondent_id table, which
-            # does not have a year field... F1_1 is the DBF file that stores
-            # this table:
-            if dbf == 'F1_1':
-                sql_stmt = sql_stmt.on_conflict_do_nothing()
-
-            # insert the new records!
-            conn.execute(sql_stmt, sql_records)
-
+            sql_table = ferc1_meta.tables[pc.ferc1_dbf2tbl[dbf]]
+            columns = {d: s for d, s in ferc1_tblmap[sql_table.name].items()
+                       if s in sql_table.columns}
+            units.append((year, dbf, sql_table, columns))
+
+    if workers is None:
+        workers = os.cpu_count()
+    if workers > 1:
+        if max_in_flight is None:
+            max_in_flight = 2 * workers
+        assert max_in_flight >= 1, "max_in_flight must be at least 1."
+        _init_db_parallel(ferc1_engine, conn, units, basedir, workers,
+                          max_in_flight, copy_writers, verbose)
+        conn.close()
+        return
+
+    _init_db_serial(conn, units, basedir, verbose)
     conn.close()
 
 
@@ -331,6 +706,100 @@ def init_db(ferc1_tables=pc.ferc1_default_tables,
 # Functions related to extracting ferc1 tables for pudl.
 ###########################################################################
 
+# The columns of the FERC Form 1 tables used to make each PUDL table. Every
+# PUDL table needs the columns which make up the FERC record ID. Columns which
+# aren't in the reference year's version of a table are left out.
+_ferc1_record_id_columns = [
+    'respondent_id', 'report_year', 'spplmnt_num', 'row_number']
+ferc1_pudl_columns = {
+    'fuel_ferc1': [
+        'plant_name', 'fuel', 'fuel_unit', 'fuel_avg_heat', 'fuel_quantity',
+        'fuel_cost_delvd', 'fuel_cost_burned', 'fuel_cost_btu',
+        'fuel_cost_kwh', 'fuel_generaton'],
+    'plants_steam_ferc1': [
+        'plant_name', 'plant_kind', 'type_const', 'yr_const', 'yr_installed',
+        'tot_capacity', 'peak_demand', 'plant_hours', 'plnt_capability',
+        'when_limited', 'when_not_limited', 'avg_num_of_emp',
+        'net_generation', 'cost_land', 'cost_structure', 'cost_equipment',
+        'cost_of_plant_to', 'cost_per_kw', 'expns_operations', 'expns_fuel',
+        'expns_coolants', 'expns_steam', 'expns_steam_othr',
+        'expns_transfer', 'expns_electric', 'expns_misc_power',
+        'expns_rents', 'expns_allowances', 'expns_engnr',
+        'expns_structures', 'expns_boiler', 'expns_plants',
+        'expns_misc_steam', 'tot_prdctn_expns', 'expns_kwh',
+        'asset_retire_cost'],
+    'plants_small_ferc1': [
+        'plant_name', 'kind_of_fuel', 'yr_constructed', 'capacity_rating',
+        'net_demand', 'net_generation', 'plant_cost', 'plant_cost_mw',
+        'operation', 'expns_fuel', 'expns_maint', 'fuel_cost'],
+    'plants_hydro_ferc1': [
+        'plant_name', 'project_no', 'plant_kind', 'plant_const', 'yr_const',
+        'yr_installed', 'tot_capacity', 'peak_demand', 'plant_hours',
+        'favorable_cond', 'adverse_cond', 'avg_num_of_emp',
+        'net_generation', 'cost_of_land', 'cost_structure',
+        'cost_facilities', 'cost_equipment', 'cost_roads',
+        'asset_retire_cost', 'cost_plant_total', 'cost_per_kw',
+        'expns_operations', 'expns_water_pwr', 'expns_hydraulic',
+        'expns_electric', 'expns_generation', 'expns_rents',
+        'expns_engineering', 'expns_engnr', 'expns_structures',
+        'expns_dams', 'expns_plant', 'expns_misc_plant', 'expns_total',
+        'expns_kwh'],
+    'plants_pumped_storage_ferc1': [
+        'plant_name', 'project_number', 'project_no', 'plant_kind',
+        'yr_const', 'yr_installed', 'tot_capacity', 'peak_demand',
+        'plant_hours', 'plant_capability', 'avg_num_of_emp',
+        'net_generation', 'energy_used', 'net_load', 'cost_land',
+        'cost_structures', 'cost_facilties', 'cost_wheels',
+        'cost_wheels_turbines_generators', 'cost_electric',
+        'cost_misc_eqpmnt', 'cost_roads', 'asset_retire_cost',
+        'cost_of_plant', 'cost_per_kw', 'expns_operations',
+        'expns_water_pwr', 'expns_pump_strg', 'expns_electric',
+        'expns_misc_power', 'expns_rents', 'expns_engneering',
+        'expns_structures', 'expns_dams', 'expns_plant', 'expns_misc_plnt',
+        'expns_producton', 'pumping_expenses', 'tot_prdctn_exns',
+        'expns_kwh'],
+    'plant_in_service_ferc1': [
+        'begin_yr_bal', 'addition', 'retirements', 'adjustments',
+        'transfers', 'yr_end_bal'],
+    'purchased_power_ferc1': [
+        'athrty_co_name', 'sttstcl_clssfctn', 'rtsched_trffnbr',
+        'avgmth_bill_dmnd', 'avgmth_ncp_dmnd', 'avgmth_cp_dmnd',
+        'mwh_purchased', 'mwh_recv', 'mwh_delvd', 'dmnd_charges',
+        'erg_charges', 'othr_charges', 'settlement_tot'],
+    'accumulated_depreciation_ferc1': [
+        'total_cde', 'electric_plant', 'future_plant', 'leased_plant'],
+}
+
+
+def _ferc1_columns(ferc1_table, pudl_table):
+    """The columns of a FERC Form 1 table needed to make a PUDL table."""
+    needed = set(_ferc1_record_id_columns + ferc1_pudl_columns[pudl_table])
+    # Keep the columns in the same order as they are in the table.
+    return [col for col in ferc1_table.columns if col.name in needed]
+
+
+def _read_ferc1_select(ferc1_select, ferc1_engine, chunksize=100000):
+    """
+    Read the records selected from the FERC Form 1 DB into a DataFrame.
+
+    The records are fetched using a server-side cursor, a chunk at a time, so
+    that they're never all held as Python objects at once. Each chunk gets
+    the same dtypes, which are set by the column types rather than inferred
+    from the values in the chunk: Float columns are always float64, even when
+    all of their values are NULL.
+    """
+    dtypes = {col.name: 'float64' for col in ferc1_select.c
+              if isinstance(col.type, sa.Float)}
+    with ferc1_engine.connect() as conn:
+        conn = conn.execution_options(stream_results=True)
+        chunks = [chunk.astype(dtypes) for chunk in
+                  pd.read_sql(ferc1_select, conn, chunksize=chunksize)]
+    if not chunks:
+        return pd.DataFrame(columns=[col.name for col in ferc1_select.c]).\
+            astype(dtypes)
+    return pd.concat(chunks, ignore_index=True)
+
+
 def fuel(ferc1_raw_dfs,
          ferc1_engine,
          ferc1_table='f1_fuel',
@@ -339,15 +808,16 @@ def fuel(ferc1_raw_dfs,
     """Pull the f1_fuel table from the ferc1 db."""
     # Grab the f1_fuel SQLAlchemy Table object from the metadata object.
     f1_fuel = ferc1_meta.tables[ferc1_table]
-    # Generate a SELECT statement that pulls all fields of the f1_fuel table,
-    # but only gets records with plant names, and non-zero fuel amounts:
-    f1_fuel_select = sa.sql.select([f1_fuel]).\
+    # Generate a SELECT statement that pulls the fields of the f1_fuel table
+    # that fuel_ferc1 needs, but only gets records with plant names, and
+    # non-zero fuel amounts:
+    f1_fuel_select = sa.sql.select(_ferc1_columns(f1_fuel, pudl_table)).\
         where(f1_fuel.c.fuel != '').\
         where(f1_fuel.c.fuel_quantity > 0).\
         where(f1_fuel.c.plant_name != '').\
         where(f1_fuel.c.report_year.in_(ferc1_years))
     # Use the above SELECT to pull those records into a DataFrame:
-    fuel_ferc1_df = pd.read_sql(f1_fuel_select, ferc1_engine)
+    fuel_ferc1_df = _read_ferc1_select(f1_fuel_select, ferc1_engine)
 
     ferc1_raw_dfs[pudl_table] = fuel_ferc1_df
 
@@ -361,12 +831,12 @@ def plants_steam(ferc1_raw_dfs,
                  ferc1_years=pc.working_years['ferc1']):
     """ """
     f1_steam = ferc1_meta.tables[ferc1_table]
-    f1_steam_select = sa.sql.select([f1_steam]).\
+    f1_steam_select = sa.sql.select(_ferc1_columns(f1_steam, pudl_table)).\
         where(f1_steam.c.tot_capacity > 0).\
         where(f1_steam.c.plant_name != '').\
         where(f1_steam.c.report_year.in_(ferc1_years))
 
-    ferc1_steam_df = pd.read_sql(f1_steam_select, ferc1_engine)
+    ferc1_steam_df = _read_ferc1_select(f1_steam_select, ferc1_engine)
 
     # populate the unlatered dictionary of dataframes
     ferc1_raw_dfs[pudl_table] = ferc1_steam_df
@@ -390,7 +860,7 @@ def plants_small(ferc1_raw_dfs,
         """Year {} is too recent. Small plant data has not been categorized for
          any year after 2015.""".format(max(ferc1_years))
     f1_small = ferc1_meta.tables[ferc1_table]
-    f1_small_select = sa.sql.select([f1_small, ]).\
+    f1_small_select = sa.sql.select(_ferc1_columns(f1_small, pudl_table)).\
         where(f1_small.c.report_year.in_(ferc1_years)).\
         where(f1_small.c.plant_name != '').\
         where(or_((f1_small.c.capacity_rating != 0),
@@ -403,7 +873,7 @@ def plants_small(ferc1_raw_dfs,
                   (f1_small.c.expns_maint != 0),
                   (f1_small.c.fuel_cost != 0)))
 
-    ferc1_small_df = pd.read_sql(f1_small_select, ferc1_engine)
+    ferc1_small_df = _read_ferc1_select(f1_small_select, ferc1_engine)
 
     # populate the unlatered dictionary of dataframes
     ferc1_raw_dfs[pudl_table] = ferc1_small_df
@@ -418,11 +888,11 @@ def plants_hydro(ferc1_raw_dfs,
                  ferc1_years=pc.working_years['ferc1']):
     f1_hydro = ferc1_meta.tables[ferc1_table]
 
-    f1_hydro_select = sa.sql.select([f1_hydro]).\
+    f1_hydro_select = sa.sql.select(_ferc1_columns(f1_hydro, pudl_table)).\
         where(f1_hydro.c.plant_name != '').\
         where(f1_hydro.c.report_year.in_(ferc1_years))
 
-    ferc1_hydro_df = pd.read_sql(f1_hydro_select, ferc1_engine)
+    ferc1_hydro_df = _read_ferc1_select(f1_hydro_select, ferc1_engine)
 
     ferc1_raw_dfs[pudl_table] = ferc1_hydro_df
 
@@ -439,11 +909,12 @@ def plants_pumped_storage(ferc1_raw_dfs,
 
     # Removing the empty records.
     # This reduces the entries for 2015 from 272 records to 27.
-    f1_pumped_storage_select = sa.sql.select([f1_pumped_storage]).\
+    f1_pumped_storage_select = sa.sql.select(
+        _ferc1_columns(f1_pumped_storage, pudl_table)).\
         where(f1_pumped_storage.c.plant_name != '').\
         where(f1_pumped_storage.c.report_year.in_(ferc1_years))
 
-    ferc1_pumped_storage_df = pd.read_sql(
+    ferc1_pumped_storage_df = _read_ferc1_select(
         f1_pumped_storage_select, ferc1_engine)
 
     ferc1_raw_dfs[pudl_table] = ferc1_pumped_storage_df
@@ -458,14 +929,15 @@ def plant_in_service(ferc1_raw_dfs,
                      ferc1_years=pc.working_years['ferc1']):
     f1_plant_in_srvce = \
         ferc1_meta.tables[ferc1_table]
-    f1_plant_in_srvce_select = sa.sql.select([f1_plant_in_srvce]).\
+    f1_plant_in_srvce_select = sa.sql.select(
+        _ferc1_columns(f1_plant_in_srvce, pudl_table)).\
         where(
             sa.sql.and_(
                 f1_plant_in_srvce.c.report_year.in_(ferc1_years),
                 # line_no mapping is invalid before 2007
                 f1_plant_in_srvce.c.report_year >= 2007))
 
-    ferc1_pis_df = pd.read_sql(f1_plant_in_srvce_select, ferc1_engine)
+    ferc1_pis_df = _read_ferc1_select(f1_plant_in_srvce_select, ferc1_engine)
 
     ferc1_raw_dfs[pudl_table] = ferc1_pis_df
 
@@ -478,10 +950,12 @@ def purchased_power(ferc1_raw_dfs,
                     pudl_table='purchased_power_ferc1',
                     ferc1_years=pc.working_years['ferc1']):
     f1_purchased_pwr = ferc1_meta.tables[ferc1_table]
-    f1_purchased_pwr_select = sa.sql.select([f1_purchased_pwr]).\
+    f1_purchased_pwr_select = sa.sql.select(
+        _ferc1_columns(f1_purchased_pwr, pudl_table)).\
         where(f1_purchased_pwr.c.report_year.in_(ferc1_years))
 
-    ferc1_purchased_pwr_df = pd.read_sql(f1_purchased_pwr_select, ferc1_engine)
+    ferc1_purchased_pwr_df = _read_ferc1_select(f1_purchased_pwr_select,
+                                                ferc1_engine)
 
     ferc1_raw_dfs[pudl_table] = ferc1_purchased_pwr_df
 
@@ -494,10 +968,11 @@ def accumulated_depreciation(ferc1_raw_dfs,
                              pudl_table='accumulated_depreciation_ferc1',
                              ferc1_years=pc.working_years['ferc1']):
     f1_accumdepr_prvsn = ferc1_meta.tables[ferc1_table]
-    f1_accumdepr_prvsn_select = sa.sql.select([f1_accumdepr_prvsn]).\
+    f1_accumdepr_prvsn_select = sa.sql.select(
+        _ferc1_columns(f1_accumdepr_prvsn, pudl_table)).\
         where(f1_accumdepr_prvsn.c.report_year.in_(ferc1_years))
 
-    ferc1_apd_df = pd.read_sql(f1_accumdepr_prvsn_select, ferc1_engine)
+    ferc1_apd_df = _read_ferc1_select(f1_accumdepr_prvsn_select, ferc1_engine)
 
     ferc1_raw_dfs[pudl_table] = ferc1_apd_df
 
@@ -1,7 +1,9 @@
 """General utility functions that are used in a variety of contexts."""
 
-from functools import partial
+from functools import lru_cache, partial
+import re
 
+import numpy as np
 import pandas as pd
 
 # This is a little abbreviated function that allows us to propagate the NA
@@ -182,3 +184,92 @@ def strip_lower(df, columns=None):
             df[col] = df[col].str.strip().str.lower().str.replace(r'\s+', ' ')
 
     return df
+
+
+@lru_cache()
+def _compile_month_patterns(month_patterns):
+    """Compile the (month, pattern) pairs of a month dictionary, once."""
+    return tuple((month, re.compile(pattern))
+                 for month, pattern in month_patterns)
+
+
+def unpivot_months(df, md, month_col='report_month', rows=None,
+                   sort_columns=False):
+    """
+    Turn records with a column per month into one record per month.
+
+    This does in one pass what splitting the monthly columns out month by
+    month, concatenating them and merging them back onto the other columns
+    does: each record is repeated once per month (keeping its index label),
+    the other columns are repeated along with it, and each set of monthly
+    columns is stacked into a single column named without the month.
+
+    Args:
+        df (pandas.DataFrame): The records with a column per month.
+        md (dict): The month numbers, mapped to regular expressions which
+            match (with re.search) the columns for that month, and the part
+            of their names to remove, e.g. pudl.constants.month_dict_eia923.
+            A column belongs to the first month whose pattern it matches.
+        month_col (str): The name of the new column holding the month.
+        rows (array): The positions of the records to unpivot, in the order
+            they should come out. Defaults to all of them, in order.
+        sort_columns (bool): If True, sort all the columns by name. Otherwise
+            the other columns come first, in their original order, followed
+            by the stacked monthly columns and month_col, sorted by name.
+
+    Returns:
+        pandas.DataFrame: len(md) records per record in rows.
+    """
+    patterns = _compile_month_patterns(tuple(md.items()))
+    months = np.array([month for month, _ in patterns])
+    if rows is None:
+        rows = np.arange(len(df))
+    n, k = len(rows), len(patterns)
+
+    # Assign each column to the first month that matches it, if any.
+    other_positions = list(range(df.shape[1]))
+    monthly_positions = {}
+    for i, (month, pattern) in enumerate(patterns):
+        for pos in [p for p in other_positions
+                    if pattern.search(str(df.columns[p]))]:
+            other_positions.remove(pos)
+            name = pattern.sub('', df.columns[pos])
+            monthly_positions.setdefault(name, [None] * k)[i] = pos
+
+    columns = [(df.columns[pos], pos) for pos in other_positions]
+    columns += sorted([(name, None) for name in monthly_positions] +
+                      [(month_col, None)], key=lambda c: c[0])
+    if sort_columns:
+        columns.sort(key=lambda c: c[0])
+
+    # Each record's months are adjacent, so its m-th month is stacked_rows
+    # m * n + r when the months are concatenated one after the other.
+    repeated_rows = np.repeat(rows, k)
+    stacked_rows = (np.arange(k) * n + np.arange(n)[:, np.newaxis]).ravel()
+    data = {}
+    for i, (name, pos) in enumerate(columns):
+        if pos is not None:
+            data[i] = df.iloc[:, pos].array.take(repeated_rows)
+        elif name == month_col:
+            data[i] = np.tile(months, n)
+        else:
+            data[i] = _stack_months(df, monthly_positions[name], rows,
+                                    stacked_rows)
+    out = pd.DataFrame(data, index=df.index[repeated_rows])
+    out.columns = pd.Index([name for name, _ in columns])
+    return out
+
+
+def _stack_months(df, positions, rows, stacked_rows):
+    """Stack one set of monthly columns, each record's months together."""
+    cols = [df.iloc[rows, pos] for pos in positions if pos is not None]
+    if (len(cols) == len(positions) and
+            all(isinstance(col.dtype, np.dtype) and col.dtype == cols[0].dtype
+                for col in cols)):
+        return np.stack([col.to_numpy() for col in cols], axis=1).ravel()
+    # Mixed or extension dtypes, or missing months, get whatever dtype
+    # concatenating the months one after another would give them.
+    months = [pd.DataFrame({0: df.iloc[rows, pos].array}) if pos is not None
+              else pd.DataFrame(index=pd.RangeIndex(len(rows)))
+              for pos in positions]
+    return pd.concat(months, ignore_index=True)[0].array.take(stacked_rows)
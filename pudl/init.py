@@ -19,6 +19,7 @@ Mapper (ORM) and initializes the database from several sources:
 """
 
 import os.path
+import contextlib
 import datetime
 import time
 import pandas as pd
@@ -67,13 +68,22 @@ def _create_tables(engine):
     _create_views(engine)
 
 
-def drop_tables(engine):
-    """Drop all the tables and views associated with the PUDL Database."""
+def drop_tables(engine, keep=()):
+    """Drop all the tables and views associated with the PUDL Database.
+
+    Args:
+        engine (sqlalchemy.engine.Engine): The PUDL database engine.
+        keep (iterable): Names of tables which should not be dropped.
+    """
     # Drop the views first because they depend on the underlying tables.
     # can't easily cascade because SQLAlchemy doesn't know about the views
+    metadata = pudl.models.entities.PUDLBase.metadata
     try:
         _drop_views(engine)
-        pudl.models.entities.PUDLBase.metadata.drop_all(engine)
+        if keep:
+            _drop_tables_except(engine, keep)
+        else:
+            metadata.drop_all(engine)
     except sa.exc.DBAPIError as e:
         print("""Error dropping and the existing tables. This sometimes
         happens when the database organization has changed. The easiest fix
@@ -82,6 +92,32 @@ def drop_tables(engine):
         raise e
 
 
+def _drop_tables_except(engine, keep):
+    """Drop all the PUDL tables other than those in keep.
+
+    MetaData.drop_all() would also drop all the enumerated types, including
+    any which the kept tables still use, so drop the tables one at a time, and
+    then drop only the enumerated types which no kept table uses.
+    """
+    metadata = pudl.models.entities.PUDLBase.metadata
+
+    def enums(tables):
+        return {col.type.name: col.type for tbl in tables
+                for col in tbl.columns if isinstance(col.type, sa.Enum)}
+
+    kept = [tbl for tbl in metadata.sorted_tables if tbl.name in keep]
+    dropped = [tbl for tbl in metadata.sorted_tables if tbl.name not in keep]
+    with engine.begin() as conn:
+        existing = set(sa.inspect(conn).get_table_names())
+        for tbl in reversed(dropped):
+            if tbl.name in existing:
+                conn.execute(sa.schema.DropTable(tbl))
+        kept_enums = enums(kept)
+        for name, enum in enums(dropped).items():
+            if name not in kept_enums:
+                enum.drop(conn, checkfirst=True)
+
+
 def _create_views(engine):
     """Create views on the PUDL tables
 
@@ -485,7 +521,8 @@ def _ingest_glue_eia_ferc1(engine,
 
 
 def _ETL_ferc1(pudl_engine, ferc1_tables, ferc1_years, verbose, ferc1_testing,
-               csvdir, keep_csv):
+               csvdir, keep_csv, packed_record_ids=False,
+               copy_formats=pc.copy_formats):
     if not ferc1_years or not ferc1_tables:
         if verbose:
             print('Not ingesting FERC1')
@@ -499,24 +536,34 @@ def _ETL_ferc1(pudl_engine, ferc1_tables, ferc1_years, verbose, ferc1_testing,
     # Transform FERC form 1
     ferc1_transformed_dfs = pudl.transform.ferc1.transform(ferc1_raw_dfs,
                                                            ferc1_tables=ferc1_tables,
-                                                           verbose=verbose)
+                                                           verbose=verbose,
+                                                           packed_record_ids=packed_record_ids)
     # Load FERC form 1
     pudl.load.dict_dump_load(ferc1_transformed_dfs,
                              "FERC 1",
                              pudl_engine,
                              need_fix_inting=pc.need_fix_inting,
                              verbose=verbose,
+                             copy_formats=copy_formats,
                              csvdir=csvdir,
                              keep_csv=keep_csv)
 
 
 def _ETL_eia(pudl_engine, eia923_tables, eia923_years, eia860_tables,
-             eia860_years, verbose, csvdir, keep_csv):
+             eia860_years, verbose, csvdir, keep_csv, workers=1,
+             cache_dir=None, max_open_workbooks=None,
+             copy_formats=pc.copy_formats):
     # Extract EIA forms 923, 860
     eia923_raw_dfs = pudl.extract.eia923.extract(eia923_years=eia923_years,
-                                                 verbose=verbose)
-    eia860_raw_dfs = pudl.extract.eia860.extract(eia860_years=eia860_years,
-                                                 verbose=verbose)
+                                                 verbose=verbose,
+                                                 workers=workers,
+                                                 cache_dir=cache_dir)
+    eia860_raw_dfs = pudl.extract.eia860.extract(
+        eia860_years=eia860_years,
+        verbose=verbose,
+        cache_dir=cache_dir,
+        workers=workers,
+        max_open_workbooks=max_open_workbooks)
     # Transform EIA forms 923, 860
     eia923_transformed_dfs = \
         pudl.transform.eia923.transform(eia923_raw_dfs,
@@ -545,10 +592,15 @@ def _ETL_eia(pudl_engine, eia923_tables, eia923_years, eia860_tables,
                                  need_fix_inting=pc.need_fix_inting,
                                  verbose=verbose,
                                  csvdir=csvdir,
-                                 keep_csv=keep_csv)
+                                 keep_csv=keep_csv,
+                                 copy_formats=copy_formats)
 
 
-def _ETL_cems(pudl_engine, epacems_years, verbose, csvdir, keep_csv, states):
+def _ETL_cems(pudl_engine, epacems_years, verbose, csvdir, keep_csv, states,
+              workers=1, max_in_flight=None, outputs=('postgres',),
+              parquet_dir=None, copy_writers=0, memory_fraction=None,
+              incremental=False, index_workers=None, brin=False,
+              logged=True, chunksize=None, copy_format='csv'):
     """"""
     # If we're not doing CEMS, just stop here to avoid printing messages like
     # "Reading EPA CEMS data...", which could be confusing.
@@ -562,36 +614,115 @@ def _ETL_cems(pudl_engine, epacems_years, verbose, csvdir, keep_csv, states):
         states = list(pc.cems_states.keys())
     if not epacems_years:
         return
+    for output in outputs:
+        assert output in ('postgres', 'parquet'), \
+            f"Unknown EPA CEMS output: {output}"
+    assert 'postgres' in outputs or not incremental, \
+        "Incremental EPA CEMS ingest requires the postgres output."
+
+    partitions = list(pudl.extract.epacems.epacems_partitions(
+        epacems_years, states))
+    # Record which files were loaded, so later runs can be incremental.
+    checksums = {} if 'postgres' in outputs else None
+    if incremental:
+        # Finding the changed partitions needs all the checksums up front.
+        # Otherwise they're calculated as the files are extracted, so each
+        # file is only read once.
+        checksums = pudl.extract.epacems.get_epacems_checksums(
+            partitions, workers=workers)
+        loaded = pudl.models.epacems.read_manifest(pudl_engine)
+        # Each Parquet file holds a whole state-year, so every month of a
+        # state-year with any changes has to be written out again.
+        changed = pudl.models.epacems.changed_partitions(
+            partitions, checksums, loaded,
+            whole_years='parquet' in outputs)
+        if not changed:
+            if verbose:
+                print('EPA CEMS data is already up to date.')
+            return None
+        if verbose:
+            print("Updating {} of {} EPA CEMS state-months.".format(
+                len(changed), len(partitions)))
+        # Remove the old version of any changed partitions, and anything left
+        # behind by an interrupted load.
+        pudl.models.epacems.forget_partitions(pudl_engine, changed)
+        partitions = changed
 
     # NOTE: This a generator for raw dataframes
     epacems_raw_dfs = pudl.extract.epacems.extract(
-        epacems_years=epacems_years, states=states, verbose=verbose)
+        epacems_years=epacems_years, states=states, verbose=verbose,
+        workers=workers, max_in_flight=max_in_flight, partitions=partitions,
+        chunksize=chunksize, checksums=None if incremental else checksums)
     # NOTE: This is a generator for transformed dataframes
     epacems_transformed_dfs = pudl.transform.epacems.transform(
         epacems_raw_dfs, verbose=verbose
     )
     if verbose:
-        print("Loading tables from EPA CEMS into PUDL:")
+        print("Loading tables from EPA CEMS into {}:".format(
+            " & ".join(outputs)))
         start_time = time.monotonic()
-    with pudl.load.BulkCopy(
-            table_name="hourly_emissions_epacems",
-            engine=pudl_engine,
-            csvdir=csvdir,
-            keep_csv=keep_csv) as loader:
+    with contextlib.ExitStack() as stack:
+        loader = None
+        parquet = None
+        if 'postgres' in outputs and copy_writers > 0:
+            loader = stack.enter_context(pudl.load.PipelinedBulkCopy(
+                table_name="hourly_emissions_epacems",
+                engine=pudl_engine,
+                csvdir=csvdir,
+                keep_csv=keep_csv,
+                copy_format=copy_format,
+                memory_fraction=memory_fraction,
+                writers=copy_writers))
+        elif 'postgres' in outputs:
+            loader = stack.enter_context(pudl.load.BulkCopy(
+                table_name="hourly_emissions_epacems",
+                engine=pudl_engine,
+                csvdir=csvdir,
+                keep_csv=keep_csv,
+                copy_format=copy_format,
+                memory_fraction=memory_fraction))
+        if 'parquet' in outputs:
+            parquet = stack.enter_context(pudl.load.ParquetDump(
+                table_name="hourly_emissions_epacems",
+                outdir=parquet_dir))
 
         for transformed_df_dict in epacems_transformed_dfs:
             # There's currently only one dataframe in this dict at a time,
             # but that could be changed if useful.
             # The keys to the dict are a tuple (year, month, state)
-            for transformed_df in transformed_df_dict.values():
-                loader.add(transformed_df)
+            for (year, month, state), transformed_df in \
+                    transformed_df_dict.items():
+                # ParquetDump copies the data, so it needs to go first, before
+                # BulkCopy modifies the integer columns for CSV output.
+                if parquet is not None:
+                    parquet.add(transformed_df, year=year, state=state)
+                if loader is not None:
+                    loader.add(transformed_df)
+    # Only record the partitions once they've all been copied successfully.
+    if checksums is not None:
+        pudl.models.epacems.record_partitions(
+            pudl_engine,
+            {p: checksums[p] for p in partitions if p in checksums})
     if verbose:
         time_message = "    Loading    EPA CEMS took {}".format(
             time.strftime("%H:%M:%S",
                           time.gmtime(time.monotonic() - start_time)))
         print(time_message)
+        if loader is not None:
+            spills = loader.stats()
+            print("    {} spills, {} rows, {:.0f} MB: {:.0f}s concatenating, "
+                  "{:.0f}s copying".format(
+                      len(spills), spills.rows.sum(),
+                      spills.bytes.sum() / 1024**2,
+                      spills.concat_seconds.sum(),
+                      spills.copy_seconds.sum()))
         start_time = time.monotonic()
-    pudl.models.epacems.finalize(pudl_engine)
+    # The Parquet output doesn't need any indexes, so only finalize the
+    # database table if we loaded it.
+    if 'postgres' not in outputs:
+        return
+    pudl.models.epacems.finalize(pudl_engine, logged=logged, brin=brin,
+                                 workers=index_workers, verbose=verbose)
     if verbose:
         time_message = "    Finalizing EPA CEMS took {}".format(
             time.strftime("%H:%M:%S", time.gmtime(
@@ -613,7 +744,24 @@ def init_db(ferc1_tables=None,
             pudl_testing=None,
             ferc1_testing=None,
             csvdir=None,
-            keep_csv=None):
+            keep_csv=None,
+            epacems_workers=1,
+            epacems_max_in_flight=None,
+            epacems_outputs=('postgres',),
+            parquet_dir=None,
+            epacems_copy_writers=0,
+            epacems_memory_fraction=None,
+            epacems_incremental=False,
+            epacems_index_workers=None,
+            epacems_brin=False,
+            epacems_logged=True,
+            epacems_chunksize=None,
+            eia_workers=1,
+            eia_cache=False,
+            eia_cache_dir=None,
+            eia860_max_open_workbooks=None,
+            ferc1_packed_record_ids=False,
+            copy_formats=None):
     """
     Create the PUDL database and fill it up with data.
 
@@ -635,6 +783,57 @@ def init_db(ferc1_tables=None,
             data.
         epacems_years (iterable): The list of years from which to pull EPA CEMS
             data. Note that there's only one EPA CEMS table.
+        epacems_workers (int): Number of processes used to read the EPA CEMS
+            files. 1 reads them serially, None uses all available CPUs.
+        epacems_max_in_flight (int): Maximum number of EPA CEMS files which
+            may be read ahead of the transform and load steps when using
+            multiple workers. Defaults to twice the number of workers.
+        epacems_outputs (iterable): Where to write the EPA CEMS data. May
+            include 'postgres' (the hourly_emissions_epacems table) and/or
+            'parquet' (a Parquet dataset partitioned by year and state).
+        parquet_dir (str): Directory under which the Parquet datasets are
+            written. Defaults to SETTINGS['parquet_dir'].
+        epacems_copy_writers (int): Number of background threads (and
+            database connections) used to COPY the EPA CEMS data into
+            postgres while the extract & transform carry on. With 0, the
+            data is copied in the main thread.
+        epacems_memory_fraction (float): If given, the EPA CEMS data is
+            copied into postgres whenever the accumulated data exceeds this
+            fraction of the available memory, rather than every 1 GB.
+        epacems_incremental (bool): If True, keep the existing EPA CEMS table
+            and only load the state-month files which are new, or whose
+            checksums have changed since they were loaded. The finalization
+            of the table is skipped if nothing has changed.
+        epacems_index_workers (int): Number of indexes on the EPA CEMS table
+            to build at the same time, each on its own connection. Defaults
+            to building all of them at once.
+        epacems_brin (bool): If True, use BRIN rather than B-tree indexes on
+            the EPA CEMS operating_datetime column.
+        epacems_logged (bool): If False, leave the EPA CEMS table UNLOGGED.
+            Only do this if the database is disposable: an UNLOGGED table is
+            emptied if postgres shuts down uncleanly.
+        epacems_chunksize (int): If given, stream each EPA CEMS file through
+            the extract, transform and load in chunks of this many rows, which
+            bounds the memory needed for the largest state-month files.
+        eia_workers (int): Number of processes used to read the EIA
+            spreadsheets. 1 reads them serially, None uses all available
+            CPUs.
+        eia_cache (bool): If True, cache each page parsed from the EIA
+            spreadsheets, and read it from the cache on later runs until the
+            spreadsheet or its column map changes.
+        eia_cache_dir (str): Directory holding the cached EIA pages. Defaults
+            to SETTINGS['eia_cache_dir'].
+        eia860_max_open_workbooks (int): The most EIA 860 workbooks which
+            may be open at once when reading them with several eia_workers,
+            which bounds the memory needed. Defaults to eia_workers.
+        ferc1_packed_record_ids (bool): If True, the FERC Form 1 record IDs
+            are packed into int64s while the tables are transformed, which
+            takes less memory and makes identifying the large steam plants
+            faster. They're turned back into the usual strings before they're
+            loaded, so the PUDL DB is the same either way.
+        copy_formats (dict): The COPY format ('csv' or 'binary') to load
+            each table with, keyed by table name. Tables which aren't listed
+            are loaded from CSV. Defaults to pudl.constants.copy_formats.
         debug (bool): You can tell init_db to ingest whatever list of tables
             you want, but if your desired table is not in the list of known to
             be working tables, you need to set debug=True (otherwise init_db
@@ -656,9 +855,22 @@ def init_db(ferc1_tables=None,
             for table in eia923_tables:
                 assert table in pc.eia923_pudl_tables
 
+    if parquet_dir is None:
+        parquet_dir = SETTINGS['parquet_dir']
+    if not eia_cache:
+        eia_cache_dir = None
+    elif eia_cache_dir is None:
+        eia_cache_dir = SETTINGS['eia_cache_dir']
+    if copy_formats is None:
+        copy_formats = pc.copy_formats
+
     # Connect to the PUDL DB, wipe out & re-create tables:
     pudl_engine = connect_db(testing=pudl_testing)
-    drop_tables(pudl_engine)
+    keep_tables = ()
+    if epacems_incremental:
+        keep_tables = (pudl.models.epacems.HourlyEmissions.__tablename__,
+                       pudl.models.epacems.HourlyEmissionsManifest.__tablename__)
+    drop_tables(pudl_engine, keep=keep_tables)
     _create_tables(pudl_engine)
 
     _ingest_datasets_table(ferc1_years=ferc1_years,
@@ -690,7 +902,9 @@ def init_db(ferc1_tables=None,
                verbose=verbose,
                ferc1_testing=ferc1_testing,
                csvdir=csvdir,
-               keep_csv=keep_csv)
+               keep_csv=keep_csv,
+               packed_record_ids=ferc1_packed_record_ids,
+               copy_formats=copy_formats)
     # ETL for EIA forms 860, 923
     _ETL_eia(pudl_engine=pudl_engine,
              eia923_tables=eia923_tables,
@@ -699,13 +913,30 @@ def init_db(ferc1_tables=None,
              eia860_years=eia860_years,
              verbose=verbose,
              csvdir=csvdir,
-             keep_csv=keep_csv)
+             keep_csv=keep_csv,
+             workers=eia_workers,
+             cache_dir=eia_cache_dir,
+             max_open_workbooks=eia860_max_open_workbooks,
+             copy_formats=copy_formats)
     # ETL for EPA CEMS
     _ETL_cems(pudl_engine=pudl_engine,
               epacems_years=epacems_years,
               states=epacems_states,
               verbose=verbose,
               csvdir=csvdir,
-              keep_csv=keep_csv)
+              keep_csv=keep_csv,
+              workers=epacems_workers,
+              max_in_flight=epacems_max_in_flight,
+              outputs=epacems_outputs,
+              parquet_dir=parquet_dir,
+              copy_writers=epacems_copy_writers,
+              memory_fraction=epacems_memory_fraction,
+              incremental=epacems_incremental,
+              index_workers=epacems_index_workers,
+              brin=epacems_brin,
+              logged=epacems_logged,
+              chunksize=epacems_chunksize,
+              copy_format=copy_formats.get('hourly_emissions_epacems',
+                                           'csv'))
 
     pudl_engine.execute("ANALYZE")
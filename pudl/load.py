@@ -1,7 +1,10 @@
 """A module with functions for loading the pudl database tables."""
 
-import pandas as pd
+import os
+import io
 import contextlib
+import numpy as np
+import pandas as pd
 import pudl.models.entities
 import pudl.transform.pudl
 import pudl.constants as pc
@@ -58,6 +61,291 @@ def _csv_dump_load(df, table_name, engine, csvdir='', keep_csv=False):
             shutil.copyfileobj(f, outfile)
 
 
+# PostgreSQL binary COPY format: a fixed signature, a 32 bit flags field and
+# a 32 bit header extension length, followed by the tuples, and a 16 bit -1
+# trailer. See https://www.postgresql.org/docs/current/sql-copy.html
+_PGCOPY_HEADER = b'PGCOPY\n\xff\r\n\x00' + b'\x00' * 8
+_PGCOPY_TRAILER = b'\xff\xff'
+# Dates & timestamps are sent relative to the postgres epoch.
+_PG_EPOCH_DATE = np.datetime64('2000-01-01', 'D')
+_PG_EPOCH_TIMESTAMP = np.datetime64('2000-01-01T00:00:00', 'us')
+
+
+def _round_to_usecs(values):
+    """Round timedelta64 values to integer microseconds, like postgres does."""
+    nsecs = values.astype('timedelta64[ns]').astype(np.int64)
+    return np.round(nsecs / 1000).astype(np.int64)
+
+
+def _fixed_width_field(values, mask, dtype):
+    """
+    Encode a column of fixed width values for binary COPY.
+
+    Args:
+        values (numpy.ndarray): The column values. Masked values must still
+            be castable to dtype, but are otherwise ignored.
+        mask (numpy.ndarray): Boolean array, True where the value is NULL.
+        dtype (str): Big-endian numpy dtype of the postgres binary format.
+    Returns:
+        tuple: (lengths, payload) where lengths is the int32 length of each
+        field (-1 for NULL) and payload is a uint8 array with the encoded
+        non-NULL values, one after another.
+    """
+    dtype = np.dtype(dtype)
+    lengths = np.where(mask, -1, dtype.itemsize).astype(np.int32)
+    payload = np.ascontiguousarray(values[~mask]).astype(dtype).view(np.uint8)
+    return lengths, payload
+
+
+def _text_field(col, empty_strings_null=True):
+    """
+    Encode a column of strings for binary COPY.
+
+    Only the unique values are encoded to UTF-8. The encoded bytes of each row
+    are then gathered using the integer codes, without any per-row Python.
+    Empty strings are NULL (as they are in the CSV COPY format) unless
+    empty_strings_null is False.
+    """
+    if col.dtype.name == 'category':
+        codes = col.cat.codes.values
+        uniques = col.cat.categories
+    else:
+        codes, uniques = pd.factorize(col)
+    encoded = [str(u).encode('utf-8') for u in uniques]
+    unique_lengths = np.array([len(e) for e in encoded], dtype=np.int64)
+    unique_bytes = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+    unique_starts = np.cumsum(unique_lengths) - unique_lengths
+
+    # NA values have code -1, which picks out the zero length appended here.
+    # Empty strings are NULL in the CSV COPY format, so they are here too.
+    lengths = np.append(unique_lengths, 0)[codes]
+    if empty_strings_null:
+        mask = lengths == 0
+    else:
+        mask = codes == -1
+    lengths = np.where(mask, -1, lengths).astype(np.int32)
+    present = codes[~mask]
+    sizes = unique_lengths[present]
+    total = sizes.sum()
+    # The offset of each byte within its own row's string:
+    within = np.arange(total) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+    payload = unique_bytes[np.repeat(unique_starts[present], sizes) + within]
+    return lengths, payload
+
+
+def _binary_field(col, sql_type, empty_strings_null=True):
+    """
+    Encode a DataFrame column in the binary format of its postgres type.
+
+    Args:
+        col (pandas.Series): The data to be encoded.
+        sql_type (sqlalchemy.types.TypeEngine): Type of the database column
+            it's going to be loaded into.
+        empty_strings_null (bool): Whether empty strings are loaded as NULL.
+    Returns:
+        tuple: (lengths, payload), see _fixed_width_field().
+    """
+    import sqlalchemy as sa
+
+    mask = col.isna().values
+    # Check Enum before String, since it's a subclass of String.
+    if isinstance(sql_type, (sa.Enum, sa.String)):
+        return _text_field(col, empty_strings_null=empty_strings_null)
+    if isinstance(sql_type, sa.Boolean):
+        values = col.where(~mask, False).astype(bool).values
+        return _fixed_width_field(values, mask, '?')
+    if isinstance(sql_type, sa.REAL):
+        return _fixed_width_field(col.values, mask, '>f4')
+    if isinstance(sql_type, sa.Numeric) and not isinstance(sql_type, sa.Float):
+        # The binary numeric format is a variable length base 10000 encoding
+        # which we don't implement. Load tables with NUMERIC columns as CSV.
+        raise NotImplementedError(
+            "Binary COPY of NUMERIC columns isn't supported.")
+    if isinstance(sql_type, sa.Float):
+        return _fixed_width_field(col.values, mask, '>f8')
+    if isinstance(sql_type, sa.Integer):
+        if isinstance(sql_type, sa.SmallInteger):
+            dtype = '>i2'
+        elif isinstance(sql_type, sa.BigInteger):
+            dtype = '>i8'
+        else:
+            dtype = '>i4'
+        # Integer columns with NA values are stored as floats by pandas.
+        values = col.where(~mask, 0).to_numpy()
+        info = np.iinfo(dtype)
+        if values.dtype.kind in 'iub':
+            bad = (values < info.min) | (values > info.max)
+        else:
+            values = values.astype(np.float64)
+            # info.max + 1 is a power of two, so it's exact as a float.
+            bad = (values != np.trunc(values)) | (values < info.min) | \
+                (values >= float(info.max + 1))
+        if bad.any():
+            raise ValueError(
+                f"Column {col.name} has values which aren't whole numbers "
+                f"from {info.min} to {info.max}, so can't be loaded as "
+                f"{sql_type}: {col[bad].unique()[:5].tolist()}")
+        return _fixed_width_field(values.astype(np.int64), mask, dtype)
+    if isinstance(sql_type, sa.DateTime):
+        values = pd.to_datetime(col).values - _PG_EPOCH_TIMESTAMP
+        return _fixed_width_field(_round_to_usecs(values), mask, '>i8')
+    if isinstance(sql_type, sa.Date):
+        values = pd.to_datetime(col).values.astype('datetime64[D]')
+        values = (values - _PG_EPOCH_DATE).astype(np.int64)
+        return _fixed_width_field(values, mask, '>i4')
+    if isinstance(sql_type, sa.Interval):
+        # An interval is 64 bits of microseconds, 32 bits of days and 32 bits
+        # of months. We put the whole duration into the microseconds.
+        values = np.zeros(len(col), dtype=[('us', '>i8'), ('d', '>i4'),
+                                           ('m', '>i4')])
+        values['us'] = _round_to_usecs(pd.to_timedelta(col).values)
+        return _fixed_width_field(values, mask, values.dtype)
+    raise NotImplementedError(
+        f"Binary COPY of {sql_type} columns isn't supported.")
+
+
+def _binary_copy_tuples(df, tbl, empty_strings_null=True):
+    """
+    Encode all the records in a DataFrame as binary COPY tuples.
+
+    Each tuple is a 16 bit field count, followed by the fields, each of which
+    is a 32 bit length (-1 for NULL) and then that many bytes of data. The
+    fields are encoded column by column, and then scattered into their places
+    in a single output buffer.
+
+    Args:
+        df (pandas.DataFrame): The records to encode. Column names must match
+            the names of columns in tbl.
+        tbl (sqlalchemy.Table): The table the records will be loaded into.
+        empty_strings_null (bool): Whether empty strings are loaded as NULL.
+    Returns:
+        numpy.ndarray: uint8 buffer containing the encoded tuples.
+    """
+    nrows = len(df)
+    fields = [_binary_field(df[col], tbl.columns[col].type,
+                            empty_strings_null=empty_strings_null)
+              for col in df.columns]
+    row_sizes = np.full(nrows, 2, dtype=np.int64)
+    for lengths, _ in fields:
+        row_sizes += 4 + np.maximum(lengths, 0)
+    row_starts = np.cumsum(row_sizes) - row_sizes
+    buf = np.empty(row_sizes.sum(), dtype=np.uint8)
+
+    field_count = np.array([len(fields)], dtype='>i2').view(np.uint8)
+    buf[row_starts[:, None] + np.arange(2)] = field_count
+    position = row_starts + 2
+    for lengths, payload in fields:
+        buf[position[:, None] + np.arange(4)] = \
+            lengths.astype('>i4').view(np.uint8).reshape(-1, 4)
+        position += 4
+        sizes = np.maximum(lengths, 0)
+        payload_starts = np.cumsum(sizes) - sizes
+        buf[np.repeat(position - payload_starts, sizes) +
+            np.arange(payload.size)] = payload
+        position += sizes
+    return buf
+
+
+class _ChunkStream(io.RawIOBase):
+    """A read-only file-like object that reads through an iterable of bytes"""
+
+    def __init__(self, chunks):
+        self.chunks = iter(chunks)
+        self.current = memoryview(b'')
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        while not len(self.current):
+            try:
+                self.current = memoryview(next(self.chunks)).cast('B')
+            except StopIteration:
+                return 0
+        n = min(len(b), len(self.current))
+        b[:n] = self.current[:n]
+        self.current = self.current[n:]
+        return n
+
+
+def binary_copy(dfs, tbl, engine, columns, empty_strings_null=True):
+    """
+    Load a stream of DataFrames into a table using a single binary COPY FROM.
+
+    Each DataFrame is encoded as it's reached (see _binary_copy_tuples()) and
+    streamed to the database, so only one of them needs to be in memory at a
+    time, however many there are.
+
+    Args:
+        dfs (iterable): The DataFrames to load, e.g. a generator of chunks of
+            a larger dataset. Each must have all of the columns.
+        tbl (sqlalchemy.Table): The table to load the data into. The types of
+            its columns define their binary encoding.
+        engine (sqlalchemy.engine): SQLAlchemy database engine, or an open
+            connection, which will be used to load the data.
+        columns (list): The names of the columns to load.
+        empty_strings_null (bool): Whether empty strings are loaded as NULL,
+            as they are when loading from CSV.
+    Returns: Nothing.
+    """
+    import postgres_copy
+
+    columns = list(columns)
+
+    def chunks():
+        yield _PGCOPY_HEADER
+        for df in dfs:
+            if len(df):
+                yield _binary_copy_tuples(
+                    df[columns], tbl, empty_strings_null=empty_strings_null)
+        yield _PGCOPY_TRAILER
+
+    postgres_copy.copy_from(_ChunkStream(chunks()), tbl, engine,
+                            columns=tuple(columns), format='binary')
+
+
+def _binary_dump_load(df, table_name, engine, chunk_rows=100000):
+    """
+    Load a dataframe into postgresql using a binary COPY FROM.
+
+    Unlike _csv_dump_load(), the data is never converted to text. Each column
+    is encoded directly from its numpy representation into the postgresql
+    binary COPY format, chunk_rows records at a time, and the encoded chunks
+    are streamed to the database as they're produced. Integer columns with
+    NA values are sent as NULLs, so they don't need fix_int_na().
+
+    Args:
+        df (pandas.DataFrame): The DataFrame which is to be loaded into the
+            database. All DataFrame columns must have exactly the same names
+            as the database fields they are meant to populate.
+        table_name (str): The exact name of the database table which the
+            DataFrame df is going to be used to populate. It will be used to
+            look up an SQLAlchemy table object in the PUDLBase metadata
+            object, which defines the binary encoding of each column.
+        engine (sqlalchemy.engine): SQLAlchemy database engine, or an open
+            connection, which will be used to load the data.
+        chunk_rows (int): Number of records to encode at a time. This bounds
+            the size of the encoded buffer held in memory.
+    Returns: Nothing.
+    """
+    tbl = pudl.models.entities.PUDLBase.metadata.tables[table_name]
+    binary_copy((df.iloc[start:start + chunk_rows]
+                 for start in range(0, len(df), chunk_rows)),
+                tbl, engine, df.columns)
+
+
+def _dump_load(df, table_name, engine, copy_format='csv',
+               csvdir='', keep_csv=False):
+    """Load a dataframe into postgresql using the requested COPY format."""
+    if copy_format == 'binary':
+        _binary_dump_load(df, table_name, engine)
+    elif copy_format == 'csv':
+        _csv_dump_load(df, table_name, engine,
+                       csvdir=csvdir, keep_csv=keep_csv)
+    else:
+        raise ValueError(f"Unknown COPY format: {copy_format}")
+
+
 def _fix_int_cols(table_to_fix,
                   transformed_dct,
                   need_fix_inting=pc.need_fix_inting,
@@ -81,6 +369,57 @@ def _fix_int_cols(table_to_fix,
                 transformed_dct[table_to_fix][column])
 
 
+def _memory_usage(df, sample_size=1000):
+    """
+    Estimate the memory used by a DataFrame, including the objects it holds.
+
+    DataFrame.memory_usage() only counts the 8 byte pointers in object
+    columns, and not the strings (or other objects) they point to, which can
+    be several times larger. Using deep=True is accurate, but it has to look
+    at every single object. Here the columns with fixed width types are
+    measured exactly, and the object columns are measured deeply on an
+    evenly spaced sample of at most sample_size values, and scaled up.
+
+    Args:
+        df (pandas.DataFrame): The DataFrame to measure.
+        sample_size (int): Number of values to measure in each object column.
+    Returns:
+        int: Approximate number of bytes used by df.
+    """
+    total = df.index.memory_usage()
+    for _, col in df.items():
+        if col.dtype != object or len(col) <= sample_size:
+            total += col.memory_usage(index=False, deep=True)
+        else:
+            sample = col.iloc[::len(col) // sample_size]
+            per_value = sample.memory_usage(index=False, deep=True) / len(sample)
+            total += int(per_value * len(col))
+    return total
+
+
+def _available_memory():
+    """
+    Find the amount of memory available for new allocations, in bytes.
+
+    On Linux, this is MemAvailable from /proc/meminfo, which (unlike "free"
+    memory) includes caches that the kernel can reclaim. psutil is used if
+    it's installed, and otherwise we fall back on the number of free pages.
+    """
+    try:
+        import psutil
+        return psutil.virtual_memory().available
+    except ImportError:
+        pass
+    try:
+        with open('/proc/meminfo') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+
+
 class BulkCopy(contextlib.AbstractContextManager):
     """Accumulate several DataFrames, then COPY FROM python to postgresql
 
@@ -95,14 +434,32 @@ class BulkCopy(contextlib.AbstractContextManager):
         engine (sqlalchemy.engine): SQLAlchemy database engine, which will be
             used to pull the CSV output into the database.
         buffer (int): Size of data to accumulate (in bytes) before actually
-            writing the data into postgresql. (Approximate, because we don't
-            introspect memory usage 'deeply'). Default 1 GB.
+            writing the data into postgresql. (Approximate, because the memory
+            used by object columns is estimated from a sample of values).
+            Default 1 GB.
         csvdir (str): Path to the directory into which the CSV file should be
             saved, if it's being kept.
         keep_csv (bool): True if the CSV output should be saved after the data
             has been loaded into the database. False if they should be deleted.
             NOTE: If multiple COPYs are done for the same table_name, only
             the last will be retained by keep_csv, which may be unsatisfying.
+            Only applies to the CSV COPY format.
+        copy_format (str): Either 'csv' or 'binary'. If None, use the format
+            given for table_name in pudl.constants.copy_formats, or CSV if
+            it's not listed there.
+        memory_fraction (float): If given, ignore buffer, and instead spill
+            whenever the accumulated data exceeds this fraction of the memory
+            that's available (including the memory taken up by the data
+            that's already been accumulated). This adapts the spill size to
+            whatever else is going on. Note that spilling temporarily needs
+            2-3 times the accumulated size, for the concatenated DataFrame and
+            its serialized copy, so a fraction of more than about 0.3 risks
+            running out of memory.
+    Attributes:
+        spill_stats (list): One dict per spill, with the number of rows,
+            the (estimated) bytes of data, and the number of seconds spent
+            concatenating the DataFrames and copying them into the database.
+            See also stats().
     Example:
     with BulkCopy(my_table, my_engine) as p:
         for df in df_generator:
@@ -110,12 +467,21 @@ class BulkCopy(contextlib.AbstractContextManager):
     """
 
     def __init__(self, table_name, engine, buffer=1024**3,
-                 csvdir='', keep_csv=False):
+                 csvdir='', keep_csv=False, copy_format=None,
+                 memory_fraction=None):
         self.table_name = table_name
         self.engine = engine
         self.buffer = buffer
+        if memory_fraction is not None:
+            assert 0 < memory_fraction < 1, \
+                "memory_fraction must be between 0 and 1."
+        self.memory_fraction = memory_fraction
+        self.spill_stats = []
         self.keep_csv = keep_csv
         self.csvdir = csvdir
+        if copy_format is None:
+            copy_format = pc.copy_formats.get(table_name, 'csv')
+        self.copy_format = copy_format
         # Initialize a list to keep the dataframes
         self.accumulated_dfs = []
         self.accumulated_size = 0
@@ -126,13 +492,28 @@ class BulkCopy(contextlib.AbstractContextManager):
         df = self._fix_inting(df)
         # Note: append to a list here, then do a concat when we spill
         self.accumulated_dfs.append(df)
-        self.accumulated_size += sum(df.memory_usage())
-        if self.accumulated_size > self.buffer:
+        self.accumulated_size += _memory_usage(df)
+        if self.accumulated_size > self.spill_threshold():
             # Debugging:
             # print(f"DEBUG: Copying {len(self.accumulated_dfs)} accumulated dataframes, " +
             #       f"totalling {round(self.accumulated_size / 1024**2)} MB")
             self.spill()
 
+    def spill_threshold(self):
+        """The accumulated size (in bytes) above which we spill"""
+        if self.memory_fraction is None:
+            return self.buffer
+        # The accumulated data isn't available any more, but would be if we
+        # spilled, so count it.
+        return self.memory_fraction * \
+            (_available_memory() + self.accumulated_size)
+
+    def stats(self):
+        """A DataFrame describing each of the spills so far"""
+        return pd.DataFrame(
+            list(self.spill_stats),
+            columns=['rows', 'bytes', 'concat_seconds', 'copy_seconds'])
+
     def _check_names(self):
         expected_colnames = set(self.accumulated_dfs[0].columns.values)
         for df in self.accumulated_dfs:
@@ -148,6 +529,9 @@ class BulkCopy(contextlib.AbstractContextManager):
 
     def _fix_inting(self, df):
         """Fix integers for columns with NA. See pudl.transform.pudl.fix_int_na"""
+        # The binary COPY format sends NA values as NULL directly.
+        if self.copy_format != 'csv':
+            return df
         try:
             for column in pc.need_fix_inting[self.table_name]:
                 df[column] = pudl.transform.pudl.fix_int_na(df[column])
@@ -155,14 +539,27 @@ class BulkCopy(contextlib.AbstractContextManager):
             pass
         return df
 
+    def _load(self, dfs, size):
+        """Concatenate some dataframes, load them, and record how it went"""
+        import time
+        start_time = time.monotonic()
+        all_dfs = pd.concat(dfs, ignore_index=True, sort=False)
+        concat_time = time.monotonic()
+        _dump_load(all_dfs, table_name=self.table_name, engine=self.engine,
+                   copy_format=self.copy_format,
+                   csvdir=self.csvdir, keep_csv=self.keep_csv)
+        self.spill_stats.append({
+            'rows': len(all_dfs),
+            'bytes': size,
+            'concat_seconds': concat_time - start_time,
+            'copy_seconds': time.monotonic() - concat_time,
+        })
+
     def spill(self):
         """Spill the accumulated dataframes into postgresql"""
         if self.accumulated_dfs:
             self._check_names()
-            all_dfs = pd.concat(self.accumulated_dfs,
-                                copy=False, ignore_index=True, sort=False)
-            _csv_dump_load(all_dfs, table_name=self.table_name, engine=self.engine,
-                           csvdir=self.csvdir, keep_csv=self.keep_csv)
+            self._load(self.accumulated_dfs, self.accumulated_size)
         self.accumulated_dfs = []
         self.accumulated_size = 0
 
@@ -173,28 +570,298 @@ class BulkCopy(contextlib.AbstractContextManager):
         self.close()
 
 
+class PipelinedBulkCopy(BulkCopy):
+    """Like BulkCopy, but COPY the spilled DataFrames in background threads
+
+    With BulkCopy, whatever is generating the DataFrames sits idle while each
+    spill is concatenated, serialized and copied into the database, and the
+    database sits idle while the next batch of DataFrames is generated.
+    PipelinedBulkCopy instead puts each spill onto a bounded queue, and
+    returns immediately. A pool of writer threads takes the spills off the
+    queue, and loads them concurrently, each using its own connection from
+    the engine's connection pool.
+
+    If the queue is full, spill() blocks until a writer frees up a slot, so
+    the number of spills held in memory is at most queue_size + writers (plus
+    the one being accumulated). If a writer fails, no further spills are
+    loaded, and the writer's exception is raised in the main thread by the
+    next add() or spill(), or on exiting the context manager.
+
+    Args:
+        table_name, engine, buffer, csvdir, keep_csv, copy_format,
+            memory_fraction: See BulkCopy. Note that with memory_fraction,
+            the spills waiting in the queue count as available memory, so
+            it needs to be lower than it would be with BulkCopy.
+        writers (int): Number of writer threads, and so of concurrent
+            database connections. The engine's connection pool needs to
+            allow at least this many connections.
+        queue_size (int): Maximum number of spills waiting to be loaded.
+            Defaults to the number of writers.
+    """
+
+    def __init__(self, table_name, engine, buffer=1024**3,
+                 csvdir='', keep_csv=False, copy_format=None,
+                 memory_fraction=None, writers=2, queue_size=None):
+        import queue
+        import threading
+        super().__init__(table_name, engine, buffer=buffer,
+                         csvdir=csvdir, keep_csv=keep_csv,
+                         copy_format=copy_format,
+                         memory_fraction=memory_fraction)
+        assert writers >= 1, "PipelinedBulkCopy needs at least one writer."
+        if queue_size is None:
+            queue_size = writers
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.errors = []
+        self.failed = threading.Event()
+        self.threads = [
+            threading.Thread(target=self._writer, daemon=True,
+                             name=f"BulkCopy-{table_name}-{i}")
+            for i in range(writers)
+        ]
+        for thread in self.threads:
+            thread.start()
+
+    def _writer(self):
+        """Load spills from the queue until a None tells us to stop"""
+        while True:
+            item = self.queue.get()
+            try:
+                if item is None:
+                    return
+                # Once anything has failed, just drain the queue.
+                if self.failed.is_set():
+                    continue
+                self._load(*item)
+            except Exception as err:
+                self.errors.append(err)
+                self.failed.set()
+            finally:
+                # Don't hang on to the data while waiting for the next spill.
+                item = None
+                self.queue.task_done()
+
+    def _raise_writer_error(self):
+        if self.errors:
+            raise self.errors[0]
+
+    def _put(self, item):
+        """Put an item on the queue, waiting for space if it's full"""
+        import queue
+        while True:
+            try:
+                self.queue.put(item, timeout=1)
+                return
+            except queue.Full:
+                # Don't wait forever on writers which have stopped loading.
+                if item is not None:
+                    self._raise_writer_error()
+
+    def spill(self):
+        """Queue the accumulated dataframes to be loaded into postgresql"""
+        self._raise_writer_error()
+        if self.accumulated_dfs:
+            self._check_names()
+            self._put((self.accumulated_dfs, self.accumulated_size))
+        self.accumulated_dfs = []
+        self.accumulated_size = 0
+
+    def _stop_writers(self):
+        """Tell each writer to stop once the queue is empty, and wait"""
+        for _ in self.threads:
+            self._put(None)
+        for thread in self.threads:
+            thread.join()
+
+    def close(self):
+        try:
+            self.spill()
+        finally:
+            self._stop_writers()
+        self._raise_writer_error()
+
+    def __exit__(self, exception_type, exception_value, traceback):
+        if exception_type is None:
+            self.close()
+        else:
+            # Something went wrong in the main thread. Don't load anything
+            # else, and let the original exception propagate.
+            self.failed.set()
+            self._stop_writers()
+
+
+class ParquetDump(contextlib.AbstractContextManager):
+    """Accumulate EPA CEMS DataFrames and write them out as a Parquet dataset
+
+    The output is a directory of Parquet files, partitioned by year and state
+    using the directory naming convention that pyarrow and other readers
+    understand (table_name/year=2016/state=CO/...). Within each partition the
+    records are sorted by plant_id_eia, unitid and operating_datetime, and
+    column statistics are written for every row group, so readers looking
+    for a single plant or a range of dates can skip most of the data.
+
+    DataFrames must be added one partition at a time -- all the months of
+    a given year & state need to be added before moving on to the next one,
+    which is the order the EPA CEMS extraction yields them in. The
+    accumulated partition is written out whenever a new one begins, and when
+    the context manager exits.
+
+    Args:
+        table_name (str): The name of the table being written. It's used to
+            look up the SQLAlchemy table, which defines the column types,
+            and to name the dataset directory.
+        outdir (str): Path to the directory under which the dataset
+            directory will be created.
+        row_group_size (int): Maximum number of rows per Parquet row group.
+            Smaller row groups allow finer grained skipping, at the cost of
+            some compression.
+        compression (str): Compression codec to use within the files.
+    Example:
+    with ParquetDump(my_table, my_outdir) as p:
+        for (year, month, state), df in df_generator:
+            p.add(df, year=year, state=state)
+    """
+
+    sort_cols = ['plant_id_eia', 'unitid', 'operating_datetime']
+
+    def __init__(self, table_name, outdir, row_group_size=100000,
+                 compression='snappy'):
+        self.table_name = table_name
+        self.outdir = outdir
+        self.row_group_size = row_group_size
+        self.compression = compression
+        self.schema = _arrow_schema(table_name, exclude=('id', 'state'))
+        self.partition = None
+        # Accumulate Arrow tables rather than the DataFrames themselves: this
+        # copies the data, so that it's unaffected by anything that happens
+        # to the DataFrame afterward (e.g. BulkCopy fixing the int columns).
+        self.accumulated_tables = []
+
+    def add(self, df, year, state):
+        """Add a DataFrame belonging to the given year & state partition"""
+        import pyarrow as pa
+        assert isinstance(df, pd.DataFrame)
+        if (year, state) != self.partition:
+            self.spill()
+            self.partition = (year, state)
+        df = df.drop('state', axis=1)
+        self.accumulated_tables.append(
+            pa.Table.from_pandas(df, schema=self.schema, preserve_index=False))
+
+    def partition_path(self, year, state):
+        """Path to the Parquet file for a given year & state"""
+        return os.path.join(self.outdir, self.table_name,
+                            f"year={year}", f"state={state}",
+                            f"{self.table_name}-{year}-{state}.parquet")
+
+    def spill(self):
+        """Sort the accumulated partition and write it out to Parquet"""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        if self.accumulated_tables:
+            # Arrow can't sort dictionary encoded columns, so use pandas.
+            df = (
+                pa.concat_tables(self.accumulated_tables)
+                .to_pandas()
+                .sort_values(self.sort_cols)
+            )
+            table = pa.Table.from_pandas(df, schema=self.schema,
+                                         preserve_index=False)
+            path = self.partition_path(*self.partition)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            pq.write_table(table, path,
+                           row_group_size=self.row_group_size,
+                           compression=self.compression,
+                           write_statistics=True)
+        self.accumulated_tables = []
+
+    def close(self):
+        self.spill()
+        self.partition = None
+
+    def __exit__(self, exception_type, exception_value, traceback):
+        # Don't write out a partial partition if something went wrong.
+        if exception_type is None:
+            self.close()
+
+
+def _arrow_schema(table_name, exclude=()):
+    """
+    Construct an Arrow schema corresponding to a PUDL database table.
+
+    Args:
+        table_name (str): Name of a table in the PUDLBase metadata.
+        exclude (iterable): Names of columns to leave out of the schema.
+    Returns:
+        pyarrow.Schema
+    """
+    import pyarrow as pa
+    import sqlalchemy as sa
+
+    tbl = pudl.models.entities.PUDLBase.metadata.tables[table_name]
+    fields = []
+    for col in tbl.columns:
+        if col.name in exclude:
+            continue
+        # Check Enum before String, since it's a subclass of String.
+        if isinstance(col.type, sa.Enum):
+            arrow_type = pa.dictionary(pa.int32(), pa.string())
+        elif isinstance(col.type, sa.String):
+            arrow_type = pa.dictionary(pa.int32(), pa.string())
+        elif isinstance(col.type, sa.REAL):
+            arrow_type = pa.float32()
+        elif isinstance(col.type, sa.Float):
+            arrow_type = pa.float64()
+        elif isinstance(col.type, sa.SmallInteger):
+            arrow_type = pa.int16()
+        elif isinstance(col.type, sa.BigInteger):
+            arrow_type = pa.int64()
+        elif isinstance(col.type, sa.Integer):
+            arrow_type = pa.int32()
+        elif isinstance(col.type, sa.DateTime):
+            arrow_type = pa.timestamp('us')
+        elif isinstance(col.type, sa.Date):
+            arrow_type = pa.date32()
+        elif isinstance(col.type, sa.Interval):
+            arrow_type = pa.duration('ns')
+        elif isinstance(col.type, sa.Boolean):
+            arrow_type = pa.bool_()
+        else:
+            raise NotImplementedError(
+                f"No Arrow type for {col.type} ({table_name}.{col.name})")
+        fields.append(pa.field(col.name, arrow_type, nullable=col.nullable))
+    return pa.schema(fields)
+
+
 def dict_dump_load(transformed_dfs,
                    data_source,
                    pudl_engine,
                    need_fix_inting=pc.need_fix_inting,
                    verbose=True,
                    csvdir='',
-                   keep_csv=False):
+                   keep_csv=False,
+                   copy_formats=pc.copy_formats):
     """
-    Wrapper for _csv_dump_load for each data source.
+    Wrapper for _csv_dump_load or _binary_dump_load for each data source.
+
+    Tables listed in copy_formats are loaded using the COPY format given
+    there ('csv' or 'binary'), and all other tables are loaded from CSV.
     """
     if verbose:
         print("Loading tables from {} into PUDL:".format(data_source))
     for table_name, df in transformed_dfs.items():
         if verbose and table_name != "hourly_emissions_epacems":
             print("    {}...".format(table_name))
-        if table_name in list(need_fix_inting.keys()):
+        copy_format = copy_formats.get(table_name, 'csv')
+        if copy_format == 'csv' and table_name in list(need_fix_inting.keys()):
             _fix_int_cols(table_name,
                           transformed_dfs,
                           need_fix_inting=pc.need_fix_inting,
                           verbose=verbose)
-        _csv_dump_load(df,
-                       table_name,
-                       pudl_engine,
-                       csvdir=csvdir,
-                       keep_csv=keep_csv)
+            df = transformed_dfs[table_name]
+        _dump_load(df,
+                   table_name,
+                   pudl_engine,
+                   copy_format=copy_format,
+                   csvdir=csvdir,
+                   keep_csv=keep_csv)
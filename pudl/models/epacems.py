@@ -1,5 +1,7 @@
 """Database models for PUDL tables derived from EPA CEMS Data."""
 
+import datetime
+import time
 import sqlalchemy as sa
 from sqlalchemy import Integer, SmallInteger, String, REAL, DateTime, Column, Enum, Interval, Date
 from sqlalchemy.dialects.postgresql import TSRANGE
@@ -66,6 +68,7 @@ class HourlyEmissions(pudl.models.entities.PUDLBase):
     unitid = Column(String, nullable=False)
     # operating_date = Column(Date, nullable=False)
     operating_datetime = Column(DateTime, nullable=False)
+    operating_datetime_utc = Column(DateTime, nullable=False)
     operating_time_interval = Column(Interval)
     gross_load_mw = Column(REAL)
     steam_load_1000_lbs = Column(REAL)
@@ -85,6 +88,25 @@ class HourlyEmissions(pudl.models.entities.PUDLBase):
     facility_id = Column(SmallInteger)  # max value is 8421
     unit_id_epa = Column(Integer)
 
+
+class HourlyEmissionsManifest(pudl.models.entities.PUDLBase):
+    """
+    The EPA CEMS state-month files which have been loaded.
+
+    Each record describes one of the files which has been loaded into the
+    hourly_emissions_epacems table, and the checksum of the file at the time.
+    This allows the EPA CEMS data to be updated incrementally, only loading
+    the files which are new, or which have changed since they were loaded.
+    """
+
+    __tablename__ = "hourly_emissions_epacems_manifest"
+    year = Column(Integer, primary_key=True)
+    month = Column(Integer, primary_key=True)
+    state = Column(ENUM_STATES, primary_key=True)
+    sha256 = Column(String, nullable=False)
+    loaded_at = Column(DateTime, nullable=False)
+
+
 DROP_VIEWS = ["DROP VIEW IF EXISTS hourly_emissions_epacems_view"]
 CREATE_VIEWS = ["""
     CREATE VIEW hourly_emissions_epacems_view AS
@@ -96,6 +118,7 @@ CREATE_VIEWS = ["""
         unitid,
         operating_datetime,
         operating_datetime::date AS operating_date,
+        operating_datetime_utc,
         operating_time_interval,
         gross_load_mw,
         steam_load_1000_lbs,
@@ -117,54 +140,248 @@ CREATE_VIEWS = ["""
     ]
 
 
-def finalize(engine):
-    """Finalize the EPA CEMS table
-
-    args: engine (sqlalchemy engine)
+def _epacems_indexes(brin=False):
+    """The indexes to build on the EPA CEMS table once it has been loaded.
 
-    This function does a few things after all the data have been written because
-    it's faster to do these after the fact.
-    1. Add individual indexes for operating_datetime, plant_id_eia, and
-       the date part of operating_datetime,
-    2. Add a unique index for the combination of operating_datetime,
-       plant_id_eia, and unitid.
-    3. Run ALTER TABLE hourly_emissions_epacems SET LOGGED to make the table
-       robust to unclean shutdowns.
+    args: brin (bool): use (small) BRIN indexes rather than B-trees for the
+        operating_datetime and operating date indexes.
     """
-
     # List of indexes and constraints we need to create later, after loading
     # See https://stackoverflow.com/a/41254430
     # index names follow SQLAlchemy's convention ix_tablename_columnname, but
     # this doesn't matter
-    indexes_to_create = [
-        sa.Index("ix_hourly_emissions_epacems_operating_datetime",
-                 HourlyEmissions.operating_datetime),
+    # The indexes are defined on a copy of the table, because an Index gets
+    # attached to the Table it refers to, and create_all() would then build
+    # these indexes before loading the next time around.
+    cols = HourlyEmissions.__table__.tometadata(sa.MetaData()).c
+    if brin:
+        # The data are loaded in roughly time order, so a block range index
+        # is a tiny fraction of the size of a B-tree, and much faster to
+        # build. The names differ so they don't get mistaken for the B-trees.
+        datetime_indexes = [
+            sa.Index("ix_hourly_emissions_epacems_operating_datetime_brin",
+                     cols.operating_datetime,
+                     postgresql_using="brin"),
+            sa.Index("ix_hourly_emissions_epacems_opperating_date_part_brin",
+                     sa.cast(cols.operating_datetime, sa.Date),
+                     postgresql_using="brin"),
+        ]
+    else:
+        datetime_indexes = [
+            sa.Index("ix_hourly_emissions_epacems_operating_datetime",
+                     cols.operating_datetime),
+            sa.Index("ix_hourly_emissions_epacems_opperating_date_part",
+                     sa.cast(cols.operating_datetime, sa.Date)),
+        ]
+    return datetime_indexes + [
         sa.Index("ix_hourly_emissions_epacems_plant_id_eia",
-                 HourlyEmissions.plant_id_eia),
-        sa.Index("ix_hourly_emissions_epacems_opperating_date_part",
-                 sa.cast(HourlyEmissions.operating_datetime, sa.Date)),
+                 cols.plant_id_eia),
         # The name that follows the pattern would be
         # ix_hourly_emissions_epacems_plant_id_eia_unitid_operating_datetime
         # But that's too long.
         sa.Index("ix_plant_id_eia_unitid_operating_datetime",
-                 HourlyEmissions.plant_id_eia,
-                 HourlyEmissions.unitid,
-                 HourlyEmissions.operating_datetime,
+                 cols.plant_id_eia,
+                 cols.unitid,
+                 cols.operating_datetime,
                  unique=True),
     ]
-    for index in indexes_to_create:
+
+
+def _create_index(engine, index, maintenance_work_mem):
+    """Build one index on its own connection, and return how long it took."""
+    start_time = time.monotonic()
+    with engine.connect() as conn:
         try:
-            index.create(engine)
+            with conn.begin():
+                if maintenance_work_mem is not None:
+                    # The setting is local to this transaction, so it doesn't
+                    # stick to the pooled connection once the index is built.
+                    conn.execute(sa.text(
+                        "SELECT set_config('maintenance_work_mem', :mem, "
+                        "true)"), mem=maintenance_work_mem)
+                index.create(conn)
         except sa.exc.ProgrammingError as e:
             from warnings import warn
             warn(f"Failed to add index/constraint '{index.name}'\n" +
                 "Details:\n" + str(e))
+    return time.monotonic() - start_time
+
+
+def finalize(engine, logged=True, brin=False, workers=None,
+             maintenance_work_mem='256MB', verbose=False):
+    """Finalize the EPA CEMS table
+
+    args:
+        engine (sqlalchemy engine)
+        logged (bool): set the table to LOGGED. Use False to leave it
+            UNLOGGED, e.g. for a disposable analytic copy of the database.
+        brin (bool): build BRIN indexes on operating_datetime rather than
+            B-trees.
+        workers (int): number of indexes to build at the same time, each on
+            its own connection. Defaults to building them all at once.
+        maintenance_work_mem (str): the maintenance_work_mem setting used
+            while building each index, e.g. '1GB'. None uses the server's
+            setting. Each of the up to workers indexes being built at once
+            can use this much memory, so the total is workers times this:
+            with the defaults, 4 indexes of 256MB, or 1GB in all.
+        verbose (bool): print the time taken by each step.
+
+    returns: dict of the seconds taken by each step.
+
+    This function does a few things after all the data have been written because
+    it's faster to do these after the fact.
+    1. Run ALTER TABLE hourly_emissions_epacems SET LOGGED to make the table
+       robust to unclean shutdowns. This rewrites the table, and rebuilds any
+       indexes on it, so it's done before the indexes are built.
+    2. Add individual indexes for operating_datetime, plant_id_eia, and
+       the date part of operating_datetime,
+    3. Add a unique index for the combination of operating_datetime,
+       plant_id_eia, and unitid.
+    """
+    import concurrent.futures
+
+    timings = {}
+    if logged:
+        start_time = time.monotonic()
+        alter_table_sql = \
+            f"ALTER TABLE {HourlyEmissions.__tablename__} SET LOGGED"
+        try:
+            engine.execute(alter_table_sql)
+        except sa.exc.SQLAlchemyError as e:  # Any kind of SQLAlchemy error
+            # Note that ALTER TABLE ... SET LOGGGED requires postgres >= 9.5
+            print("Failed to set EPA CEMS table to LOGGED! If you shut down " +
+                "postgres abruptly, the table will be empty.")
+            print(e)
+        timings['set logged'] = time.monotonic() - start_time
+        if verbose:
+            _print_timing('set logged', timings['set logged'])
+
+    # When the table is being updated incrementally, the indexes already
+    # exist and don't need to be created again.
+    existing_indexes = {row[0] for row in engine.execute(
+        sa.text("SELECT indexname FROM pg_indexes WHERE tablename = :t"),
+        t=HourlyEmissions.__tablename__)}
+    indexes_to_create = [index for index in _epacems_indexes(brin=brin)
+                         if index.name not in existing_indexes]
+    if not indexes_to_create:
+        return timings
+    if workers is None:
+        workers = len(indexes_to_create)
+    # CREATE INDEX only takes a SHARE lock on the table, so the indexes can
+    # all be built at the same time.
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            index.name: pool.submit(_create_index, engine, index,
+                                    maintenance_work_mem)
+            for index in indexes_to_create}
+        for name, future in futures.items():
+            timings[name] = future.result()
+            if verbose:
+                _print_timing(name, timings[name])
+    return timings
+
+
+def _print_timing(step, seconds):
+    """Print how long one of the finalization steps took."""
+    print("        {} took {}".format(
+        step, time.strftime("%H:%M:%S", time.gmtime(seconds))))
+
+
+def read_manifest(engine):
+    """Read the checksums of the EPA CEMS files which have been loaded.
+
+    args: engine (sqlalchemy engine)
+
+    returns: dict of SHA-256 hex digests, keyed by (year, month, state)
+    """
+    manifest = HourlyEmissionsManifest.__table__
+    rows = engine.execute(sa.select([manifest.c.year, manifest.c.month,
+                                     manifest.c.state, manifest.c.sha256]))
+    return {(year, month, state): sha256
+            for year, month, state, sha256 in rows}
+
+
+def changed_partitions(partitions, checksums, loaded, whole_years=False):
+    """Find the EPA CEMS state-months which need to be loaded again.
 
-    alter_table_sql = f"ALTER TABLE {HourlyEmissions.__tablename__} SET LOGGED"
-    try:
-        engine.execute(alter_table_sql)
-    except sa.exc.SQLAlchemyError as e:  # Any kind of SQLAlchemy error
-        # Note that ALTER TABLE ... SET LOGGGED requires postgres >= 9.5
-        print("Failed to set EPA CEMS table to LOGGED! If you shut down " +
-            "postgres abruptly, the table will be empty.")
-        print(e)
+    args:
+        partitions (iterable): (year, month, state) tuples to check.
+        checksums (dict): SHA-256 hex digests of the current files, keyed by
+            (year, month, state)
+        loaded (dict): SHA-256 hex digests of the files which have been
+            loaded (see read_manifest)
+        whole_years (bool): Whether every month of a state-year with any
+            changes needs loading again, e.g. because each Parquet file holds
+            a whole state-year.
+
+    returns: list of the (year, month, state) tuples which are new or have
+        changed, in the order of partitions.
+    """
+    partitions = list(partitions)
+    changed = [p for p in partitions if loaded.get(p) != checksums[p]]
+    if whole_years:
+        changed_years = {(year, state) for year, _, state in changed}
+        changed = [p for p in partitions if (p[0], p[2]) in changed_years]
+    return changed
+
+
+def _month_bounds(year, month):
+    """The first instant of the month, and the first instant of the next."""
+    start = datetime.datetime(year, month, 1)
+    if month == 12:
+        end = datetime.datetime(year + 1, 1, 1)
+    else:
+        end = datetime.datetime(year, month + 1, 1)
+    return start, end
+
+
+def forget_partitions(engine, partitions, batch_size=500):
+    """Delete the records of EPA CEMS state-months, and their manifest rows.
+
+    args:
+        engine (sqlalchemy engine)
+        partitions (iterable): (year, month, state) tuples to delete.
+        batch_size (int): number of partitions to delete with each statement.
+
+    The partitions are deleted whether or not they're in the manifest, so
+    that the records from a load which was interrupted before the manifest
+    was updated get cleaned up too. Everything is deleted in one transaction.
+    """
+    partitions = list(partitions)
+    emissions = HourlyEmissions.__table__
+    manifest = HourlyEmissionsManifest.__table__
+    with engine.begin() as conn:
+        for i in range(0, len(partitions), batch_size):
+            batch = partitions[i:i + batch_size]
+            conditions = []
+            manifest_conditions = []
+            for year, month, state in batch:
+                start, end = _month_bounds(year, month)
+                conditions.append(sa.and_(
+                    emissions.c.state == state,
+                    emissions.c.operating_datetime >= start,
+                    emissions.c.operating_datetime < end))
+                manifest_conditions.append(sa.and_(
+                    manifest.c.year == year,
+                    manifest.c.month == month,
+                    manifest.c.state == state))
+            conn.execute(emissions.delete().where(sa.or_(*conditions)))
+            conn.execute(manifest.delete().where(
+                sa.or_(*manifest_conditions)))
+
+
+def record_partitions(engine, checksums):
+    """Add the EPA CEMS state-months which have been loaded to the manifest.
+
+    args:
+        engine (sqlalchemy engine)
+        checksums (dict): SHA-256 hex digests of the files which were loaded,
+            keyed by (year, month, state)
+    """
+    if not checksums:
+        return
+    loaded_at = datetime.datetime.utcnow()
+    engine.execute(HourlyEmissionsManifest.__table__.insert(), [
+        {'year': year, 'month': month, 'state': state, 'sha256': sha256,
+         'loaded_at': loaded_at}
+        for (year, month, state), sha256 in checksums.items()])
@@ -40,6 +40,12 @@ SETTINGS['epacems_data_dir'] = os.path.join(
 SETTINGS['test_dir'] = os.path.join(SETTINGS['pudl_dir'], 'test')
 SETTINGS['docs_dir'] = os.path.join(SETTINGS['pudl_dir'], 'docs')
 SETTINGS['csvdir'] = os.path.join(SETTINGS['pudl_dir'], 'results', 'csvdump')
+SETTINGS['parquet_dir'] = os.path.join(
+    SETTINGS['pudl_dir'], 'results', 'parquet')
+SETTINGS['eia_cache_dir'] = os.path.join(
+    SETTINGS['pudl_dir'], 'results', 'extract_cache')
+SETTINGS['ferc1_dbc_cache_dir'] = os.path.join(
+    SETTINGS['eia_cache_dir'], 'ferc1_dbc')
 
 
 # These DB connection dictionaries are used by sqlalchemy.URL()
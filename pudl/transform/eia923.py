@@ -3,6 +3,7 @@
 
 import pandas as pd
 import numpy as np
+import pudl.helpers
 import pudl.transform.pudl
 import pudl.constants as pc
 
@@ -37,37 +38,15 @@ def yearly_to_monthly_eia923(df, md):
         pandas.DataFrame: A dataframe containing the same data as was passed in
             via df, but with monthly records instead of annual records.
     """
-    yearly = df.copy()
-    all_years = pd.DataFrame()
-
-    for y in yearly.report_year.unique():
-        this_year = yearly[yearly.report_year == y].copy()
-        monthly = pd.DataFrame()
-        for m in md.keys():
-            # Grab just the columns for the month we're working on.
-            this_month = this_year.filter(regex=md[m]).copy()
-
-            # Drop this month's data from the yearly data frame.
-            this_year.drop(this_month.columns, axis=1, inplace=True)
-
-            # Rename this month's columns to get rid of the month reference.
-            this_month.columns = this_month.columns.str.replace(md[m], '')
-
-            # Add a numerical month column corresponding to this month.
-            this_month['report_month'] = m
-
-            # Add this month's data to the monthly DataFrame we're building.
-            monthly = pd.concat([monthly, this_month], sort=True)
-
-        # Merge the monthly data we've built up with the remaining fields in
-        # the data frame we started with -- all of which should be independent
-        # of the month, and apply across all 12 of the monthly records created
-        # from each of the # initial annual records.
-        this_year = this_year.merge(monthly, left_index=True, right_index=True)
-        # Add this new year's worth of data to the big dataframe we'll return
-        all_years = pd.concat([all_years, this_year], sort=True)
-
-    return all_years
+    # Each year's records come out together, in the order the years first
+    # appear. Records without a year are dropped.
+    year_codes, _ = pd.factorize(df.report_year)
+    rows = np.flatnonzero(year_codes >= 0)
+    if not len(rows):
+        return pd.DataFrame()
+    rows = rows[np.argsort(year_codes[rows], kind='stable')]
+    return pudl.helpers.unpivot_months(df, md, month_col='report_month',
+                                       rows=rows, sort_columns=True)
 
 
 def coalmine_cleanup(cmi_df):
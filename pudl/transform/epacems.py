@@ -13,19 +13,30 @@ import pudl.constants as pc
 ###############################################################################
 
 
+_NS_PER_HOUR = np.int64(3600 * 10**9)
+
+
+def _codes_and_uniques(series):
+    """Integer codes and distinct values of a (possibly categorical) column."""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.cat.codes.to_numpy(), series.cat.categories
+    return pd.factorize(series)
+
+
 def fix_up_dates(df):
     """Fix the dates for the CEMS data
 
     Three date/datetime changes (not all implemented)
     - Make op_date a DATE type
     - Make an appropriate INTERVAL type (not implemented)
-    - Add a UTC timestamp (not implemented)
+    - Add a UTC timestamp
 
     Args:
         df(pandas.DataFrame): A CEMS hourly dataframe for one year-month-state
     Output:
-        pandas.DataFrame: The same data, with an op_datetime column added and
-        the op_date and op_hour columns removed
+        pandas.DataFrame: The same data, with operating_datetime and
+        operating_datetime_utc columns added and the op_date and op_hour
+        columns removed
     """
     # Convert to interval:
     # df = convert_time_to_interval(df)
@@ -33,18 +44,42 @@ def fix_up_dates(df):
     # Convert op_date and op_hour from string and integer to datetime:
     # Note that doing this conversion, rather than reading the CSV with
     # `parse_dates=True` is >10x faster.
+    # A state-month file only has about 30 distinct dates, so parse each of
+    # them once, and then do the rest with integer nanoseconds.
+    date_codes, dates = _codes_and_uniques(df["op_date"])
+    date_ns = (
+        pd.to_datetime(pd.Index(dates), format=r"%m-%d-%Y", exact=True)
+        .to_numpy(dtype="datetime64[ns]").view(np.int64)
+    )
     # Make an operating timestamp
-    df["operating_datetime"] = (
-        pd.to_datetime(df["op_date"], format=r"%m-%d-%Y", exact=True, cache=True) +
-        pd.to_timedelta(df["op_hour"], unit="h")
-        )
+    local_ns = (date_ns[date_codes] +
+                df["op_hour"].to_numpy(dtype=np.int64) * _NS_PER_HOUR)
+    missing = date_codes < 0
+    if missing.any():
+        local_ns[missing] = np.iinfo(np.int64).min  # NaT
+    df["operating_datetime"] = local_ns.view("datetime64[ns]")
     del df["op_hour"], df["op_date"]
 
     # Make op_time into an time delta (called interval in postgres)
-    df["operating_time_interval"] = pd.to_timedelta(df["op_time"], unit="h")
+    # Rounding to whole nanoseconds avoids pd.to_timedelta's slow path for
+    # floats, and its floating point error (e.g. 0.33 hours is 1188 s).
+    op_time = df["op_time"].to_numpy(dtype=np.float64)
+    interval_ns = np.round(op_time * _NS_PER_HOUR)
+    interval_ns[np.isnan(interval_ns)] = np.iinfo(np.int64).min  # NaT
+    df["operating_time_interval"] = (
+        interval_ns.astype(np.int64).view("timedelta64[ns]"))
     del df["op_time"]
 
-    # Add UTC timestamp ... not done.
+    # Add UTC timestamp. The times are all in local standard time, so each
+    # state has a single UTC offset, and only the distinct states need to be
+    # looked up.
+    state_codes, states = _codes_and_uniques(df["state"])
+    offset_ns = np.array([pc.epacems_utc_offsets[state] for state in states],
+                         dtype=np.int64) * _NS_PER_HOUR
+    utc_ns = local_ns - offset_ns[state_codes]
+    if missing.any():
+        utc_ns[missing] = np.iinfo(np.int64).min  # NaT
+    df["operating_datetime_utc"] = utc_ns.view("datetime64[ns]")
     return df
 
 
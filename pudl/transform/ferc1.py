@@ -15,13 +15,14 @@ import pandas as pd
 import numpy as np
 
 # These modules are required for the FERC Form 1 Plant ID & Time Series
-from sklearn.metrics.pairwise import cosine_similarity
+import scipy.sparse
 from sklearn.base import BaseEstimator, ClassifierMixin
 from sklearn.pipeline import Pipeline
 from sklearn.compose import ColumnTransformer
+from sklearn.model_selection import ParameterGrid
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.preprocessing import Normalizer, RobustScaler
-from sklearn.preprocessing import OneHotEncoder
+from sklearn.preprocessing import OneHotEncoder, normalize
 
 import pudl.constants as pc
 import pudl.transform.pudl
@@ -33,7 +34,84 @@ from pudl.settings import SETTINGS
 ##############################################################################
 
 
-def _clean_cols(df):
+# The fields which identify a FERC Form 1 record, in the order they're packed
+# into an int64 record_id (most significant first), with the number of bits
+# each of them gets. Packed record IDs sort by year, respondent, supplement
+# and row.
+_record_id_fields = (
+    ('report_year', 12),
+    ('respondent_id', 20),
+    ('spplmnt_num', 12),
+    ('row_number', 16),
+)
+
+
+def encode_record_ids(df):
+    """
+    Pack the fields which identify each FERC Form 1 record into an int64.
+
+    Args:
+        df (pandas.DataFrame): Records with report_year, respondent_id,
+            spplmnt_num and row_number columns, all of which must hold whole
+            numbers that fit in the bits they're packed into.
+    Returns:
+        numpy.ndarray: The int64 record ID of each record.
+    """
+    record_ids = np.zeros(len(df), dtype=np.int64)
+    for col, bits in _record_id_fields:
+        values = df[col].to_numpy()
+        ints = values.astype(np.int64)
+        if not ((ints == values).all() and (ints >= 0).all() and
+                (ints < 1 << bits).all()):
+            raise ValueError(
+                f"Can't pack {col} into a record_id: its values must be "
+                f"whole numbers from 0 to {(1 << bits) - 1}.")
+        record_ids = (record_ids << bits) | ints
+    return record_ids
+
+
+def decode_record_ids(record_ids):
+    """
+    Unpack int64 FERC Form 1 record IDs into the fields they're made of.
+
+    Args:
+        record_ids (array-like): Record IDs made by encode_record_ids().
+    Returns:
+        pandas.DataFrame: The report_year, respondent_id, spplmnt_num and
+        row_number of each record, with the same index as record_ids if it's
+        a pandas.Series.
+    """
+    index = record_ids.index if isinstance(record_ids, pd.Series) else None
+    record_ids = np.asarray(record_ids, dtype=np.int64)
+    fields = {}
+    for col, bits in reversed(_record_id_fields):
+        fields[col] = record_ids & ((1 << bits) - 1)
+        record_ids = record_ids >> bits
+    return pd.DataFrame({col: fields[col] for col, _ in _record_id_fields},
+                        index=index)
+
+
+def record_id_strings(record_ids):
+    """
+    Turn packed FERC Form 1 record IDs into the strings _clean_cols makes.
+
+    This is only needed for output, e.g. when the records are loaded into
+    the PUDL DB, so the strings aren't made until then.
+
+    Args:
+        record_ids (pandas.Series): Record IDs made by encode_record_ids().
+    Returns:
+        pandas.Series: The {report_year}_{respondent_id}_{spplmnt_num}_
+        {row_number} string of each record ID, with the same index.
+    """
+    fields = decode_record_ids(record_ids)
+    strings = fields.report_year.astype(str)
+    for col, _ in _record_id_fields[1:]:
+        strings = strings + '_' + fields[col].astype(str)
+    return strings.rename(record_ids.name)
+
+
+def _clean_cols(df, packed_record_id=False):
     """
     Add a FERC record ID and drop FERC columns not to be loaded into PUDL.
 
@@ -52,6 +130,11 @@ def _clean_cols(df):
 
     {report_year}_{respondent_id}_{spplmnt_num}_{row_number}
 
+    or, with packed_record_id, the int64 those fields are packed into by
+    encode_record_ids(), which takes much less memory, and can be merged on
+    and looked up much faster. See record_id_strings() for turning the packed
+    record IDs back into strings.
+
     In addition there are some columns which are not meaningful or useful in
     the context of PUDL, but which show up in virtually every FERC table, and
     this function drops them if they are present. These columns include:
@@ -68,11 +151,14 @@ def _clean_cols(df):
     assert ~df.spplmnt_num.isnull().any()
     assert ~df.row_number.isnull().any()
     # Create a unique inter-year FERC table record ID:
-    df['record_id'] = \
-        df.report_year.astype(str) + '_' + \
-        df.respondent_id.astype(str) + '_' + \
-        df.spplmnt_num.astype(str) + '_' + \
-        df.row_number.astype(str)
+    if packed_record_id:
+        df['record_id'] = encode_record_ids(df)
+    else:
+        df['record_id'] = \
+            df.report_year.astype(str) + '_' + \
+            df.respondent_id.astype(str) + '_' + \
+            df.spplmnt_num.astype(str) + '_' + \
+            df.row_number.astype(str)
 
     unused_cols = [
         'spplmnt_num',
@@ -88,6 +174,37 @@ def _clean_cols(df):
     return df
 
 
+def _correct_range(values, minval, maxval, mults):
+    """
+    Bring values which have been multiplied by a factor back into range.
+
+    For each of the multipliers in turn, the values found in the range
+    divided by that multiplier are multiplied by it. Then anything that's
+    still outside of the range is set to NaN.
+
+    Args:
+        values (numpy.ndarray): The float values to correct. NaN stays NaN.
+        minval (float): The minimum realistic value.
+        maxval (float): The maximum realistic value.
+        mults (list of floats): The multipliers to look for.
+    Returns:
+        numpy.ndarray: The corrected values.
+    """
+    values = values.copy()
+    for mult in mults:
+        ghost = (values > minval / mult) & (values < maxval / mult)
+        values[ghost] *= mult
+    values[(values < minval) | (values > maxval)] = np.nan
+    return values
+
+
+def _mask_array(mask, index):
+    """A boolean array selecting the records of index that mask selects."""
+    if isinstance(mask, pd.Series) and not mask.index.equals(index):
+        mask = mask.reindex(index, fill_value=False)
+    return np.asarray(mask, dtype=bool)
+
+
 def _multiplicative_error_correction(tofix, mask, minval, maxval, mults):
     """
     Correct data entry errors resulting in data being multiplied by a factor.
@@ -123,34 +240,64 @@ def _multiplicative_error_correction(tofix, mask, minval, maxval, mults):
             multiplied to bring them back into the reasonable range.
     Returns:
         fixed (pandas.Series): a data series of the same length as the
-            input, but with the transformed values.
+            input, with the same index in the same order, but with the
+            transformed values.
     """
-    # Grab the subset of the input series we are going to work on:
-    records_to_fix = tofix[mask]
-    # Drop those records from our output series
-    fixed = tofix.drop(records_to_fix.index)
-    # Iterate over the multipliers, applying fixes to outlying populations
-    for mult in mults:
-        records_to_fix = records_to_fix.apply(lambda x: x * mult
-                                              if x > minval / mult
-                                              and x < maxval / mult
-                                              else x)
-    # Set any record that wasn't inside one of our identified populations to
-    # NA -- we are saying that these are true outliers, which can't be part
-    # of the population of values we are examining.
-    records_to_fix = records_to_fix.apply(lambda x: np.nan
-                                          if x < minval
-                                          or x > maxval
-                                          else x)
-    # Add our fixed records back to the complete data series and return it
-    fixed = fixed.append(records_to_fix)
-    return fixed
+    fixed = tofix.to_numpy(dtype=float, copy=True)
+    mask = _mask_array(mask, tofix.index)
+    fixed[mask] = _correct_range(fixed[mask], minval, maxval, mults)
+    return pd.Series(fixed, index=tofix.index, name=tofix.name)
+
+
+def _multiplicative_error_corrections(df, corrections):
+    """
+    Apply a batch of multiplicative error corrections to a DataFrame.
+
+    Each column is copied into a float array once, and all of the
+    corrections to it are applied to that array, before the corrected
+    columns are put back into a copy of the DataFrame.
+
+    Args:
+        df (pandas.DataFrame): The data to correct.
+        corrections (list): A list of (column, mask, minval, maxval, mults)
+            corrections, which are applied in order. See
+            _multiplicative_error_correction() for what the rest of each
+            correction means.
+    Returns:
+        pandas.DataFrame: A copy of df, with the corrected columns.
+    """
+    fixed = {}
+    for (col, mask, minval, maxval, mults) in corrections:
+        if col not in fixed:
+            fixed[col] = df[col].to_numpy(dtype=float, copy=True)
+        mask = _mask_array(mask, df.index)
+        fixed[col][mask] = _correct_range(fixed[col][mask],
+                                          minval, maxval, mults)
+    return df.assign(**fixed)
+
+
+def _cleanstrings(field, stringmap, verbose):
+    """
+    Map a FERC field's strings to canonical codes, reporting what's left out.
+
+    The values which aren't in the stringmap are replaced by empty strings.
+    If verbose, the number of them, and the most common few, are printed.
+    """
+    field, stats = pudl.transform.pudl.cleanstrings(field, stringmap,
+                                                    unmapped='',
+                                                    return_stats=True)
+    if verbose and stats['unmapped']:
+        print(f"        {stats['unmapped']} of "
+              f"{stats['mapped'] + stats['unmapped']} {field.name} values "
+              f"unmapped, e.g. {stats['unmapped_values'][:5]}")
+    return field
 
 
 ##############################################################################
 # DATABASE TABLE SPECIFIC PROCEDURES ##########################################
 ##############################################################################
-def fuel(ferc1_raw_dfs, ferc1_transformed_dfs, verbose=True):
+def fuel(ferc1_raw_dfs, ferc1_transformed_dfs, verbose=True,
+         packed_record_ids=False):
     """
     Transform FERC Form 1 fuel data for loading into PUDL Database.
 
@@ -165,11 +312,14 @@ def fuel(ferc1_raw_dfs, ferc1_transformed_dfs, verbose=True):
             dictionary of DataFrame objects corresponds to a page from the
             EIA860 form, as reported in the Excel spreadsheets they distribute.
         ferc1_transformed_dfs (dictionary of DataFrames)
+        packed_record_ids (bool): If True, the record_id is a packed int64
+            (see encode_record_ids) rather than a string.
 
     Returns: transformed dataframe.
     """
     # grab table from dictionary of dfs, clean it up a bit
-    fuel_ferc1_df = _clean_cols(ferc1_raw_dfs['fuel_ferc1'])
+    fuel_ferc1_df = _clean_cols(ferc1_raw_dfs['fuel_ferc1'],
+                                packed_record_id=packed_record_ids)
 
     #########################################################################
     # STANDARDIZE NAMES AND CODES ###########################################
@@ -180,15 +330,12 @@ def fuel(ferc1_raw_dfs, ferc1_transformed_dfs, verbose=True):
 
     # Take the messy free-form fuel & fuel_unit fields, and do our best to
     # map them to some canonical categories... this is necessarily imperfect:
-    fuel_ferc1_df.fuel = \
-        pudl.transform.pudl.cleanstrings(fuel_ferc1_df.fuel,
-                                         pc.ferc1_fuel_strings,
-                                         unmapped='')
+    fuel_ferc1_df.fuel = _cleanstrings(fuel_ferc1_df.fuel,
+                                       pc.ferc1_fuel_strings, verbose)
 
-    fuel_ferc1_df.fuel_unit = \
-        pudl.transform.pudl.cleanstrings(fuel_ferc1_df.fuel_unit,
-                                         pc.ferc1_fuel_unit_strings,
-                                         unmapped='')
+    fuel_ferc1_df.fuel_unit = _cleanstrings(fuel_ferc1_df.fuel_unit,
+                                            pc.ferc1_fuel_unit_strings,
+                                            verbose)
 
     #########################################################################
     # PERFORM UNIT CONVERSIONS ##############################################
@@ -267,10 +414,8 @@ def fuel(ferc1_raw_dfs, ferc1_transformed_dfs, verbose=True):
         ['fuel_cost_per_mmbtu', oil_mask, 5, 33, (1e-2, )]
     ]
 
-    for (coltofix, mask, minval, maxval, mults) in corrections:
-        fuel_ferc1_df[coltofix] = \
-            _multiplicative_error_correction(fuel_ferc1_df[coltofix],
-                                             mask, minval, maxval, mults)
+    fuel_ferc1_df = _multiplicative_error_corrections(fuel_ferc1_df,
+                                                      corrections)
 
     #########################################################################
     # REMOVE BAD DATA #######################################################
@@ -285,7 +430,8 @@ def fuel(ferc1_raw_dfs, ferc1_transformed_dfs, verbose=True):
     return ferc1_transformed_dfs
 
 
-def plants_steam(ferc1_raw_dfs, ferc1_transformed_dfs, verbose=True):
+def plants_steam(ferc1_raw_dfs, ferc1_transformed_dfs, verbose=True,
+                 packed_record_ids=False):
     """
     Transform FERC Form 1 plant_steam data for loading into PUDL Database.
 
@@ -297,11 +443,14 @@ def plants_steam(ferc1_raw_dfs, ferc1_transformed_dfs, verbose=True):
             dictionary of DataFrame objects corresponds to a page from the
             EIA860 form, as reported in the Excel spreadsheets they distribute.
         ferc1_transformed_dfs (dictionary of DataFrames)
+        packed_record_ids (bool): If True, the record_id is a packed int64
+            (see encode_record_ids) rather than a string.
 
     Returns: transformed dataframe.
     """
     # grab table from dictionary of dfs
-    ferc1_steam_df = _clean_cols(ferc1_raw_dfs['plants_steam_ferc1'])
+    ferc1_steam_df = _clean_cols(ferc1_raw_dfs['plants_steam_ferc1'],
+                                 packed_record_id=packed_record_ids)
 
     # Standardize plant_name capitalization and remove leading/trailing white
     # space -- necesary b/c plant_name is part of many foreign keys.
@@ -312,14 +461,12 @@ def plants_steam(ferc1_raw_dfs, ferc1_transformed_dfs, verbose=True):
     # this is necessarily imperfect:
 
     ferc1_steam_df.type_const = \
-        pudl.transform.pudl.cleanstrings(ferc1_steam_df.type_const,
-                                         pc.ferc1_construction_type_strings,
-                                         unmapped='')
+        _cleanstrings(ferc1_steam_df.type_const,
+                      pc.ferc1_construction_type_strings, verbose)
 
     ferc1_steam_df.plant_kind = \
-        pudl.transform.pudl.cleanstrings(ferc1_steam_df.plant_kind,
-                                         pc.ferc1_plant_kind_strings,
-                                         unmapped='')
+        _cleanstrings(ferc1_steam_df.plant_kind,
+                      pc.ferc1_plant_kind_strings, verbose)
 
     # Force the construction and installation years to be numeric values, and
     # set them to NA if they can't be converted. (table has some junk values)
@@ -419,7 +566,8 @@ def plants_steam(ferc1_raw_dfs, ferc1_transformed_dfs, verbose=True):
     record_groups = record_groups.stack().reset_index(level=1, drop=True)
 
     # Get rid of empty records
-    record_groups = record_groups[record_groups != '']
+    record_groups = record_groups[
+        record_groups != (-1 if packed_record_ids else '')]
 
     # Merge the plant IDs into the plants table on record_id
     record_groups.name = 'record_id'
@@ -436,7 +584,8 @@ def plants_steam(ferc1_raw_dfs, ferc1_transformed_dfs, verbose=True):
     return ferc1_transformed_dfs
 
 
-def plants_small(ferc1_raw_dfs, ferc1_transformed_dfs, verbose=True):
+def plants_small(ferc1_raw_dfs, ferc1_transformed_dfs, verbose=True,
+                 packed_record_ids=False):
     """
     Transform FERC Form 1 plant_small data for loading into PUDL Database.
 
@@ -459,6 +608,8 @@ def plants_small(ferc1_raw_dfs, ferc1_transformed_dfs, verbose=True):
             dictionary of DataFrame objects corresponds to a page from the
             EIA860 form, as reported in the Excel spreadsheets they distribute.
         ferc1_transformed_dfs (dictionary of DataFrames)
+        packed_record_ids (bool): If True, the record_id is a packed int64
+            (see encode_record_ids) rather than a string.
 
     Returns: transformed dataframe.
     """
@@ -514,7 +665,8 @@ def plants_small(ferc1_raw_dfs, ferc1_transformed_dfs, verbose=True):
                                   'record_number'])
 
     # Remove extraneous columns and add a record ID
-    ferc1_small_df = _clean_cols(ferc1_small_df)
+    ferc1_small_df = _clean_cols(ferc1_small_df,
+                                 packed_record_id=packed_record_ids)
 
     # Standardize plant_name capitalization and remove leading/trailing white
     # space, so that plant_name matches formatting of plant_name_raw
@@ -560,7 +712,8 @@ def plants_small(ferc1_raw_dfs, ferc1_transformed_dfs, verbose=True):
     return ferc1_transformed_dfs
 
 
-def plants_hydro(ferc1_raw_dfs, ferc1_transformed_dfs, verbose=True):
+def plants_hydro(ferc1_raw_dfs, ferc1_transformed_dfs, verbose=True,
+                 packed_record_ids=False):
     """
     Transform FERC Form 1 plant_hydro data for loading into PUDL Database.
 
@@ -572,11 +725,14 @@ def plants_hydro(ferc1_raw_dfs, ferc1_transformed_dfs, verbose=True):
             dictionary of DataFrame objects corresponds to a page from the
             EIA860 form, as reported in the Excel spreadsheets they distribute.
         ferc1_transformed_dfs (dictionary of DataFrames)
+        packed_record_ids (bool): If True, the record_id is a packed int64
+            (see encode_record_ids) rather than a string.
 
     Returns: transformed dataframe.
     """
     # grab table from dictionary of dfs
-    ferc1_hydro_df = _clean_cols(ferc1_raw_dfs['plants_hydro_ferc1'])
+    ferc1_hydro_df = _clean_cols(ferc1_raw_dfs['plants_hydro_ferc1'],
+                                 packed_record_id=packed_record_ids)
 
     # Standardize plant_name capitalization and remove leading/trailing white
     # space -- necesary b/c plant_name is part of many foreign keys.
@@ -645,7 +801,8 @@ def plants_hydro(ferc1_raw_dfs, ferc1_transformed_dfs, verbose=True):
     return ferc1_transformed_dfs
 
 
-def plants_pumped_storage(ferc1_raw_dfs, ferc1_transformed_dfs, verbose=True):
+def plants_pumped_storage(ferc1_raw_dfs, ferc1_transformed_dfs, verbose=True,
+                          packed_record_ids=False):
     """
     Transform FERC Form 1 pumped storage data for loading into PUDL Database.
 
@@ -658,6 +815,8 @@ def plants_pumped_storage(ferc1_raw_dfs, ferc1_transformed_dfs, verbose=True):
             dictionary of DataFrame objects corresponds to a page from the
             EIA860 form, as reported in the Excel spreadsheets they distribute.
         ferc1_transformed_dfs (dictionary of DataFrames)
+        packed_record_ids (bool): If True, the record_id is a packed int64
+            (see encode_record_ids) rather than a string.
 
     Returns:
     --------
@@ -666,7 +825,8 @@ def plants_pumped_storage(ferc1_raw_dfs, ferc1_transformed_dfs, verbose=True):
     """
     # grab table from dictionary of dfs
     ferc1_pumped_storage_df = _clean_cols(
-        ferc1_raw_dfs['plants_pumped_storage_ferc1'])
+        ferc1_raw_dfs['plants_pumped_storage_ferc1'],
+        packed_record_id=packed_record_ids)
 
     # Standardize plant_name capitalization and remove leading/trailing white
     # space -- necesary b/c plant_name is part of many foreign keys.
@@ -751,7 +911,8 @@ def plants_pumped_storage(ferc1_raw_dfs, ferc1_transformed_dfs, verbose=True):
     return ferc1_transformed_dfs
 
 
-def plant_in_service(ferc1_raw_dfs, ferc1_transformed_dfs, verbose=True):
+def plant_in_service(ferc1_raw_dfs, ferc1_transformed_dfs, verbose=True,
+                     packed_record_ids=False):
     """
     Transform FERC Form 1 plant_in_service data for loading into PUDL Database.
 
@@ -766,6 +927,8 @@ def plant_in_service(ferc1_raw_dfs, ferc1_transformed_dfs, verbose=True):
             dictionary of DataFrame objects corresponds to a page from the
             EIA860 form, as reported in the Excel spreadsheets they distribute.
         ferc1_transformed_dfs (dictionary of DataFrames)
+        packed_record_ids (bool): If True, the record_id is a packed int64
+            (see encode_record_ids) rather than a string.
 
     Returns: transformed dataframe.
     """
@@ -781,7 +944,8 @@ def plant_in_service(ferc1_raw_dfs, ferc1_transformed_dfs, verbose=True):
 
     ferc1_pis_df = pd.merge(ferc1_pis_df, ferc_accts_df,
                             how='left', on='row_number')
-    ferc1_pis_df = _clean_cols(ferc1_pis_df)
+    ferc1_pis_df = _clean_cols(ferc1_pis_df,
+                               packed_record_id=packed_record_ids)
 
     ferc1_pis_df.rename(columns={
         # FERC 1 DB Name  PUDL DB Name
@@ -796,7 +960,8 @@ def plant_in_service(ferc1_raw_dfs, ferc1_transformed_dfs, verbose=True):
     return ferc1_transformed_dfs
 
 
-def purchased_power(ferc1_raw_dfs, ferc1_transformed_dfs, verbose=True):
+def purchased_power(ferc1_raw_dfs, ferc1_transformed_dfs, verbose=True,
+                    packed_record_ids=False):
     """
     Transform FERC Form 1 pumped storage data for loading into PUDL Database.
 
@@ -812,12 +977,15 @@ def purchased_power(ferc1_raw_dfs, ferc1_transformed_dfs, verbose=True):
             dictionary of DataFrame objects corresponds to a page from the
             EIA860 form, as reported in the Excel spreadsheets they distribute.
         ferc1_transformed_dfs (dictionary of DataFrames)
+        packed_record_ids (bool): If True, the record_id is a packed int64
+            (see encode_record_ids) rather than a string.
 
     Returns: transformed dataframe.
     """
     # grab table from dictionary of dfs
     ferc1_purchased_pwr_df = _clean_cols(
-        ferc1_raw_dfs['purchased_power_ferc1'])
+        ferc1_raw_dfs['purchased_power_ferc1'],
+        packed_record_id=packed_record_ids)
 
     ferc1_purchased_pwr_df.replace(to_replace='', value=np.nan, inplace=True)
     ferc1_purchased_pwr_df.dropna(subset=['sttstcl_clssfctn',
@@ -846,7 +1014,8 @@ def purchased_power(ferc1_raw_dfs, ferc1_transformed_dfs, verbose=True):
     return ferc1_transformed_dfs
 
 
-def accumulated_depreciation(ferc1_raw_dfs, ferc1_transformed_dfs, verbose=True):
+def accumulated_depreciation(ferc1_raw_dfs, ferc1_transformed_dfs, verbose=True,
+                             packed_record_ids=False):
     """
     Transform FERC Form 1 depreciation data for loading into PUDL Database.
 
@@ -859,6 +1028,8 @@ def accumulated_depreciation(ferc1_raw_dfs, ferc1_transformed_dfs, verbose=True)
             dictionary of DataFrame objects corresponds to a page from the
             EIA860 form, as reported in the Excel spreadsheets they distribute.
         ferc1_transformed_dfs (dictionary of DataFrames)
+        packed_record_ids (bool): If True, the record_id is a packed int64
+            (see encode_record_ids) rather than a string.
 
     Returns: transformed dataframe.
     """
@@ -872,7 +1043,8 @@ def accumulated_depreciation(ferc1_raw_dfs, ferc1_transformed_dfs, verbose=True)
 
     ferc1_accumdepr_prvsn_df = pd.merge(ferc1_apd_df, ferc1_acct_apd,
                                         how='left', on='row_number')
-    ferc1_accumdepr_prvsn_df = _clean_cols(ferc1_accumdepr_prvsn_df)
+    ferc1_accumdepr_prvsn_df = _clean_cols(
+        ferc1_accumdepr_prvsn_df, packed_record_id=packed_record_ids)
 
     ferc1_accumdepr_prvsn_df.rename(columns={
         # FERC1 DB   PUDL DB
@@ -888,8 +1060,15 @@ def accumulated_depreciation(ferc1_raw_dfs, ferc1_transformed_dfs, verbose=True)
 
 def transform(ferc1_raw_dfs,
               ferc1_tables=pc.ferc1_pudl_tables,
-              verbose=True):
-    """Transform FERC 1."""
+              verbose=True,
+              packed_record_ids=False):
+    """
+    Transform FERC 1.
+
+    With packed_record_ids, the tables are transformed using int64 record IDs
+    (see encode_record_ids), which are only turned into the usual record ID
+    strings once each table has been transformed.
+    """
     ferc1_transform_functions = {
         'fuel_ferc1': fuel,
         'plants_steam_ferc1': plants_steam,
@@ -910,9 +1089,15 @@ def transform(ferc1_raw_dfs,
         if table in ferc1_tables:
             if verbose:
                 print("    {}...".format(table))
-            ferc1_transform_functions[table](ferc1_raw_dfs,
-                                             ferc1_transformed_dfs,
-                                             verbose=verbose)
+            ferc1_transform_functions[table](
+                ferc1_raw_dfs,
+                ferc1_transformed_dfs,
+                verbose=verbose,
+                packed_record_ids=packed_record_ids)
+            df = ferc1_transformed_dfs[table]
+            if packed_record_ids and 'record_id' in df and \
+                    df.record_id.dtype == np.int64:
+                df['record_id'] = record_id_strings(df.record_id)
 
     return ferc1_transformed_dfs
 
@@ -963,7 +1148,7 @@ class FERCPlantClassifier(BaseEstimator, ClassifierMixin):
 
     """
 
-    def __init__(self, min_sim=0.75, plants_df=None):
+    def __init__(self, min_sim=0.75, plants_df=None, block_size=1000000):
         """
         Initialize the classifier.
 
@@ -978,19 +1163,29 @@ class FERCPlantClassifier(BaseEstimator, ClassifierMixin):
             in order to calculate the distance metrics between all of the
             records so we can group the plants in the fit() step, so we can
             check how well they are categorized later...
+        block_size : The largest number of pairwise similarities to calculate
+            at once in the fit() step. Only the ones of at least min_sim are
+            kept, so this bounds the memory it takes.
 
         """
         self.min_sim = min_sim
         self.plants_df = plants_df
+        self.block_size = block_size
         self._years = self.plants_df.report_year.unique()
 
     def fit(self, X, y=None):
         """
         The fit method takes the vectorized, normalized, weighted FERC plant
-        features (X) as input, calculates the pairwise cosine similarity matrix
+        features (X) as input, calculates the pairwise cosine similarity
         between all records, and groups the records in their best time series.
-        The similarity matrix and best time series are stored as data members
-        in the object for later use in scoring & predicting.
+        The similarities of at least min_sim and the best time series are
+        stored as data members in the object for later use in scoring &
+        predicting.
+
+        The similarities are calculated a block of records from one year
+        against the records from another year at a time, and only the ones of
+        at least min_sim are kept, as a sparse matrix, so the memory this
+        takes grows with the number of records, rather than its square.
 
         This isn't quite the way a fit method would normally work.
 
@@ -1003,11 +1198,16 @@ class FERCPlantClassifier(BaseEstimator, ClassifierMixin):
             self
 
         """
-        self._cossim_df = pd.DataFrame(cosine_similarity(X))
-        self._best_of = self._best_by_year()
-        # Make the best match indices integers rather than floats w/ NA values.
-        self._best_of[self._years] = \
-            self._best_of[self._years].fillna(-1).astype(int)
+        self._sim = self._similarity_by_year(X)
+        self._best_match = self._best_by_year()
+        self._consistent = self._consistent_matches()
+        # Look up the (first) position of each record ID:
+        first = ~self.plants_df.record_id.duplicated().to_numpy()
+        self._record_idx = pd.Index(self.plants_df.record_id[first])
+        self._record_pos = np.flatnonzero(first)
+        self._best_of = self.plants_df.copy()
+        for i, yr in enumerate(self._years):
+            self._best_of[yr] = self._best_match[:, i]
 
         return self
 
@@ -1021,72 +1221,35 @@ class FERCPlantClassifier(BaseEstimator, ClassifierMixin):
         record_id values (ordered as the input was ordered), with each column
         corresponding to one of the years worth of data. Values in the returned
         dataframe are the FERC record_ids of the record most similar to the
-        input record within that year. Some of them may be null, if there was
-        no sufficiently good match.
+        input record within that year. Some of them may be empty strings (or
+        -1, if the record IDs are packed int64s, see encode_record_ids), if
+        there was no sufficiently good match.
 
-        Row index is the seed record IDs. Column index is years.
-
-        TODO:
-        ----------
-        * This method is hideously inefficient. It should be vectorized.
-        * There's a line that throws a FutureWarning that needs to be fixed.
+        Only the record_ids whose best matches are consistent (see
+        _consistent_matches) get a row. Row index is the seed record IDs.
+        Column index is years.
 
         """
         try:
-            getattr(self, "_cossim_df")
+            getattr(self, "_best_match")
         except AttributeError:
             raise RuntimeError(
                 "You must train classifer before predicting data!")
 
-        out_df = pd.DataFrame(columns=self._years)
-        out_idx = []
-        # For each record_id we've been given:
-        for x in X:
-            # Find the index associated with the record IDs:
-            idx = self._best_of[self._best_of.record_id == x].index.values[0]
-
-            # Lookup which rows contain matches to that index:
-            w_m = self._best_of[self._years][
-                self._best_of[self._years] == idx]
-            w_m = w_m.dropna(how='all').index.values
-            b_m = self._best_of.loc[idx, self._years].astype(int)
-
-            # Make sure that w_m and b_m satisfy whatever constraints we want
-            # to impose on them. Some options include:
-            # - Impose no constraints. (allow records to be used more than once
-            #   (sometimes appropriate given ownership changes in plants)
-            # - Require them to be identical, which means requiring that
-            #   each record only appears in a single time series. Results in
-            #   loss of some otherwise valid time series, but means the
-            #   selection of best fits is deterministic.
-            # - Once a record is used, remove it from the pool so it can't be
-            #   used again, which means the next-most-similar record takes its
-            #   place.
-            if np.array_equiv(w_m, b_m[b_m >= 0].values):
-                # This line is causing a warning. In cases where there are
-                # some years no sufficiently good match exists, and so b_m
-                # doesn't contain an index. Instead, it has a -1 sentinel
-                # value, which isn't a label for which a record exists, which
-                # upsets .loc. Need to find some way around this... but for
-                # now it does what we want. We could use .iloc instead, but
-                # then the -1 sentinel value maps to the last entry in the
-                # dataframe, which also isn't what we want.  Blargh.
-                new_grp = self._best_of.loc[b_m, 'record_id']
-
-                # reshape into row, rather than column,
-                new_grp = new_grp.values.reshape(1, len(self._years))
-
-                # Stack the new list of record_ids on our output DataFrame:
-                new_grp = pd.DataFrame(new_grp, columns=self._years)
-
-                out_df = pd.concat([out_df, new_grp])
-
-                # Save the seed record_id for use in indexing the output:
-                out_idx = out_idx + [self._best_of.loc[idx, 'record_id']]
-
-        out_df['seed_id'] = out_idx
-        out_df = out_df.set_index('seed_id')
-        out_df = out_df.fillna('')
+        seeds = self._record_positions(X)
+        seeds = seeds[self._consistent[seeds]]
+        # The -1 sentinel for years without a good match picks out the empty
+        # string (or -1, for packed record IDs) tacked onto the end of the
+        # record IDs:
+        record_ids = self.plants_df.record_id.to_numpy()
+        if record_ids.dtype == np.int64:
+            record_ids = np.append(record_ids, np.int64(-1))
+        else:
+            record_ids = np.append(record_ids.astype(object), '')
+        out_df = pd.DataFrame(record_ids[self._best_match[seeds]],
+                              columns=self._years,
+                              index=pd.Index(record_ids[seeds],
+                                             name='seed_id'))
         return out_df
 
     def score(self, X, y=None):
@@ -1102,50 +1265,173 @@ class FERCPlantClassifier(BaseEstimator, ClassifierMixin):
               a metric of similarity between the prediction and the "ground
               truth" group that was passed in for that value of X.
             - Return the average of all those similarity metrics as the score.
-        """
 
+        All the record IDs in the true groups are predicted at once. Records
+        which don't get a predicted group (because they aren't in plants_df,
+        or their best matches aren't consistent) score 0.
+        """
+        true_groups = [[s for s in str.split(true_group, sep=',') if s != '']
+                       for true_group in y]
+        rec_ids = pd.unique(np.array(
+            [rec_id for true_group in true_groups for rec_id in true_group],
+            dtype=object))
+        rec_ids = rec_ids[self._record_idx.get_indexer(rec_ids) >= 0]
+        predicted_groups = self.predict(rec_ids)
+        predicted_groups = dict(zip(predicted_groups.index,
+                                    map(tuple, predicted_groups.to_numpy())))
+
+        # The same true groups come up again and again (once for each of
+        # their records), as do the same predicted groups, so each pair is
+        # only compared once:
+        ratios = {}
         scores = []
-        for true_group in y:
-            true_group = str.split(true_group, sep=',')
-            true_group = [s for s in true_group if s != '']
-            predicted_groups = self.predict(pd.DataFrame(true_group))
+        for true_group in true_groups:
             for rec_id in true_group:
-                sm = SequenceMatcher(None, true_group,
-                                     predicted_groups.loc[rec_id])
-                scores = scores + [sm.ratio()]
+                predicted_group = predicted_groups.get(rec_id)
+                if predicted_group is None:
+                    scores.append(0.0)
+                    continue
+                key = (tuple(true_group), predicted_group)
+                if key not in ratios:
+                    sm = SequenceMatcher(None, true_group, predicted_group)
+                    ratios[key] = sm.ratio()
+                scores.append(ratios[key])
 
         return np.mean(scores)
 
+    def _record_positions(self, X):
+        """Look up the positions of an array of record IDs in plants_df."""
+        X = np.asarray(X).ravel()
+        pos = self._record_idx.get_indexer(X)
+        if (pos < 0).any():
+            raise KeyError(
+                f"Unknown FERC plant record IDs: {list(X[pos < 0][:5])}")
+        return self._record_pos[pos]
+
+    def _consistent_matches(self):
+        """
+        Find the records whose best matches pick them as the best match too.
+
+        For each seed record, the records that have it as their best match in
+        its year (w_m) must be the same as its best matches in each year
+        (b_m), in the same order, which means each record only appears in a
+        single time series. This is checked for all the seed records at once.
+
+        Returns:
+            numpy.ndarray: a boolean array, which is True for the records with
+            consistent best matches.
+        """
+        n = len(self._best_match)
+        # The b_m of each seed record, grouped by seed, in year order:
+        b_seed, b_col = np.nonzero(self._best_match >= 0)
+        b_m = self._best_match[b_seed, b_col]
+        # The w_m of each seed record, grouped by seed, in record order:
+        order = np.lexsort((b_seed, b_m))
+        w_seed, w_m = b_m[order], b_seed[order]
+
+        consistent = np.bincount(w_seed, minlength=n) == \
+            np.bincount(b_seed, minlength=n)
+        # Where they're the same length, the groups line up, so they can be
+        # compared element by element:
+        w_keep, b_keep = consistent[w_seed], consistent[b_seed]
+        mismatch = w_m[w_keep] != b_m[b_keep]
+        consistent &= np.bincount(b_seed[b_keep][mismatch],
+                                  minlength=n) == 0
+        return consistent
+
+    def _similarity_by_year(self, X):
+        """
+        Find the cosine similarities of at least min_sim between all records.
+
+        The similarities are calculated between the records from each pair of
+        years in turn, in blocks of no more than block_size similarities.
+
+        Args:
+            X: a matrix of size n_samples x n_features.
+        Returns:
+            scipy.sparse.csr_matrix: the n_samples x n_samples cosine
+            similarities, with only the ones of at least min_sim stored.
+        """
+        X = normalize(scipy.sparse.csr_matrix(X, dtype=np.float64))
+        years = self.plants_df.report_year.to_numpy()
+        year_idx = [np.flatnonzero(years == yr) for yr in self._years]
+        year_X = [X[idx] for idx in year_idx]
+        rows, cols, sims = [], [], []
+        for seed_idx, seed_X in zip(year_idx, year_X):
+            for match_idx, match_X in zip(year_idx, year_X):
+                step = max(1, self.block_size // max(1, len(match_idx)))
+                match_XT = match_X.T.tocsr()
+                for start in range(0, len(seed_idx), step):
+                    block = (seed_X[start:start + step] @ match_XT).tocoo()
+                    keep = block.data >= self.min_sim
+                    rows.append(seed_idx[start + block.row[keep]])
+                    cols.append(match_idx[block.col[keep]])
+                    sims.append(block.data[keep])
+        n = len(years)
+        if not rows:
+            return scipy.sparse.csr_matrix((n, n))
+        return scipy.sparse.csr_matrix(
+            (np.concatenate(sims), (np.concatenate(rows),
+                                    np.concatenate(cols))),
+            shape=(n, n))
+
     def _best_by_year(self):
-        """Find the best match for each plant record in each other year."""
-        # only keep similarity matrix entries above our minimum threshold:
-        out_df = self.plants_df.copy()
-        sim_df = self._cossim_df[self._cossim_df >= self.min_sim]
-
-        # Add a column for each of the years, in which we will store indices
-        # of the records which best match the record in question:
-        for yr in self._years:
-            newcol = yr
-            out_df[newcol] = -1
-
-        # seed_yr is the year we are matching *from* -- we do the entire
-        # matching process from each year, since it may not be symmetric:
-        for seed_yr in self._years:
-            seed_idx = self.plants_df.index[
-                self.plants_df.report_year == seed_yr]
-            # match_yr is all the other years, in which we are finding the best
-            # match
-            for match_yr in self._years:
-                best_of_yr = match_yr
-                match_idx = self.plants_df.index[
-                    self.plants_df.report_year == match_yr]
-                # For each record specified by seed_idx, obtain the index of
-                # the record within match_idx that that is the most similar.
-                best_idx = sim_df.iloc[seed_idx, match_idx].idxmax(axis=1)
-                out_df.iloc[seed_idx,
-                            out_df.columns.get_loc(best_of_yr)] = best_idx
+        """
+        Find the best match for each plant record in each other year.
 
-        return out_df
+        Returns:
+            numpy.ndarray: an n_samples x n_years array, in which each column
+            has the (positional) index of the record from that year which is
+            most similar to each record, or -1 if no record from that year is
+            similar enough. Ties go to the first of the most similar records.
+        """
+        sim = self._sim.tocoo()
+        years = self.plants_df.report_year.to_numpy()
+        year_num = pd.Index(self._years).get_indexer(years)
+        # Group the similarities by seed record & match year, putting the
+        # best (and then the first) match in each group first:
+        group = sim.row.astype(np.int64) * len(self._years) + \
+            year_num[sim.col]
+        order = np.lexsort((sim.col, -sim.data, group))
+        group, best = group[order], sim.col[order]
+        first = np.ones(len(group), dtype=bool)
+        first[1:] = group[1:] != group[:-1]
+
+        best_match = np.full(len(years) * len(self._years), -1,
+                             dtype=np.int32)
+        best_match[group[first]] = best[first]
+        return best_match.reshape(len(years), len(self._years))
+
+
+def _ferc_clf_transformers(ngram_min=2, ngram_max=10):
+    """The (name, transformer, columns) making up the FERC plant features."""
+    return [
+        ('plant_name', Pipeline([
+            ('tfidf', TfidfVectorizer(analyzer='char',
+                                      ngram_range=(ngram_min, ngram_max))),
+        ]), 'plant_name'),
+
+        ('plant_type', Pipeline([
+            ('onehot', OneHotEncoder()),
+        ]), ['plant_type']),
+
+        ('construction_type', Pipeline([
+            ('onehot', OneHotEncoder()),
+        ]), ['construction_type']),
+
+        ('capacity_mw', Pipeline([
+            ('scaler', RobustScaler()),
+            ('norm', Normalizer())
+        ]), ['capacity_mw']),
+
+        ('construction_year', Pipeline([
+            ('onehot', OneHotEncoder(categories='auto')),
+        ]), ['construction_year']),
+
+        ('utility_id_ferc', Pipeline([
+            ('onehot', OneHotEncoder(categories='auto')),
+        ]), ['utility_id_ferc'])
+    ]
 
 
 def make_ferc_clf(plants_df,
@@ -1162,34 +1448,7 @@ def make_ferc_clf(plants_df,
 
     ferc_pipe = Pipeline([
         ('preprocessor', ColumnTransformer(
-            transformers=[
-                ('plant_name', Pipeline([
-                    ('tfidf', TfidfVectorizer(analyzer='char',
-                                              ngram_range=(ngram_min,
-                                                           ngram_max))),
-                ]), 'plant_name'),
-
-                ('plant_type', Pipeline([
-                    ('onehot', OneHotEncoder()),
-                ]), ['plant_type']),
-
-                ('construction_type', Pipeline([
-                    ('onehot', OneHotEncoder()),
-                ]), ['construction_type']),
-
-                ('capacity_mw', Pipeline([
-                    ('scaler', RobustScaler()),
-                    ('norm', Normalizer())
-                ]), ['capacity_mw']),
-
-                ('construction_year', Pipeline([
-                    ('onehot', OneHotEncoder(categories='auto')),
-                ]), ['construction_year']),
-
-                ('utility_id_ferc', Pipeline([
-                    ('onehot', OneHotEncoder(categories='auto')),
-                ]), ['utility_id_ferc'])
-            ],
+            transformers=_ferc_clf_transformers(ngram_min, ngram_max),
 
             transformer_weights={
                 'plant_name': plant_name_wt,
@@ -1204,3 +1463,152 @@ def make_ferc_clf(plants_df,
             min_sim=min_sim, plants_df=plants_df))
     ])
     return ferc_pipe
+
+
+def _ferc_clf_feature_key(name, params):
+    """Which of the cached feature blocks a transformer uses in a trial."""
+    if name == 'plant_name':
+        return (name, params['ngram_min'], params['ngram_max'])
+    return (name,)
+
+
+def _score_ferc_clf_trial(blocks, plants_df, y, keys, weights, min_sim):
+    """
+    Fit & score the FERC plant classifier on re-weighted cached features.
+
+    Returns:
+        tuple: the score, and how many seconds it took to fit & score.
+    """
+    import time
+    start_time = time.monotonic()
+    X = scipy.sparse.hstack([wt * blocks[key]
+                             for key, wt in zip(keys, weights)]).tocsr()
+    clf = FERCPlantClassifier(min_sim=min_sim, plants_df=plants_df).fit(X)
+    score = clf.score(None, y)
+    return score, time.monotonic() - start_time
+
+
+# The state shared by all the trials in a sweep worker process.
+_sweep_state = {}
+
+
+def _init_ferc_clf_sweep(plants_df, y, block_specs):
+    """
+    Set up a sweep worker process, with views of the shared feature blocks.
+
+    block_specs maps each feature block key to its shape, and the name,
+    dtype & length of the shared memory holding its data, indices & indptr.
+    """
+    from multiprocessing import shared_memory
+    shms, blocks = [], {}
+    for key, (shape, arrays) in block_specs.items():
+        views = []
+        for shm_name, dtype, length in arrays:
+            shm = shared_memory.SharedMemory(name=shm_name)
+            shms.append(shm)
+            views.append(np.ndarray(length, dtype=dtype, buffer=shm.buf))
+        blocks[key] = scipy.sparse.csr_matrix(tuple(views), shape=shape,
+                                              copy=False)
+    _sweep_state.update(shms=shms, blocks=blocks, plants_df=plants_df, y=y)
+
+
+def _run_ferc_clf_trial(keys, weights, min_sim):
+    """The unit of work for a sweep worker: one trial on the shared blocks."""
+    return _score_ferc_clf_trial(_sweep_state['blocks'],
+                                 _sweep_state['plants_df'], _sweep_state['y'],
+                                 keys, weights, min_sim)
+
+
+def sweep_ferc_clf(plants_df, y, trials, workers=1, verbose=True):
+    """
+    Fit & score the FERC plant classifier with each of a set of parameters.
+
+    The output of each of the transformers that make up the features is only
+    calculated once (once per ngram range for the plant names), and the
+    cached blocks are re-weighted and combined for each trial, just as the
+    ColumnTransformer in make_ferc_clf would combine them. With more than one
+    worker, the trials are fit in a pool of processes, which all read the
+    cached blocks from shared memory rather than each having a copy.
+
+    Args:
+        plants_df (pandas.DataFrame): The FERC Form 1 plant records to fit
+            the classifier to, as passed to make_ferc_clf.
+        y (list): The "ground truth" record groups to score each trial
+            against, as passed to FERCPlantClassifier.score.
+        trials (list or dict): The make_ferc_clf keyword arguments of each
+            trial, as a list of dicts, or a dict of lists of values to try
+            every combination of. Any that are left out take their
+            make_ferc_clf defaults.
+        workers (int): The number of worker processes to fit the trials in.
+            With 1, they're fit one after another in this process.
+        verbose (bool): Whether to report each trial as it finishes.
+
+    Returns:
+        pandas.DataFrame: One row for each trial, with its parameters, its
+        score, and how many seconds it took to fit & score.
+    """
+    import inspect
+    from multiprocessing import shared_memory
+
+    if isinstance(trials, dict):
+        trials = list(ParameterGrid(trials))
+    defaults = {name: p.default for name, p
+                in inspect.signature(make_ferc_clf).parameters.items()
+                if p.default is not inspect.Parameter.empty}
+    trials = [{**defaults, **trial} for trial in trials]
+
+    # Calculate each of the feature blocks the trials need, just once:
+    blocks = {}
+    for trial in trials:
+        for name, transformer, columns in _ferc_clf_transformers(
+                trial['ngram_min'], trial['ngram_max']):
+            key = _ferc_clf_feature_key(name, trial)
+            if key not in blocks:
+                blocks[key] = scipy.sparse.csr_matrix(
+                    transformer.fit_transform(plants_df[columns]),
+                    dtype=np.float64)
+    names = [name for name, _, _ in _ferc_clf_transformers()]
+    runs = [([_ferc_clf_feature_key(name, trial) for name in names],
+             [trial[f'{name}_wt'] for name in names],
+             trial['min_sim']) for trial in trials]
+    # The classifier only needs to know each record's year and ID:
+    plants_df = plants_df[['report_year', 'record_id']]
+
+    results = []
+    if workers == 1:
+        for trial, run in zip(trials, runs):
+            results.append(_score_ferc_clf_trial(blocks, plants_df, y, *run))
+            if verbose:
+                print(f"    {trial}: {results[-1][0]:.4f}")
+    else:
+        import concurrent.futures
+        shms, block_specs = [], {}
+        try:
+            for key, block in blocks.items():
+                arrays = []
+                for array in (block.data, block.indices, block.indptr):
+                    shm = shared_memory.SharedMemory(
+                        create=True, size=max(1, array.nbytes))
+                    shms.append(shm)
+                    np.ndarray(len(array), dtype=array.dtype,
+                               buffer=shm.buf)[:] = array
+                    arrays.append((shm.name, array.dtype, len(array)))
+                block_specs[key] = (block.shape, arrays)
+            with concurrent.futures.ProcessPoolExecutor(
+                    max_workers=workers, initializer=_init_ferc_clf_sweep,
+                    initargs=(plants_df, y, block_specs)) as pool:
+                futures = [pool.submit(_run_ferc_clf_trial, *run)
+                           for run in runs]
+                for trial, future in zip(trials, futures):
+                    results.append(future.result())
+                    if verbose:
+                        print(f"    {trial}: {results[-1][0]:.4f}")
+        finally:
+            for shm in shms:
+                shm.close()
+                shm.unlink()
+
+    results_df = pd.DataFrame(trials)
+    results_df['score'] = [score for score, _ in results]
+    results_df['seconds'] = [seconds for _, seconds in results]
+    return results_df
@@ -6,11 +6,134 @@ and transformation of data that is being loaded into the PUDL database, rather
 than being specific to a particular data source.
 """
 
+import re
+import types
 import pandas as pd
 import numpy as np
 
 
-def cleanstrings(field, stringmap, unmapped=None, simplify=True):
+# Each whitespace character (or +) in a value is replaced by a single space
+# when the values of a field are simplified.
+_field_whitespace = re.compile(r'[\s+]')
+# Runs of whitespace in the strings of a stringmap are collapsed to a space.
+_stringmap_whitespace = re.compile(r'\s+')
+
+
+def _simplify_value(value):
+    """Lower case & strip a field value, the way cleanstrings always has."""
+    if not isinstance(value, str):
+        return np.nan
+    return _field_whitespace.sub(' ', value.lower().strip())
+
+
+class CompiledStringMap(object):
+    """
+    A stringmap, compiled into a lookup from each string to its canonical code.
+
+    Use compile_stringmap() to get one. The stringmap it's compiled from is
+    left untouched.
+    """
+
+    def __init__(self, stringmap, simplify=True):
+        """
+        Args:
+            stringmap (dict): A dictionary whose keys are the strings we're
+                mapping to, and whose values are the strings that get mapped.
+            simplify (bool): If true, strip whitespace, remove duplicate
+                whitespace, and force lower-case on the strings in the map.
+        """
+        codes = list(stringmap.keys())
+        strings = {}
+        for code in codes:
+            if simplify:
+                strings[code] = frozenset(
+                    _stringmap_whitespace.sub(' ', s.lower().strip())
+                    for s in stringmap[code])
+            else:
+                strings[code] = frozenset(stringmap[code])
+        # The codes are applied one after the other, so a string mapped to
+        # one code may be mapped to another by a later code.
+        lookup = {}
+        for string in frozenset().union(*strings.values()):
+            mapped = string
+            for code in codes:
+                if mapped in strings[code]:
+                    mapped = code
+            lookup[string] = mapped
+        self.lookup = types.MappingProxyType(lookup)
+        self.codes = frozenset(codes)
+        self.simplify = simplify
+
+    def canonicalize(self, field, unmapped=None):
+        """
+        Map the values of a field to their canonical codes.
+
+        Only the distinct values of the field are simplified and mapped, and
+        the results are then spread back out over all of its records.
+
+        Args:
+            field (pandas.Series): The values to be mapped.
+            unmapped (str, None, NaN): The value which values not found in
+                the stringmap are replaced by. If None, they're left alone.
+        Returns:
+            tuple: The mapped values (a pandas.Series, with the same index as
+            field), and a dictionary with the number of 'mapped' and
+            'unmapped' records, and the distinct 'unmapped_values', most
+            common first.
+        """
+        codes, uniques = pd.factorize(field.to_numpy(dtype=object))
+        # One more slot at the end for the nulls, which have code -1.
+        values = list(uniques) + [np.nan]
+        if self.simplify:
+            values = [_simplify_value(v) for v in values]
+        values = [self.lookup.get(v, v) for v in values]
+        is_code = np.array([v in self.codes for v in values])
+        mapped = np.empty(len(values), dtype=object)
+        mapped[:] = values
+        if unmapped is not None:
+            mapped[~is_code] = unmapped
+
+        counts = np.bincount(codes[codes >= 0], minlength=len(values))
+        counts[-1] = np.count_nonzero(codes == -1)
+        unmapped_counts = pd.Series(
+            counts[~is_code], index=np.array(values, dtype=object)[~is_code])
+        unmapped_counts = unmapped_counts[unmapped_counts > 0].\
+            groupby(level=0, sort=False, dropna=False).sum().\
+            sort_values(ascending=False, kind='stable')
+        stats = {
+            'mapped': int(counts[is_code].sum()),
+            'unmapped': int(unmapped_counts.sum()),
+            'unmapped_values': list(unmapped_counts.index),
+        }
+        return pd.Series(mapped[codes], index=field.index,
+                         name=field.name), stats
+
+
+# The stringmaps which have already been compiled.
+_compiled_stringmaps = {}
+
+
+def compile_stringmap(stringmap, simplify=True):
+    """
+    Compile a stringmap for cleanstrings, or get the already compiled one.
+
+    Args:
+        stringmap (dict): A dictionary whose keys are the strings we're
+            mapping to, and whose values are the strings that get mapped.
+        simplify (bool): See cleanstrings().
+    Returns:
+        CompiledStringMap: The compiled stringmap.
+    """
+    key = (simplify,
+           tuple((k, tuple(v)) for k, v in stringmap.items()))
+    if key not in _compiled_stringmaps:
+        _compiled_stringmaps[key] = CompiledStringMap(stringmap,
+                                                      simplify=simplify)
+    return _compiled_stringmaps[key]
+
+
+def cleanstrings(field, stringmap, unmapped=None, simplify=True,
+                 return_stats=False):
     """
     Consolidate freeform strings in dataframe column to canonical codes.
 
@@ -20,6 +143,9 @@ def cleanstrings(field, stringmap, unmapped=None, simplify=True):
     values in the original field with a value (like NaN) to indicate data which
     is uncategorized or confusing.
 
+    The stringmap is compiled into a lookup table the first time it's used
+    (see compile_stringmap), and isn't modified.
+
     Args:
         field (pandas.DataFrame column): A pandas DataFrame column
             (e.g. f1_fuel["FUEL"]) whose strings will be matched, where
@@ -35,32 +161,18 @@ def cleanstrings(field, stringmap, unmapped=None, simplify=True):
             whitespace, and force lower-case on both the string map and the
             field values.
 
+        return_stats (bool): If true, also return the statistics on how many
+            of the values were mapped (see CompiledStringMap.canonicalize).
+
     Returns:
         pandas.Series: The function returns a new pandas series/column that can
-            be used to set the values of the original data.
+            be used to set the values of the original data. With return_stats,
+            a tuple of the new series and the mapping statistics.
     """
-    from numpy import setdiff1d
-    import re
-
-    # Simplify the strings we're working with, to reduce the number of strings
-    # we need to enumerate in the maps
-
-    if simplify:
-        # Transform strings to lower case, strip leading/trailing whitespace
-        field = field.str.lower().str.strip()
-        # remove duplicate internal whitespace
-        field = field.replace('[\s+]', ' ', regex=True)
-        for k, v in stringmap.items():
-            stringmap[k] = [re.sub('\s+', ' ', s.lower().strip()) for s in v]
-
-    for k in stringmap.keys():
-        if len(stringmap[k]) > 0:
-            field = field.replace(stringmap[k], k)
-
-    if unmapped is not None:
-        badstrings = setdiff1d(field.unique(), list(stringmap.keys()))
-        field = field.replace(badstrings, unmapped)
-
+    field, stats = compile_stringmap(stringmap, simplify=simplify).\
+        canonicalize(field, unmapped=unmapped)
+    if return_stats:
+        return field, stats
     return field
 
 
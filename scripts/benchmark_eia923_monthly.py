@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+"""
+Benchmark turning the annual EIA 923 records into monthly records.
+
+The EIA 923 pages are extracted from the spreadsheets in the datastore, and
+then each page with monthly columns is reshaped both month by month (the way
+pudl.transform.eia923.yearly_to_monthly_eia923 used to do it) and with the
+single pass pudl.helpers.unpivot_months, checking that the results are
+identical and reporting how long each takes.
+"""
+
+import os
+import sys
+import argparse
+
+assert sys.version_info >= (3, 5)  # require modern python
+
+# This is a hack to make the pudl package importable from within this script,
+# even though it isn't in one of the normal site-packages directories where
+# Python typically searches.  When we have some real installation/packaging
+# happening, this will no longer be necessary.
+sys.path.append(os.path.abspath('..'))
+
+
+def parse_command_line(argv):
+    """
+    Parse command line arguments. See the -h option.
+
+    :param argv: arguments on the command line must include caller file name.
+    """
+    import pudl.constants as pc
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        '-y',
+        '--years',
+        nargs='+',
+        type=int,
+        help="Years of EIA 923 data to reshape. (default: %(default)s)",
+        default=list(pc.working_years['eia923'])
+    )
+    parser.add_argument(
+        '-p',
+        '--pages',
+        nargs='+',
+        help="EIA 923 pages to reshape. (default: %(default)s)",
+        default=['generation_fuel', 'boiler_fuel', 'generator', 'stocks']
+    )
+    parser.add_argument(
+        '-r',
+        '--repeat',
+        type=int,
+        help="Number of times to reshape each page. (default: %(default)s)",
+        default=3
+    )
+    parser.add_argument(
+        '-c',
+        '--cache',
+        action='store_true',
+        help="Use the EIA extract cache, to skip re-reading the spreadsheets."
+    )
+    arguments = parser.parse_args(argv[1:])
+    return arguments
+
+
+def _month_by_month(df, md):
+    """The old reshape: split out, concatenate & merge each year and month."""
+    import pandas as pd
+    yearly = df.copy()
+    all_years = pd.DataFrame()
+    for y in yearly.report_year.unique():
+        this_year = yearly[yearly.report_year == y].copy()
+        monthly = pd.DataFrame()
+        for m in md.keys():
+            this_month = this_year.filter(regex=md[m]).copy()
+            this_year.drop(this_month.columns, axis=1, inplace=True)
+            this_month.columns = this_month.columns.str.replace(
+                md[m], '', regex=True)
+            this_month['report_month'] = m
+            monthly = pd.concat([monthly, this_month], sort=True)
+        this_year = this_year.merge(monthly, left_index=True, right_index=True)
+        all_years = pd.concat([all_years, this_year], sort=True)
+    return all_years
+
+
+def main():
+    """Reshape each page both ways, and report the timings."""
+    import time
+    import pandas as pd
+    import pudl.constants as pc
+    import pudl.extract.eia923
+    import pudl.transform.eia923
+    from pudl.settings import SETTINGS
+
+    args = parse_command_line(sys.argv)
+    cache_dir = SETTINGS['eia_cache_dir'] if args.cache else None
+    raw_dfs = pudl.extract.eia923.extract(eia923_years=args.years,
+                                          cache_dir=cache_dir)
+    reshapes = {
+        'month_by_month': _month_by_month,
+        'single_pass': pudl.transform.eia923.yearly_to_monthly_eia923,
+    }
+
+    results = []
+    for page in args.pages:
+        df = raw_dfs[page]
+        outputs = {}
+        for name, reshape in reshapes.items():
+            for _ in range(args.repeat):
+                start_time = time.monotonic()
+                outputs[name] = reshape(df, pc.month_dict_eia923)
+                results.append({
+                    'page': page,
+                    'reshape': name,
+                    'rows': len(outputs[name]),
+                    'seconds': time.monotonic() - start_time,
+                })
+        old, new = outputs['month_by_month'], outputs['single_pass']
+        assert old.columns.equals(new.columns) and \
+            old.index.equals(new.index) and \
+            old.dtypes.equals(new.dtypes) and old.equals(new), \
+            f"The reshapes of {page} differ."
+
+    results = pd.DataFrame(results)
+    summary = results.groupby(['page', 'reshape']).agg(
+        {'rows': 'first', 'seconds': ['min', 'median']})
+    with pd.option_context('display.float_format', '{:.3f}'.format):
+        print(summary)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
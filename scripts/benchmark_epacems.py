@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+"""
+Benchmark reading the EPA CEMS CSVs with and without an explicit schema.
+
+For each requested state-month file, this script reads the file twice (once
+letting pandas infer the column types, and once using the dtypes defined in
+pudl.extract.epacems.epacems_read_dtypes) and reports the parse time, the
+increase in peak resident memory, and the deep memory usage of the resulting
+DataFrame. If a chunksize is given, the file is also streamed in chunks of
+that many rows, and the largest chunk's memory usage is reported. Every read
+happens in a freshly started process, so that the peak
+RSS of one read doesn't hide the peak RSS of the next.
+"""
+
+import os
+import sys
+import argparse
+
+assert sys.version_info >= (3, 5)  # require modern python
+
+# This is a hack to make the pudl package importable from within this script,
+# even though it isn't in one of the normal site-packages directories where
+# Python typically searches.  When we have some real installation/packaging
+# happening, this will no longer be necessary.
+sys.path.append(os.path.abspath('..'))
+
+
+def parse_command_line(argv):
+    """
+    Parse command line arguments. See the -h option.
+
+    :param argv: arguments on the command line must include caller file name.
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        '-y',
+        '--years',
+        nargs='+',
+        type=int,
+        help="Years of EPA CEMS data to read. (default: %(default)s)",
+        default=[2016]
+    )
+    parser.add_argument(
+        '-t',
+        '--states',
+        nargs='+',
+        help="States of EPA CEMS data to read. (default: %(default)s)",
+        default=['CO']
+    )
+    parser.add_argument(
+        '-m',
+        '--months',
+        nargs='+',
+        type=int,
+        help="Months of EPA CEMS data to read. (default: all of them)",
+        default=list(range(1, 13))
+    )
+    parser.add_argument(
+        '-c',
+        '--chunksize',
+        type=int,
+        help="Also stream the files in chunks of this many rows.",
+        default=None
+    )
+    arguments = parser.parse_args(argv[1:])
+    return arguments
+
+
+def _measure_read(filename, typed, chunksize=None):
+    """Read one CEMS file and report how long it took and how much memory."""
+    import resource
+    import time
+    import pudl.extract.epacems
+
+    # ru_maxrss is in kilobytes on Linux, but in bytes on Mac OS.
+    rss_units = 1 if sys.platform == 'darwin' else 1024
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start_time = time.monotonic()
+    if chunksize is None:
+        dfs = [pudl.extract.epacems.read_cems_csv(filename, typed=typed)]
+    else:
+        dfs = pudl.extract.epacems.read_cems_csv_chunks(
+            filename, chunksize, typed=typed)
+    rows = 0
+    df_mb = 0
+    for df in dfs:
+        rows += len(df)
+        df_mb = max(df_mb, df.memory_usage(deep=True).sum() / 1024**2)
+        del df
+    parse_time = time.monotonic() - start_time
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {
+        'rows': rows,
+        'parse_seconds': parse_time,
+        'peak_rss_mb': (peak - baseline) * rss_units / 1024**2,
+        'df_mb': df_mb,
+    }
+
+
+def main():
+    """Read each of the requested files with both schemas and report."""
+    import multiprocessing
+    import pandas as pd
+    import pudl.extract.epacems
+
+    args = parse_command_line(sys.argv)
+    ctx = multiprocessing.get_context('spawn')
+
+    results = []
+    for year in args.years:
+        for state in args.states:
+            for month in args.months:
+                filename = pudl.extract.epacems.get_epacems_file(
+                    year, month, state)
+                schemas = [('inferred', False, None), ('typed', True, None)]
+                if args.chunksize is not None:
+                    schemas.append(('chunked', True, args.chunksize))
+                for schema, typed, chunksize in schemas:
+                    with ctx.Pool(processes=1) as pool:
+                        result = pool.apply(_measure_read,
+                                            (filename, typed, chunksize))
+                    result.update({'year': year, 'state': state,
+                                   'month': month, 'schema': schema})
+                    results.append(result)
+
+    results = pd.DataFrame(results).set_index(
+        ['year', 'state', 'month', 'schema'])
+    with pd.option_context('display.max_rows', None,
+                           'display.float_format', '{:.2f}'.format):
+        print(results)
+        print()
+        print(results.groupby(level='schema').sum())
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,182 @@
+#!/usr/bin/env python
+"""
+Benchmark predicting and scoring FERC Form 1 plant record groups.
+
+The large steam plants are read from the PUDL DB, and the FERC plant
+classifier is fit to them. A sample of their record IDs is then predicted
+both record by record (the way FERCPlantClassifier.predict used to do it) and
+all at once, checking that the results are identical and reporting how long
+each takes. Finally, the hand labelled plant record groups in the training
+group CSVs are scored both ways, and the scores and timings reported.
+"""
+
+import os
+import sys
+import argparse
+
+assert sys.version_info >= (3, 5)  # require modern python
+
+# This is a hack to make the pudl package importable from within this script,
+# even though it isn't in one of the normal site-packages directories where
+# Python typically searches.  When we have some real installation/packaging
+# happening, this will no longer be necessary.
+sys.path.append(os.path.abspath('..'))
+
+
+def parse_command_line(argv):
+    """
+    Parse command line arguments. See the -h option.
+
+    :param argv: arguments on the command line must include caller file name.
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        '-n',
+        '--nrecords',
+        type=int,
+        help="Number of record IDs to predict. (default: %(default)s)",
+        default=1000
+    )
+    parser.add_argument(
+        '-g',
+        '--groups',
+        help="Glob matching the CSVs of hand labelled plant record groups. "
+             "(default: %(default)s)",
+        default=os.path.join('..', 'results', 'notebooks', 'cpi_ferc_plants',
+                             'ferc1_plant_training_groups_*.csv')
+    )
+    parser.add_argument(
+        '-r',
+        '--repeat',
+        type=int,
+        help="Number of times to predict & score. (default: %(default)s)",
+        default=3
+    )
+    arguments = parser.parse_args(argv[1:])
+    return arguments
+
+
+def _predict_record_by_record(clf, X):
+    """The old predict: look up & check the best matches of each record."""
+    import numpy as np
+    import pandas as pd
+    best_of = clf._best_of
+    years = clf._years
+    out_df = pd.DataFrame(columns=years)
+    out_idx = []
+    for x in X:
+        idx = best_of.index.get_loc(
+            best_of[best_of.record_id == x].index.values[0])
+        w_m = best_of[years][best_of[years] == idx]
+        w_m = np.flatnonzero(w_m.notnull().any(axis=1))
+        b_m = best_of.iloc[idx][years].astype(int)
+        b_m = b_m[b_m >= 0].values
+        if len(w_m) == len(b_m) and (w_m == b_m).all():
+            new_grp = best_of.record_id.iloc[
+                best_of.iloc[idx][years].astype(int)].values
+            new_grp = np.where(best_of.iloc[idx][years] >= 0, new_grp, '')
+            new_grp = pd.DataFrame(new_grp.reshape(1, len(years)),
+                                   columns=years)
+            out_df = pd.concat([out_df, new_grp])
+            out_idx = out_idx + [best_of.record_id.iloc[idx]]
+    out_df['seed_id'] = out_idx
+    out_df = out_df.set_index('seed_id')
+    return out_df
+
+
+def _score_group_by_group(clf, y):
+    """The old score: predict & compare each true group, record by record."""
+    from difflib import SequenceMatcher
+    import numpy as np
+    scores = []
+    for true_group in y:
+        true_group = [s for s in true_group.split(',') if s != '']
+        known = [s for s in true_group if (clf._best_of.record_id == s).any()]
+        predicted_groups = _predict_record_by_record(clf, known)
+        for rec_id in true_group:
+            if rec_id not in predicted_groups.index:
+                scores.append(0.0)
+                continue
+            sm = SequenceMatcher(None, true_group,
+                                 list(predicted_groups.loc[rec_id]))
+            scores.append(sm.ratio())
+    return np.mean(scores)
+
+
+def _read_true_groups(pattern, record_ids):
+    """The comma separated true group of each hand labelled record ID."""
+    import glob
+    import pandas as pd
+    groups = pd.concat([pd.read_csv(f, dtype=str) for f in glob.glob(pattern)])
+    groups = groups.drop_duplicates().fillna('')
+    groups = groups[sorted(groups.columns)].agg(','.join, axis=1)
+    # One copy of each group for each of its records, as in training:
+    y = [grp for grp in groups for rec_id in grp.split(',')
+         if rec_id in record_ids]
+    return y
+
+
+def main():
+    """Predict & score both ways, and report the timings."""
+    import time
+    import numpy as np
+    import pandas as pd
+    import pudl.init
+    import pudl.transform.pudl
+    import pudl.transform.ferc1
+
+    args = parse_command_line(sys.argv)
+    pudl_engine = pudl.init.connect_db(testing=False)
+    steam_df = pd.read_sql('plants_steam_ferc1', pudl_engine)
+    steam_df['construction_year'] = \
+        pudl.transform.pudl.fix_int_na(steam_df.construction_year)
+
+    start_time = time.monotonic()
+    clf = pudl.transform.ferc1.make_ferc_clf(steam_df).fit_transform(steam_df)
+    print(f"Fit {len(steam_df)} records in "
+          f"{time.monotonic() - start_time:.3f} seconds.")
+
+    X = steam_df.record_id.sample(min(args.nrecords, len(steam_df)),
+                                  random_state=0).values
+    y = _read_true_groups(args.groups, set(steam_df.record_id))
+    benchmarks = {
+        'predict': {
+            'record_by_record': lambda: _predict_record_by_record(clf, X),
+            'all_at_once': lambda: clf.predict(X),
+        },
+        'score': {
+            'group_by_group': lambda: _score_group_by_group(clf, y),
+            'all_at_once': lambda: clf.score(None, y),
+        },
+    }
+
+    results = []
+    for task, runs in benchmarks.items():
+        outputs = {}
+        for name, run in runs.items():
+            for _ in range(args.repeat):
+                start_time = time.monotonic()
+                outputs[name] = run()
+                results.append({
+                    'task': task,
+                    'method': name,
+                    'seconds': time.monotonic() - start_time,
+                })
+        old, new = outputs.values()
+        if task == 'predict':
+            assert old.index.equals(new.index) and \
+                (old.values == new.values).all(), \
+                "The predicted record groups differ."
+        else:
+            assert np.isclose(old, new), f"The scores differ: {old} {new}"
+            print(f"Scored {len(y)} hand labelled records: {new:.4f}")
+
+    results = pd.DataFrame(results)
+    summary = results.groupby(['task', 'method']).agg(
+        {'seconds': ['min', 'median']})
+    with pd.option_context('display.float_format', '{:.3f}'.format):
+        print(summary)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
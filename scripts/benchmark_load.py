@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+"""
+Benchmark loading PUDL tables into postgres using the CSV and binary COPY.
+
+Records are read out of an existing table in the live PUDL database, and
+then loaded into the same table in the PUDL test database once using each of
+the COPY formats, timing how long each load takes. Everything is done within
+a single transaction on the test database, which is rolled back at the end,
+so the test database is left untouched. Foreign key constraints on the
+table are dropped (within that transaction) so that the records can be
+loaded without the tables they refer to.
+"""
+
+import os
+import sys
+import argparse
+
+assert sys.version_info >= (3, 5)  # require modern python
+
+# This is a hack to make the pudl package importable from within this script,
+# even though it isn't in one of the normal site-packages directories where
+# Python typically searches.  When we have some real installation/packaging
+# happening, this will no longer be necessary.
+sys.path.append(os.path.abspath('..'))
+
+
+def parse_command_line(argv):
+    """
+    Parse command line arguments. See the -h option.
+
+    :param argv: arguments on the command line must include caller file name.
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        '-t',
+        '--tables',
+        nargs='+',
+        help="Tables to benchmark. (default: %(default)s)",
+        default=['hourly_emissions_epacems', 'fuel_receipts_costs_eia923']
+    )
+    parser.add_argument(
+        '-n',
+        '--nrows',
+        type=int,
+        help="Maximum number of records to load. (default: %(default)s)",
+        default=1000000
+    )
+    parser.add_argument(
+        '-r',
+        '--repeat',
+        type=int,
+        help="Number of times to load each table. (default: %(default)s)",
+        default=3
+    )
+    arguments = parser.parse_args(argv[1:])
+    return arguments
+
+
+def _drop_foreign_keys(conn, table_name):
+    """Drop the foreign key constraints on a table (in the current txn)."""
+    import sqlalchemy as sa
+    for fk in sa.inspect(conn).get_foreign_keys(table_name):
+        conn.execute(
+            f'ALTER TABLE {table_name} DROP CONSTRAINT "{fk["name"]}"')
+
+
+def main():
+    """Load each table with each COPY format, and report the timings."""
+    import time
+    import pandas as pd
+    import pudl.init
+    import pudl.load
+    import pudl.models.entities
+
+    args = parse_command_line(sys.argv)
+    pudl_engine = pudl.init.connect_db(testing=False)
+    test_engine = pudl.init.connect_db(testing=True)
+    metadata = pudl.models.entities.PUDLBase.metadata
+
+    results = []
+    for table_name in args.tables:
+        tbl = metadata.tables[table_name]
+        print(f"Reading up to {args.nrows} records from {table_name}...")
+        df = pd.read_sql(tbl.select().limit(args.nrows), pudl_engine)
+        # Let the database fill in any surrogate keys.
+        df = df.drop([c.name for c in tbl.primary_key.columns
+                      if c.autoincrement is True], axis=1)
+
+        conn = test_engine.connect()
+        txn = conn.begin()
+        try:
+            # The table's foreign keys need the other tables to exist.
+            metadata.create_all(conn, checkfirst=True)
+            _drop_foreign_keys(conn, table_name)
+            for copy_format in ('csv', 'binary'):
+                for _ in range(args.repeat):
+                    conn.execute(f"TRUNCATE {table_name}")
+                    start_time = time.monotonic()
+                    # dict_dump_load does the same integer fixing as an ETL.
+                    pudl.load.dict_dump_load(
+                        {table_name: df.copy()}, table_name, conn,
+                        verbose=False,
+                        copy_formats={table_name: copy_format})
+                    results.append({
+                        'table': table_name,
+                        'format': copy_format,
+                        'rows': len(df),
+                        'seconds': time.monotonic() - start_time,
+                    })
+        finally:
+            txn.rollback()
+            conn.close()
+
+    results = pd.DataFrame(results)
+    summary = results.groupby(['table', 'format']).agg(
+        {'rows': 'first', 'seconds': ['min', 'median']})
+    with pd.option_context('display.float_format', '{:.2f}'.format):
+        print(summary)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
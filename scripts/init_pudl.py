@@ -49,7 +49,9 @@ def main():
                           years=settings_init['ferc1_years'],
                           def_db=True,
                           verbose=settings_init['verbose'],
-                          testing=settings_init['ferc1_testing'])
+                          testing=settings_init['ferc1_testing'],
+                          workers=settings_init['ferc1_workers'],
+                          copy_writers=settings_init['ferc1_copy_writers'])
 
     init.init_db(ferc1_tables=settings_init['ferc1_tables'],
                  ferc1_years=settings_init['ferc1_years'],
@@ -64,7 +66,25 @@ def main():
                  pudl_testing=settings_init['pudl_testing'],
                  ferc1_testing=settings_init['ferc1_testing'],
                  csvdir=SETTINGS['csvdir'],
-                 keep_csv=settings_init['keep_csv'])
+                 keep_csv=settings_init['keep_csv'],
+                 epacems_workers=settings_init['epacems_workers'],
+                 epacems_max_in_flight=settings_init['epacems_max_in_flight'],
+                 epacems_outputs=settings_init['epacems_outputs'],
+                 parquet_dir=SETTINGS['parquet_dir'],
+                 epacems_copy_writers=settings_init['epacems_copy_writers'],
+                 epacems_memory_fraction=settings_init['epacems_memory_fraction'],
+                 epacems_incremental=settings_init['epacems_incremental'],
+                 epacems_index_workers=settings_init['epacems_index_workers'],
+                 epacems_brin=settings_init['epacems_brin'],
+                 epacems_logged=settings_init['epacems_logged'],
+                 epacems_chunksize=settings_init['epacems_chunksize'],
+                 eia_workers=settings_init['eia_workers'],
+                 eia_cache=settings_init['eia_cache'],
+                 eia860_max_open_workbooks=settings_init[
+                     'eia860_max_open_workbooks'],
+                 ferc1_packed_record_ids=settings_init[
+                     'ferc1_packed_record_ids'],
+                 copy_formats=settings_init['copy_formats'])
 
 
 if __name__ == '__main__':
@@ -92,6 +92,14 @@ def parse_command_line(argv):
         CEMS dataset.""",
         default=constants.cems_states.keys()
     )
+    parser.add_argument(
+        '-p',
+        '--connections',
+        type=int,
+        help="""Maximum number of simultaneous connections to each server.
+        (default: %(default)s).""",
+        default=4
+    )
 
     arguments = parser.parse_args(argv[1:])
     return arguments
@@ -102,6 +110,7 @@ def main():
     from pudl import datastore
     from pudl import constants
     import concurrent.futures
+    import time
 
     args = parse_command_line(sys.argv)
 
@@ -122,15 +131,35 @@ def main():
             if args.verbose and len(bad_yrs) > 0:
                 print("Invalid {} years ignored: {}.".format(src, bad_yrs))
 
-    with concurrent.futures.ThreadPoolExecutor() as executor:
-        for src in args.sources:
-            for yr in yrs_by_src[src]:
-                executor.submit(datastore.update, src, yr, args.states,
-                                clobber=args.clobber,
-                                unzip=args.unzip,
-                                verbose=args.verbose,
-                                datadir=args.datadir,
-                                no_download=args.no_download)
+    # All the sources and years share one pool of connections, so that all of
+    # the (many) EPA CEMS files can be fetched in parallel, without opening too
+    # many connections to any one server.
+    start_time = time.monotonic()
+    with datastore.Downloader(datadir=args.datadir,
+                              connections_per_host=args.connections) \
+            as downloader, concurrent.futures.ThreadPoolExecutor() as executor:
+        futures = [executor.submit(datastore.update, src, yr, args.states,
+                                   clobber=args.clobber,
+                                   unzip=args.unzip,
+                                   verbose=args.verbose,
+                                   datadir=args.datadir,
+                                   no_download=args.no_download,
+                                   downloader=downloader)
+                   for src in args.sources
+                   for yr in yrs_by_src[src]]
+        for future in futures:
+            future.result()
+    seconds = time.monotonic() - start_time
+
+    if args.verbose and not args.no_download:
+        stats = downloader.stats()
+        downloaded = stats[~stats.skipped]
+        print("Downloaded {} files ({:.0f} MB, {} resumed) at {:.1f} MB/s. "
+              "{} files were already present.".format(
+                  len(downloaded), downloaded.bytes.sum() / 1024**2,
+                  (downloaded.resumed_from > 0).sum(),
+                  downloaded.bytes.sum() / 1024**2 / seconds,
+                  stats.skipped.sum()))
 
 
 if __name__ == '__main__':
@@ -0,0 +1,52 @@
+"""Tests of the string canonicalization used by the transform steps."""
+
+import numpy as np
+import pandas as pd
+import pudl.transform.ferc1
+import pudl.transform.pudl
+
+
+def test_cleanstrings():
+    """Strings are simplified and mapped, leaving the stringmap alone."""
+    stringmap = {
+        'coal': ['Coal', 'bit  coal', 'lignite'],
+        'gas': ['natural gas', 'coal gas'],
+        'oil': [],
+    }
+    field = pd.Series([' COAL ', 'Bit Coal', 'natural\tgas', 'coal+gas',
+                       'Lignite', 'peat', 'oil', np.nan],
+                      index=[7, 6, 5, 4, 3, 2, 1, 0])
+    cleaned = pudl.transform.pudl.cleanstrings(field, stringmap)
+    assert list(cleaned.index) == [7, 6, 5, 4, 3, 2, 1, 0]
+    assert list(cleaned[:7]) == ['coal', 'coal', 'gas', 'gas',
+                                 'coal', 'peat', 'oil']
+    assert np.isnan(cleaned[0])
+    assert stringmap['coal'] == ['Coal', 'bit  coal', 'lignite']
+
+    cleaned, stats = pudl.transform.pudl.compile_stringmap(
+        stringmap).canonicalize(field, unmapped='')
+    assert list(cleaned) == ['coal', 'coal', 'gas', 'gas',
+                             'coal', '', 'oil', '']
+    assert stats['mapped'] == 6
+    assert stats['unmapped'] == 2
+    assert stats['unmapped_values'][0] == 'peat'
+
+
+def test_cleanstrings_stats(capsys):
+    """The mapping statistics are returned, and reported for FERC fields."""
+    stringmap = {'coal': ['bit coal'], 'gas': ['natural gas']}
+    field = pd.Series(['Bit Coal', 'peat', 'gas', 'peat', 'wood'],
+                      name='fuel')
+    cleaned, stats = pudl.transform.pudl.cleanstrings(
+        field, stringmap, unmapped='', return_stats=True)
+    assert list(cleaned) == ['coal', '', 'gas', '', '']
+    assert stats == {'mapped': 2, 'unmapped': 3,
+                     'unmapped_values': ['peat', 'wood']}
+
+    pudl.transform.ferc1._cleanstrings(field, stringmap, verbose=False)
+    assert capsys.readouterr().out == ''
+    cleaned = pudl.transform.ferc1._cleanstrings(field, stringmap,
+                                                 verbose=True)
+    assert list(cleaned) == ['coal', '', 'gas', '', '']
+    assert "3 of 5 fuel values unmapped, e.g. ['peat', 'wood']" in \
+        capsys.readouterr().out
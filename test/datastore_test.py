@@ -0,0 +1,127 @@
+"""Tests of the datastore downloader, using a local stand-in HTTP server."""
+
+import hashlib
+import http.server
+import os
+import threading
+import zipfile
+import pytest
+import pudl.datastore
+
+
+class _RangeHandler(http.server.BaseHTTPRequestHandler):
+    """Serve the server's files from memory, honoring simple Range headers."""
+
+    def do_GET(self):
+        self.server.requests.append((self.path, self.headers.get('Range')))
+        content = self.server.files.get(self.path)
+        if content is None:
+            self.send_error(404)
+            return
+        byte_range = self.headers.get('Range')
+        if byte_range is not None:
+            start = int(byte_range[len('bytes='):].rstrip('-'))
+            if start >= len(content):
+                self.send_error(416)
+                return
+            self.send_response(206)
+            self.send_header('Content-Range', 'bytes {}-{}/{}'.format(
+                start, len(content) - 1, len(content)))
+            content = content[start:]
+        else:
+            self.send_response(200)
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def http_server():
+    """A local HTTP server, serving a few (random) files."""
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), _RangeHandler)
+    server.files = {f'/file{i}.bin': os.urandom(100000 + i)
+                    for i in range(3)}
+    server.requests = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _urls(server):
+    host, port = server.server_address
+    return [f'http://{host}:{port}{path}' for path in sorted(server.files)]
+
+
+def test_download_and_skip(http_server, tmpdir):
+    """Files are downloaded once, recorded, and then skipped."""
+    datadir = str(tmpdir)
+    urls = _urls(http_server)
+    dest_files = [os.path.join(datadir, os.path.basename(url))
+                  for url in urls]
+    with pudl.datastore.Downloader(datadir=datadir,
+                                   connections_per_host=2) as downloader:
+        assert downloader.fetch_all(urls, dest_files) == dest_files
+    for url, dest_file in zip(urls, dest_files):
+        with open(dest_file, 'rb') as f:
+            content = f.read()
+        path = '/' + os.path.basename(url)
+        assert content == http_server.files[path]
+        entry = downloader.manifest[os.path.basename(dest_file)]
+        assert entry['size'] == len(content)
+        assert entry['sha256'] == hashlib.sha256(content).hexdigest()
+    assert len(http_server.requests) == 3
+
+    # The manifest was saved, so a new Downloader skips all the files.
+    with pudl.datastore.Downloader(datadir=datadir) as downloader:
+        assert downloader.fetch_all(urls, dest_files) == []
+    assert len(http_server.requests) == 3
+    assert downloader.stats().skipped.all()
+
+    # A file which no longer matches the manifest is downloaded again.
+    with open(dest_files[0], 'r+b') as f:
+        f.truncate(10)
+    with pudl.datastore.Downloader(datadir=datadir) as downloader:
+        assert downloader.fetch_all(urls, dest_files) == dest_files[:1]
+    assert len(http_server.requests) == 4
+
+
+def test_resume_partial_download(http_server, tmpdir):
+    """A partial download is finished off with a Range request."""
+    datadir = str(tmpdir)
+    url = _urls(http_server)[0]
+    content = http_server.files['/file0.bin']
+    dest_file = os.path.join(datadir, 'file0.bin')
+    with open(dest_file + '.part', 'wb') as f:
+        f.write(content[:12345])
+    with pudl.datastore.Downloader(datadir=datadir) as downloader:
+        downloader.fetch(url, dest_file)
+    with open(dest_file, 'rb') as f:
+        assert f.read() == content
+    assert not os.path.exists(dest_file + '.part')
+    assert http_server.requests == [('/file0.bin', 'bytes=12345-')]
+    assert downloader.manifest['file0.bin']['sha256'] == \
+        hashlib.sha256(content).hexdigest()
+    stats = downloader.stats()
+    assert stats.resumed_from[0] == 12345
+    assert stats.bytes[0] == len(content) - 12345
+
+
+def test_verify_unrecorded_zipfiles(tmpdir):
+    """Intact zipfiles from before the manifest are adopted, truncated not."""
+    datadir = str(tmpdir)
+    good = os.path.join(datadir, 'good.zip')
+    with zipfile.ZipFile(good, 'w') as z:
+        z.writestr('data.csv', 'a,b\n1,2\n' * 1000)
+    truncated = os.path.join(datadir, 'truncated.zip')
+    with open(good, 'rb') as f, open(truncated, 'wb') as g:
+        g.write(f.read()[:100])
+    with pudl.datastore.Downloader(datadir=datadir) as downloader:
+        assert downloader.verify(good)
+        assert not downloader.verify(truncated)
+    assert 'good.zip' in downloader.manifest
+    assert 'truncated.zip' not in downloader.manifest
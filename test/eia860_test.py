@@ -0,0 +1,76 @@
+"""Tests of the EIA 860 extraction that don't need the raw data."""
+
+import pandas as pd
+import pudl.constants as pc
+import pudl.extract.eia860
+
+
+def _write_eia860_workbooks(tmpdir, year, nrows=5):
+    """Write a small workbook for each EIA 860 file, with all its pages."""
+    column_maps = {
+        'boiler_generator_assn': pc.boiler_generator_assn_map_eia860,
+        'utility': pc.utility_assn_map_eia860,
+        'plant': pc.plant_assn_map_eia860,
+        'generator_existing': pc.generator_assn_map_eia860,
+        'generator_proposed': pc.generator_proposed_assn_map_eia860,
+        'generator_retired': pc.generator_retired_assn_map_eia860,
+        'ownership': pc.ownership_assn_map_eia860,
+    }
+    paths = {}
+    for f in pc.files_eia860:
+        path = str(tmpdir.join(f'{f}_{year}.xlsx'))
+        pages = {pc.tab_map_eia860.at[year, page]: page
+                 for page in pc.file_pages_eia860[f]}
+        with pd.ExcelWriter(path) as writer:
+            for sheet in range(max(pages) + 1):
+                if sheet not in pages:
+                    pd.DataFrame().to_excel(writer, sheet_name=f'{sheet}')
+                    continue
+                page = pages[sheet]
+                columns = column_maps[page].loc[year].dropna()
+                df = pd.DataFrame({
+                    col.upper().replace('_', ' '):
+                        [f'{page} {i}' if n % 2 else i * n
+                         for i in range(nrows)]
+                    for n, col in enumerate(columns)})
+                skiprows = pc.skiprows_eia860.at[year, page]
+                pd.DataFrame([[page]] * skiprows).to_excel(
+                    writer, sheet_name=page[:30], index=False, header=False)
+                df.to_excel(writer, sheet_name=page[:30], index=False,
+                            startrow=skiprows)
+        paths[pc.files_dict_eia860[f]] = path
+    return paths
+
+
+def test_extract_parallel(tmpdir, monkeypatch):
+    """The worker processes read exactly what the serial extraction does."""
+    paths = _write_eia860_workbooks(tmpdir, 2011)
+    monkeypatch.setattr(pudl.extract.eia860, 'get_eia860_file',
+                        lambda yr, file: paths[file])
+    serial = pudl.extract.eia860.extract([2011], verbose=False)
+    parallel = pudl.extract.eia860.extract([2011], verbose=False, workers=2)
+    assert list(parallel) == list(serial)
+    assert set(serial) == {page for f in pc.files_eia860
+                           for page in pc.file_pages_eia860[f]}
+    for page, df in serial.items():
+        assert len(df) == 5
+        pd.testing.assert_frame_equal(parallel[page], df)
+
+
+def test_extract_parallel_timings(tmpdir, monkeypatch, capsys):
+    """Opening each workbook is timed, as well as reading each page."""
+    paths = _write_eia860_workbooks(tmpdir, 2011)
+    monkeypatch.setattr(pudl.extract.eia860, 'get_eia860_file',
+                        lambda yr, file: paths[file])
+    _, timings = pudl.extract.eia860._extract_parallel(
+        pc.files_eia860, [2011], verbose=False, workers=2)
+    opens = timings[timings.page == '(open)']
+    assert sorted(opens.file) == sorted(pc.files_eia860)
+    assert opens.rows.isna().all()
+    assert (opens.seconds > 0).all()
+    pages = timings[timings.page != '(open)']
+    assert len(pages) == sum(len(pc.file_pages_eia860[f])
+                             for f in pc.files_eia860)
+    assert (pages.rows == 5).all()
+    pudl.extract.eia860._print_timing(timings)
+    assert capsys.readouterr().out.count('(open)') == len(pc.files_eia860)
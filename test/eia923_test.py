@@ -0,0 +1,79 @@
+"""Tests of the EIA 923 extraction & transformation, without the raw data."""
+
+import numpy as np
+import pandas as pd
+import pudl.constants as pc
+import pudl.extract.eia923
+import pudl.transform.eia923
+
+
+def _write_eia923_workbook(tmpdir, year, nrows=5):
+    """Write a small EIA 923 workbook, with every page in its place."""
+    column_maps = {
+        'generation_fuel': pc.generation_fuel_map_eia923,
+        'stocks': pc.stocks_map_eia923,
+        'boiler_fuel': pc.boiler_fuel_map_eia923,
+        'generator': pc.generator_map_eia923,
+        'fuel_receipts_costs': pc.fuel_receipts_costs_map_eia923,
+        'plant_frame': pc.plant_frame_map_eia923,
+    }
+    path = str(tmpdir.join(f'eia923_{year}.xlsx'))
+    pages = {sheet: page for page, sheet in pc.tab_map_eia923.loc[year].items()
+             if sheet >= 0}
+    with pd.ExcelWriter(path) as writer:
+        for sheet in range(max(pages) + 1):
+            if sheet not in pages:
+                pd.DataFrame().to_excel(writer, sheet_name=f'{sheet}')
+                continue
+            page = pages[sheet]
+            columns = column_maps[page].loc[year].dropna()
+            # The last record is a state index record, which is dropped.
+            df = pd.DataFrame({
+                col.upper().replace('_', ' '):
+                    [99999 if i == nrows and 'plant_id' in col
+                     else f'{page} {i}' if n % 2 else i * n
+                     for i in range(nrows + 1)]
+                for n, col in enumerate(columns) if col})
+            skiprows = pc.skiprows_eia923.at[year, page]
+            pd.DataFrame([[page]] * skiprows).to_excel(
+                writer, sheet_name=page, index=False, header=False)
+            df.to_excel(writer, sheet_name=page, index=False,
+                        startrow=skiprows)
+    return path
+
+
+def test_yearly_to_monthly():
+    """Each year's records become 12 records, with columns sorted by name."""
+    df = pd.DataFrame({
+        'report_year': [2016, np.nan, 2015, 2016],
+        'plant_id_eia': [3, 5, 7, 9],
+    }, index=[10, 11, 12, 13])
+    for month, pattern in pc.month_dict_eia923.items():
+        name = pattern.strip('$')
+        df['net_generation_mwh' + name] = [month, 2.0 * month, 3.0, 4.0]
+        df['fuel_consumed_units' + name] = [month, 1, 2, 3]
+    out = pudl.transform.eia923.yearly_to_monthly_eia923(
+        df, pc.month_dict_eia923)
+    assert list(out.columns) == ['fuel_consumed_units', 'net_generation_mwh',
+                                 'plant_id_eia', 'report_month',
+                                 'report_year']
+    # The 2016 records come first, then 2015. No year, no records.
+    assert list(out.index) == [10] * 12 + [13] * 12 + [12] * 12
+    assert list(out.report_month) == list(range(1, 13)) * 3
+    assert list(out.net_generation_mwh[:12]) == list(range(1, 13))
+    assert out.fuel_consumed_units.dtype == np.int64
+    assert (out.plant_id_eia.values[12:24] == 9).all()
+
+
+def test_extract_parallel(tmpdir, monkeypatch):
+    """The worker processes read exactly what the serial extraction does."""
+    years = [2015, 2016]
+    paths = {yr: _write_eia923_workbook(tmpdir, yr) for yr in years}
+    monkeypatch.setattr(pudl.extract.eia923, 'get_eia923_file',
+                        lambda yr: paths[yr])
+    serial = pudl.extract.eia923.extract(years, verbose=False)
+    parallel = pudl.extract.eia923.extract(years, verbose=False, workers=2)
+    assert list(parallel) == list(serial)
+    for page, df in serial.items():
+        assert not df.empty
+        pd.testing.assert_frame_equal(parallel[page], df)
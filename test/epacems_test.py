@@ -0,0 +1,145 @@
+"""Tests of the EPA CEMS transformations that don't need the raw data."""
+
+import os
+import zipfile
+import pandas as pd
+import pytest
+import sqlalchemy as sa
+import pudl.extract.epacems
+import pudl.models.epacems
+import pudl.transform.epacems
+
+
+def test_fix_up_dates():
+    """Local standard times, UTC times and intervals from the raw columns."""
+    df = pd.DataFrame({
+        'state': pd.Categorical(['CO', 'CO', 'NY']),
+        'op_date': pd.Categorical(['01-31-2016', '02-01-2016', '01-31-2016']),
+        'op_hour': [23, 0, 5],
+        'op_time': [0.33, float('nan'), 1.0],
+    })
+    out = pudl.transform.epacems.fix_up_dates(df)
+    assert list(out.columns) == ['state', 'operating_datetime',
+                                 'operating_time_interval',
+                                 'operating_datetime_utc']
+    assert list(out.operating_datetime) == list(pd.to_datetime(
+        ['2016-01-31 23:00', '2016-02-01 00:00', '2016-01-31 05:00']))
+    assert list(out.operating_datetime_utc) == list(pd.to_datetime(
+        ['2016-02-01 06:00', '2016-02-01 07:00', '2016-01-31 10:00']))
+    assert out.operating_time_interval[0] == pd.Timedelta(seconds=1188)
+    assert pd.isnull(out.operating_time_interval[1])
+    assert out.operating_time_interval[2] == pd.Timedelta(hours=1)
+
+
+def test_changed_partitions():
+    """New & changed files are reloaded, or their whole state-years."""
+    partitions = [(2016, 1, 'CO'), (2016, 2, 'CO'), (2016, 1, 'NY'),
+                  (2017, 1, 'CO')]
+    checksums = dict(zip(partitions, ['a', 'b', 'c', 'd']))
+    loaded = {(2016, 1, 'CO'): 'a', (2016, 2, 'CO'): 'old',
+              (2016, 1, 'NY'): 'c', (2015, 1, 'CO'): 'e'}
+    assert pudl.models.epacems.changed_partitions(
+        partitions, checksums, loaded) == [(2016, 2, 'CO'), (2017, 1, 'CO')]
+    assert pudl.models.epacems.changed_partitions(
+        partitions, checksums, loaded, whole_years=True) == \
+        [(2016, 1, 'CO'), (2016, 2, 'CO'), (2017, 1, 'CO')]
+    assert pudl.models.epacems.changed_partitions(
+        partitions, checksums, dict(zip(partitions, 'abcd'))) == []
+
+
+def test_forget_and_record_partitions():
+    """Forgetting state-months deletes their records & manifest rows."""
+    # SQLite can't create the enum check constraints, and doesn't need the
+    # column types, so just create the columns.
+    engine = sa.create_engine('sqlite://')
+    tables = [pudl.models.epacems.HourlyEmissions.__table__,
+              pudl.models.epacems.HourlyEmissionsManifest.__table__]
+    for tbl in tables:
+        engine.execute(f"CREATE TABLE {tbl.name} "
+                       f"({', '.join(c.name for c in tbl.columns)})")
+    pudl.models.epacems.record_partitions(
+        engine, {(2016, 1, 'CO'): 'a', (2016, 12, 'CO'): 'b',
+                 (2016, 1, 'NY'): 'c'})
+    engine.execute(tables[0].insert(), [
+        {'state': state, 'plant_name': 'p', 'plant_id_eia': 1, 'unitid': '1',
+         'operating_datetime': pd.Timestamp(dt).to_pydatetime(),
+         'operating_datetime_utc': pd.Timestamp(dt).to_pydatetime()}
+        for state, dt in [('CO', '2016-01-31 23:00'), ('CO', '2016-02-01'),
+                          ('CO', '2016-12-31 23:00'), ('NY', '2016-01-01')]])
+
+    pudl.models.epacems.forget_partitions(
+        engine, [(2016, 1, 'CO'), (2016, 12, 'CO'), (2016, 3, 'CO')],
+        batch_size=2)
+    assert pudl.models.epacems.read_manifest(engine) == {(2016, 1, 'NY'): 'c'}
+    rows = engine.execute(sa.select([tables[0].c.state,
+                                     tables[0].c.operating_datetime]))
+    assert sorted((state, str(dt)) for state, dt in rows) == [
+        ('CO', '2016-02-01 00:00:00'), ('NY', '2016-01-01 00:00:00')]
+
+
+def _write_cems_zip(path, name, nrows=1):
+    """Write a zipped EPA CEMS CSV with nrows hourly records."""
+    csv = (
+        "STATE,FACILITY_NAME,ORISPL_CODE,UNITID,OP_DATE,OP_HOUR,OP_TIME,"
+        "GLOAD (MW),SLOAD (1000 lbs),SO2_MASS (lbs),SO2_MASS_MEASURE_FLG,"
+        "SO2_RATE (lbs/mmBtu),SO2_RATE_MEASURE_FLG,NOX_RATE (lbs/mmBtu),"
+        "NOX_RATE_MEASURE_FLG,NOX_MASS (lbs),NOX_MASS_MEASURE_FLG,"
+        "CO2_MASS (tons),CO2_MASS_MEASURE_FLG,CO2_RATE (tons/mmBtu),"
+        "CO2_RATE_MEASURE_FLG,HEAT_INPUT (mmBtu),FAC_ID,UNIT_ID\n"
+    ) + "".join(
+        f"CO,{name},5066,2,01-{22 + i // 24}-2016,{i % 24},0.22,{i}.9,,"
+        "0.12,Measured,0.16,Calculated,0.43,Calculated,0.14,Measured,0.93,"
+        "Measured,0.34,Calculated,740.7,10,20\n"
+        for i in range(nrows))
+    with zipfile.ZipFile(path, 'w') as z:
+        z.writestr(os.path.basename(path).replace('.zip', '.csv'), csv)
+
+
+@pytest.mark.parametrize('workers,chunksize', [(1, None), (1, 1), (2, None),
+                                               (2, 1)])
+def test_extract_checksums(tmpdir, monkeypatch, workers, chunksize):
+    """The checksums found while extracting are the files' checksums."""
+    files = {}
+    for month in [1, 2]:
+        files[(2016, month, 'CO')] = str(tmpdir.join(f'co{month:02}.zip'))
+        _write_cems_zip(files[(2016, month, 'CO')], f'Plant {month}')
+    monkeypatch.setattr(pudl.extract.epacems, 'get_epacems_file',
+                        lambda *yr_mo_st: files[yr_mo_st])
+    checksums = {}
+    dfs = list(pudl.extract.epacems.extract(
+        [2016], ['CO'], verbose=False, workers=workers, chunksize=chunksize,
+        partitions=list(files), checksums=checksums))
+    assert [list(d.keys())[0] for d in dfs] == list(files)
+    assert [list(d.values())[0].plant_name[0] for d in dfs] == \
+        ['Plant 1', 'Plant 2']
+    assert checksums == pudl.extract.epacems.get_epacems_checksums(files)
+
+
+def test_extract_parallel_chunked(tmpdir, monkeypatch):
+    """The workers' chunks come through in order, and can be abandoned."""
+    files = {}
+    for month in range(1, 7):
+        files[(2016, month, 'CO')] = str(tmpdir.join(f'co{month:02}.zip'))
+        _write_cems_zip(files[(2016, month, 'CO')], f'Plant {month}',
+                        nrows=5 * month)
+    monkeypatch.setattr(pudl.extract.epacems, 'get_epacems_file',
+                        lambda *yr_mo_st: files[yr_mo_st])
+
+    def extract(**kwargs):
+        return pudl.extract.epacems.extract(
+            [2016], ['CO'], verbose=False, chunksize=4,
+            partitions=list(files), **kwargs)
+    serial = list(extract())
+    # With two files in flight, the chunk queues are used again and again.
+    parallel = list(extract(workers=2, max_in_flight=2))
+    assert len(parallel) == len(serial) == sum(-(-5 * m // 4)
+                                               for m in range(1, 7))
+    for s, p in zip(serial, parallel):
+        assert list(s) == list(p)
+        pd.testing.assert_frame_equal(list(p.values())[0],
+                                      list(s.values())[0])
+
+    # Stopping partway through doesn't leave the workers stuck.
+    dfs = extract(workers=2, max_in_flight=2)
+    next(dfs)
+    dfs.close()
@@ -0,0 +1,54 @@
+"""Tests of the on-disk cache of the pages parsed from the EIA spreadsheets."""
+
+import os
+import numpy as np
+import pandas as pd
+import pudl.extract.cache
+
+
+def _frame():
+    return pd.DataFrame({
+        'plant_id_eia': [3, 7, 11],
+        'plant_name': pd.Series(['a', np.nan, 'c'], dtype=object),
+        'net_generation_mwh': [1.5, np.nan, 0.0],
+    }, index=[0, 2, 5])
+
+
+def test_cache_round_trip_and_invalidation(tmpdir):
+    """Frames come back exactly, until their workbook changes."""
+    workbook = os.path.join(str(tmpdir), 'workbook.xlsx')
+    with open(workbook, 'wb') as f:
+        f.write(b'version 1')
+    cache = pudl.extract.cache.ExtractCache(str(tmpdir), 'eia923')
+    params = (0, 5, {'plant id': 'plant_id_eia'})
+    df = _frame()
+    assert cache.get(2016, 'generator', workbook, params, lambda: df) is df
+    cached = cache.get(2016, 'generator', workbook, params, lambda: None)
+    assert pudl.extract.cache._identical(df, cached)
+    assert cached.plant_name[2] is not None
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert os.listdir(cache.cache_dir)[0].endswith('.parquet')
+
+    # A new column map, or a new workbook, means reading the page again.
+    new_params = (0, 5, {'plant_id': 'plant_id_eia'})
+    assert cache.load(2016, 'generator', workbook, new_params) is None
+    os.utime(workbook, (0, 0))
+    with open(workbook, 'wb') as f:
+        f.write(b'version 2')
+    assert cache.load(2016, 'generator', workbook, params) is None
+    cache.store(2016, 'generator', workbook, params, df)
+    assert len(os.listdir(cache.cache_dir)) == 1
+
+
+def test_cache_mixed_columns(tmpdir):
+    """Columns which Parquet can't hold exactly are pickled instead."""
+    workbook = os.path.join(str(tmpdir), 'workbook.xlsx')
+    with open(workbook, 'wb') as f:
+        f.write(b'version 1')
+    cache = pudl.extract.cache.ExtractCache(str(tmpdir), 'eia860')
+    df = _frame()
+    df['utility_id'] = pd.Series([1, 'NA', 2.0], dtype=object, index=df.index)
+    cache.store(2011, 'plant', workbook, (), df)
+    assert os.listdir(cache.cache_dir)[0].endswith('.pkl')
+    cached = cache.load(2011, 'plant', workbook, ())
+    assert pudl.extract.cache._identical(df, cached)
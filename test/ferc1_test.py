@@ -0,0 +1,321 @@
+"""Tests of the FERC Form 1 extract & transform that don't need the data."""
+
+import contextlib
+import struct
+import dbfread
+import numpy as np
+import pandas as pd
+import pytest
+import sqlalchemy as sa
+from sklearn.metrics.pairwise import cosine_similarity
+import pudl.extract.ferc1
+import pudl.transform.ferc1
+
+
+def _write_dbf(path, fields, records, deleted=()):
+    """Write a minimal dBase III file. Fields are (name, type, length)."""
+    recordlen = 1 + sum(length for _, _, length in fields)
+    headerlen = 32 + 32 * len(fields) + 1
+    # Language driver 0x03 is cp1252.
+    header = struct.pack('<BBBBIHH17xB2x', 0x03, 118, 1, 1, len(records),
+                         headerlen, recordlen, 0x03)
+    for name, field_type, length in fields:
+        header += struct.pack('<11sc4xBB14x', name.encode(),
+                              field_type.encode(), length, 0)
+    body = b''
+    for i, record in enumerate(records):
+        body += b'*' if i in deleted else b' '
+        for (_, _, length), value in zip(fields, record):
+            body += value.ljust(length)
+    with open(path, 'wb') as f:
+        f.write(header + b'\r' + body + b'\x1a')
+
+
+def test_read_dbf_chunks(tmpdir):
+    """The records are the ones dbfread reads, less the deleted ones."""
+    path = str(tmpdir.join('F1_TEST.DBF'))
+    fields = [('RESPONDENT', 'N', 5), ('NAME', 'C', 12),
+              ('COST', 'N', 8), ('REPORT_DT', 'D', 8)]
+    _write_dbf(path, fields, [
+        [b'    1', b'Caf\xe9', b'  12.50', b'20160131'],
+        [b'    2', b'Deleted', b'   1.00', b'20160229'],
+        [b'    3', b'', b'        ', b'        '],
+        [b'  515', b'  Padded', b'*******1', b'00000000'],
+    ], deleted=(1,))
+    columns = {'RESPONDENT': 'respondent_id', 'NAME': 'name',
+               'COST': 'cost', 'REPORT_DT': 'report_date'}
+    dfs = list(pudl.extract.ferc1.read_dbf_chunks(path, columns,
+                                                  chunk_records=2))
+    assert [len(df) for df in dfs] == [1, 2]
+    df = pd.concat(dfs, ignore_index=True)
+    expected = pd.DataFrame(
+        [[rec[name] for name in columns] for rec in dbfread.DBF(path)],
+        columns=list(columns.values()))
+    expected['report_date'] = pd.to_datetime(
+        expected.report_date).astype('datetime64[ns]')
+    assert list(df.respondent_id) == [1, 3, 515]
+    assert list(df.name) == ['Café', '', '  Padded']
+    pd.testing.assert_frame_equal(df, expected, check_dtype=False)
+
+
+def _write_ferc1_dbfs(basedir):
+    """Write the respondent & fuel DBF files of two years of FERC Form 1."""
+    respondents = {
+        2015: [b'    1', b'    2', b'  515'],
+        2016: [b'    2', b'    3', b'  515', b'    1'],
+    }
+    for year, ids in respondents.items():
+        d = basedir.mkdir('f1_{}'.format(year))
+        _write_dbf(str(d.join('F1_1.DBF')),
+                   [('RESPONDEN', 'N', 5), ('RESPONDE2', 'C', 12)],
+                   [[i, 'R{} {}'.format(int(i), year).encode()]
+                    for i in ids])
+        _write_dbf(str(d.join('F1_31.DBF')),
+                   [('RESPONDEN', 'N', 5), ('FUEL_QUANT', 'N', 8)],
+                   [[i, '{:8d}'.format(year + n).encode()]
+                    for n, i in enumerate(ids)])
+    meta = sa.MetaData()
+    tables = {
+        'F1_1': sa.Table('f1_respondent_id', meta,
+                         sa.Column('respondent_id', sa.Integer),
+                         sa.Column('respondent_name', sa.String)),
+        'F1_31': sa.Table('f1_fuel', meta,
+                          sa.Column('respondent_id', sa.Integer),
+                          sa.Column('fuel_quantity', sa.Float)),
+    }
+    columns = {
+        'F1_1': {'RESPONDEN': 'respondent_id',
+                 'RESPONDE2': 'respondent_name'},
+        'F1_31': {'RESPONDEN': 'respondent_id',
+                  'FUEL_QUANT': 'fuel_quantity'},
+    }
+    return [(year, dbf, tables[dbf], columns[dbf])
+            for year in respondents for dbf in ['F1_1', 'F1_31']]
+
+
+@pytest.mark.parametrize('copy_writers', [0, 1])
+def test_init_db_parallel(tmpdir, monkeypatch, copy_writers):
+    """The pooled ingest loads the same records as the serial one."""
+    units = _write_ferc1_dbfs(tmpdir)
+    loaded = {}
+
+    def copy(conn, tbl, dfs, columns, on_conflict_do_nothing=False):
+        # Like the primary key of f1_respondent_id, keep the first record of
+        # each respondent.
+        df = pd.concat(list(dfs), ignore_index=True)[columns]
+        rows = loaded.setdefault(tbl.name, [])
+        for row in df.itertuples(index=False):
+            if on_conflict_do_nothing and \
+                    row.respondent_id in [r[0] for r in rows]:
+                continue
+            rows.append(tuple(row))
+
+    class Engine:
+        def connect(self):
+            return contextlib.nullcontext()
+
+    monkeypatch.setattr(pudl.extract.ferc1, '_copy_dbf_records', copy)
+    pudl.extract.ferc1._init_db_serial(None, units, str(tmpdir), False)
+    serial = loaded
+    loaded = {}
+    pudl.extract.ferc1._init_db_parallel(Engine(), None, units, str(tmpdir),
+                                         workers=2, max_in_flight=1,
+                                         copy_writers=copy_writers,
+                                         verbose=False)
+    assert loaded == serial
+    assert serial['f1_respondent_id'] == [
+        (1, 'R1 2015'), (2, 'R2 2015'), (3, 'R3 2016')]
+    assert serial['f1_fuel'] == [
+        (1, 2015.0), (2, 2016.0), (2, 2016.0), (3, 2017.0), (1, 2019.0)]
+
+
+def test_read_dbc_catalog(tmpdir, monkeypatch):
+    """The catalog is read once, then kept until the files change."""
+    datadir = tmpdir.mkdir('f1_2016')
+    with open(str(datadir.join('F1_PUB.DBC')), 'wb') as f:
+        f.write(b'\x00\x01Table f1_respondent_id\x00\x9cField respondent_id'
+                b'\x00\x00Field respondent_name \xff\x00junk\x00')
+    _write_dbf(str(datadir.join('F1_1.DBF')),
+               [('RESPONDENT', 'N', 5), ('RESPONDEN2', 'C', 12)], [])
+    basedir, cache_dir = str(tmpdir), str(tmpdir.join('cache'))
+    catalog = pudl.extract.ferc1.read_dbc_catalog(
+        2016, basedir=basedir, cache_dir=cache_dir)
+    assert catalog == {'f1_respondent_id': [
+        ['RESPONDENT', 'respondent_id', 'N', 5],
+        ['RESPONDEN2', 'respondent_name', 'C', 12]]}
+    assert pudl.extract.ferc1.extract_dbc_tables(2016, basedir=basedir) == {
+        'f1_respondent_id': {'RESPONDENT': 'respondent_id',
+                             'RESPONDEN2': 'respondent_name'}}
+
+    # Once it's been saved, the catalog isn't parsed again...
+    def parse(*args):
+        raise AssertionError("The catalog was parsed again.")
+    pudl.extract.ferc1._dbc_catalogs.clear()
+    with monkeypatch.context() as m:
+        m.setattr(pudl.extract.ferc1, '_parse_dbc_catalog', parse)
+        assert pudl.extract.ferc1.read_dbc_catalog(
+            2016, basedir=basedir, cache_dir=cache_dir) == catalog
+    # ...until one of the files it was read from changes.
+    _write_dbf(str(datadir.join('F1_1.DBF')),
+               [('RESPONDENT', 'N', 6), ('RESPONDEN2', 'C', 12)],
+               [[b'     1', b'Utility']])
+    catalog = pudl.extract.ferc1.read_dbc_catalog(
+        2016, basedir=basedir, cache_dir=cache_dir)
+    assert catalog['f1_respondent_id'][0] == ['RESPONDENT', 'respondent_id',
+                                              'N', 6]
+
+
+def test_multiplicative_error_correction():
+    """Values off by a factor are fixed, and outliers are dropped, in place."""
+    df = pd.DataFrame({
+        'fuel': ['coal', 'coal', 'gas', 'coal', 'coal', 'gas'],
+        'heat': [20.0, 0.01, 1.0e-6, 2.0e-5, 5.0, np.nan],
+    }, index=[5, 3, 1, 4, 2, 0])
+    coal_mask = df.fuel == 'coal'
+    fixed = pudl.transform.ferc1._multiplicative_error_correction(
+        df.heat, coal_mask, 10.0, 29.0, (2e3, 1e6))
+    assert list(fixed.index) == [5, 3, 1, 4, 2, 0]
+    np.testing.assert_array_equal(
+        fixed.values, [20.0, 20.0, 1.0e-6, 20.0, np.nan, np.nan])
+    # Batched corrections give the same results, column by column.
+    corrected = pudl.transform.ferc1._multiplicative_error_corrections(df, [
+        ['heat', coal_mask, 10.0, 29.0, (2e3, 1e6)],
+        ['heat', df.fuel == 'gas', 0.8, 1.2, (1e3, 1e6)],
+    ])
+    np.testing.assert_array_equal(
+        corrected.heat.values, [20.0, 20.0, 1.0, 20.0, np.nan, np.nan])
+    assert df.heat[1] == 1.0e-6
+
+
+def test_packed_record_ids():
+    """Packed record IDs unpack to their fields, and to the usual strings."""
+    df = pd.DataFrame({
+        'report_year': [2016, 1994, 2016],
+        'respondent_id': [515, 1, 10],
+        'spplmnt_num': [0, 2, 0],
+        'row_number': [12, 1, 65535],
+    }, index=[9, 8, 7])
+    record_ids = pd.Series(pudl.transform.ferc1.encode_record_ids(df),
+                           index=df.index, name='record_id')
+    assert record_ids.dtype == np.int64
+    # They sort by year, respondent, supplement and row.
+    assert list(record_ids.sort_values().index) == [8, 7, 9]
+    pd.testing.assert_frame_equal(
+        pudl.transform.ferc1.decode_record_ids(record_ids), df)
+    assert list(pudl.transform.ferc1.record_id_strings(record_ids)) == [
+        '2016_515_0_12', '1994_1_2_1', '2016_10_0_65535']
+
+    df.loc[7, 'row_number'] = 65536
+    with pytest.raises(ValueError):
+        pudl.transform.ferc1.encode_record_ids(df)
+
+
+def test_best_by_year():
+    """The best matches are the ones the whole similarity matrix gives."""
+    rng = np.random.RandomState(0)
+    X = rng.rand(40, 6) ** 4
+    plants_df = pd.DataFrame({
+        'report_year': rng.choice([2014, 2015, 2016], size=40),
+        'record_id': [str(i) for i in range(40)],
+    })
+    clf = pudl.transform.ferc1.FERCPlantClassifier(
+        min_sim=0.9, plants_df=plants_df, block_size=50).fit(X)
+    assert clf._sim.nnz < 40 * 40
+
+    sim = cosine_similarity(X)
+    for i, yr in enumerate(clf._years):
+        match_idx = np.flatnonzero(plants_df.report_year == yr)
+        match_sim = sim[:, match_idx]
+        expected = np.where(match_sim.max(axis=1) >= 0.9,
+                            match_idx[match_sim.argmax(axis=1)], -1)
+        np.testing.assert_array_equal(clf._best_match[:, i], expected)
+        np.testing.assert_array_equal(clf._best_of[yr], expected)
+
+
+def test_predict_and_score():
+    """Only records whose best matches agree get a group, in input order."""
+    plants_df = pd.DataFrame({
+        'report_year': [2015, 2015, 2016, 2016, 2016, 2016],
+        'record_id': ['a', 'b', 'a2', 'b2', 'c', 'd'],
+    })
+    X = np.array([[1, 0], [0, 1], [1, 0.05], [0.05, 1], [0.7, 0.7],
+                  [1, 0.06]])
+    clf = pudl.transform.ferc1.FERCPlantClassifier(
+        min_sim=0.9, plants_df=plants_df).fit(X)
+    # a is the best match of a, a2 and d, but its best matches are a & a2,
+    # while d is the best match of d, but its best matches are a & d.
+    np.testing.assert_array_equal(clf._consistent,
+                                  [False, True, True, True, True, False])
+    predicted = clf.predict(['c', 'a', 'b2', 'a2'])
+    assert list(predicted.index) == ['c', 'b2', 'a2']
+    assert list(predicted.columns) == [2015, 2016]
+    assert predicted.values.tolist() == [['', 'c'], ['b', 'b2'], ['a', 'a2']]
+    with pytest.raises(KeyError):
+        clf.predict(['e'])
+
+    # a has no group, and e isn't a record at all:
+    assert clf.score(None, ['a,a2', 'a,a2', 'b,b2', 'e']) == \
+        pytest.approx(4 / 7)
+
+
+def test_plants_steam_packed_record_ids():
+    """Packed record IDs give the same large plants as the string ones."""
+    names = ['big creek', 'riverside', 'lake', 'riverside ct']
+    raw = pd.DataFrame({
+        'report_year': [2015] * 4 + [2016] * 4,
+        'respondent_id': [1, 2, 2, 2] * 2,
+        'spplmnt_num': [0] * 8,
+        'row_number': [1, 1, 2, 3, 3, 1, 2, 4],
+        'plant_name': names + ['Big Creek', 'Riverside', 'Lake', 'Rivers'],
+        'plant_kind': ['steam', 'steam', 'gas turbine', 'steam'] * 2,
+        'type_const': ['outdoor', 'conventional', 'outdoor',
+                       'conventional'] * 2,
+        'yr_const': [1970, 1985, 1990, 2000] * 2,
+        'yr_installed': [1970, 1985, 1990, 2000] * 2,
+    })
+    for col in pudl.extract.ferc1.ferc1_pudl_columns['plants_steam_ferc1']:
+        if col not in raw:
+            raw[col] = np.arange(len(raw), dtype=float) + 100.0
+    out = {}
+    for packed in [False, True]:
+        dfs = pudl.transform.ferc1.plants_steam(
+            {'plants_steam_ferc1': raw.copy()}, {}, verbose=False,
+            packed_record_ids=packed)
+        out[packed] = dfs['plants_steam_ferc1']
+    assert out[True].record_id.dtype == np.int64
+    out[True]['record_id'] = \
+        pudl.transform.ferc1.record_id_strings(out[True].record_id)
+    assert len(out[False]) > 0
+    pd.testing.assert_frame_equal(out[True], out[False])
+
+
+def test_sweep_ferc_clf():
+    """The sweep scores each trial just as its own classifier would."""
+    plants_df = pd.DataFrame({
+        'report_year': [2015, 2015, 2015, 2016, 2016, 2016],
+        'record_id': ['a', 'b', 'c', 'a2', 'b2', 'c2'],
+        'plant_name': ['big creek', 'riverside', 'lake', 'big creek #1',
+                       'riverside', 'lake unit'],
+        'plant_type': ['steam', 'steam', 'ct', 'steam', 'ct', 'ct'],
+        'construction_type': ['outdoor', 'conventional', 'outdoor',
+                              'outdoor', 'conventional', 'outdoor'],
+        'capacity_mw': [500.0, 80.0, 120.0, 510.0, 80.0, 100.0],
+        'construction_year': ['1970', '1985', '1990', '1970', '1985', '1990'],
+        'utility_id_ferc': [1, 2, 2, 1, 2, 2],
+    })
+    y = ['a,a2', 'a,a2', 'b,b2', 'b,b2', 'c,c2', 'c,c2']
+    trials = {'plant_name_wt': [0.5, 2.0], 'min_sim': [0.5, 0.9],
+              'ngram_max': [4]}
+    results = pudl.transform.ferc1.sweep_ferc_clf(plants_df, y, trials,
+                                                  verbose=False)
+    assert len(results) == 4
+    for trial in results.to_dict('records'):
+        params = {k: trial[k] for k in ['plant_name_wt', 'min_sim',
+                                        'ngram_max']}
+        clf = pudl.transform.ferc1.make_ferc_clf(plants_df, **params)
+        assert trial['score'] == clf.fit_transform(plants_df).score(None, y)
+    # The workers read the same features from shared memory:
+    parallel = pudl.transform.ferc1.sweep_ferc_clf(plants_df, y, trials,
+                                                   workers=2, verbose=False)
+    pd.testing.assert_frame_equal(parallel.drop(columns='seconds'),
+                                  results.drop(columns='seconds'))
@@ -0,0 +1,310 @@
+"""Tests of the database loading helpers that don't need a database."""
+
+import io
+import struct
+import numpy as np
+import pandas as pd
+import pytest
+import sqlalchemy as sa
+import pudl.load
+import pudl.models.entities
+
+
+def _decode_binary_copy_tuples(buf):
+    """Split binary COPY tuples back into lists of raw field values."""
+    buf = bytes(buf)
+    rows = []
+    pos = 0
+    while pos < len(buf):
+        (nfields,) = struct.unpack_from('>h', buf, pos)
+        pos += 2
+        fields = []
+        for _ in range(nfields):
+            (length,) = struct.unpack_from('>i', buf, pos)
+            pos += 4
+            if length < 0:
+                fields.append(None)
+            else:
+                fields.append(buf[pos:pos + length])
+                pos += length
+        rows.append(fields)
+    return rows
+
+
+def test_binary_copy_tuples():
+    """Encode a few typical columns and check the binary COPY layout."""
+    tbl = pudl.models.entities.PUDLBase.metadata.tables[
+        'fuel_receipts_costs_eia923']
+    df = pd.DataFrame({
+        'plant_id_eia': [3, 7],
+        'report_date': pd.to_datetime(['2000-01-02', '2016-01-01']),
+        'supplier_name': ['peabody', ''],
+        'mine_id_pudl': [np.nan, 12.0],
+        'fuel_qty_units': [1.5, np.nan],
+    })
+    rows = _decode_binary_copy_tuples(pudl.load._binary_copy_tuples(df, tbl))
+    assert len(rows) == 2
+    assert rows[0] == [struct.pack('>i', 3), struct.pack('>i', 1),
+                       b'peabody', None, struct.pack('>d', 1.5)]
+    # Empty strings are NULL, like they are when loading from CSV.
+    assert rows[1] == [struct.pack('>i', 7), struct.pack('>i', 5844),
+                       None, struct.pack('>i', 12), None]
+
+
+@pytest.mark.parametrize('values, sql_type', [
+    ([1.7, np.nan, 3.0], sa.Integer()),
+    ([1.0, np.nan, 2.0 ** 31], sa.Integer()),
+    ([np.inf], sa.BigInteger()),
+    ([70000], sa.SmallInteger()),
+])
+def test_binary_field_rejects_bad_integers(values, sql_type):
+    """Integers which a CSV COPY would reject aren't quietly mangled."""
+    with pytest.raises(ValueError, match='plant_id_eia'):
+        pudl.load._binary_field(pd.Series(values, name='plant_id_eia'),
+                                sql_type)
+    lengths, payload = pudl.load._binary_field(
+        pd.Series([-2.0 ** 31, np.nan, 2.0 ** 31 - 1]), sa.Integer())
+    assert list(lengths) == [4, -1, 4]
+    assert payload.tobytes() == struct.pack('>ii', -2 ** 31, 2 ** 31 - 1)
+
+
+def test_memory_usage_counts_objects():
+    """The memory estimate should include the strings in object columns."""
+    df = pd.DataFrame({
+        'x': np.arange(10000),
+        's': pd.Series([f'string number {i}' for i in range(10000)],
+                       dtype=object),
+    })
+    deep = df.memory_usage(deep=True).sum()
+    estimate = pudl.load._memory_usage(df, sample_size=100)
+    assert abs(estimate - deep) / deep < 0.05
+    assert estimate > df.memory_usage().sum()
+
+
+def _cems_df(state, plant_ids, unitids, datetimes):
+    """A few hourly_emissions_epacems records, with all of their columns."""
+    n = len(plant_ids)
+    operating_datetime = pd.to_datetime(datetimes)
+    df = pd.DataFrame({
+        'state': state,
+        'plant_name': [f'plant {i}' for i in plant_ids],
+        'plant_id_eia': plant_ids,
+        'unitid': unitids,
+        'operating_datetime': operating_datetime,
+        'operating_datetime_utc': operating_datetime + pd.Timedelta(hours=7),
+        'operating_time_interval': pd.Timedelta(hours=1),
+        'facility_id': np.arange(n, dtype=np.int16),
+        'unit_id_epa': np.arange(n),
+    })
+    for col in ['gross_load_mw', 'steam_load_1000_lbs', 'so2_mass_lbs',
+                'nox_rate_lbs_mmbtu', 'nox_mass_lbs', 'co2_mass_tons',
+                'heat_content_mmbtu']:
+        df[col] = np.linspace(0.0, 1.0, n, dtype=np.float32)
+    for col in ['so2_mass_measurement_code', 'nox_rate_measurement_code',
+                'nox_mass_measurement_code', 'co2_mass_measurement_code']:
+        df[col] = 'Measured'
+    return df
+
+
+def test_parquet_dump(tmpdir):
+    """Each year & state is sorted, and written to its own partition."""
+    import pyarrow.parquet as pq
+    outdir = str(tmpdir)
+    with pudl.load.ParquetDump('hourly_emissions_epacems', outdir,
+                               row_group_size=2) as p:
+        # Two months of CO, out of order, then one of AL.
+        p.add(_cems_df('CO', [7, 3], ['1', '2'],
+                       ['2016-02-01 00:00', '2016-02-01 00:00']),
+              year=2016, state='CO')
+        p.add(_cems_df('CO', [3, 3], ['2', '1'],
+                       ['2016-01-01 01:00', '2016-01-01 00:00']),
+              year=2016, state='CO')
+        p.add(_cems_df('AL', [5], ['A'], ['2017-03-01 00:00']),
+              year=2017, state='AL')
+
+    root = tmpdir.join('hourly_emissions_epacems')
+    assert sorted(str(path.relto(root)) for path in root.visit('*.parquet')) \
+        == ['year=2016/state=CO/hourly_emissions_epacems-2016-CO.parquet',
+            'year=2017/state=AL/hourly_emissions_epacems-2017-AL.parquet']
+
+    schema = pudl.load._arrow_schema('hourly_emissions_epacems',
+                                     exclude=('id', 'state'))
+    co = pq.read_table(str(root.join(
+        'year=2016/state=CO/hourly_emissions_epacems-2016-CO.parquet')))
+    assert co.schema.equals(schema)
+    co = co.to_pandas()
+    assert list(zip(co.plant_id_eia, co.unitid)) == \
+        [(3, '1'), (3, '2'), (3, '2'), (7, '1')]
+    assert list(co.operating_datetime[1:3]) == list(pd.to_datetime(
+        ['2016-01-01 01:00', '2016-02-01 00:00']))
+    assert co.gross_load_mw.dtype == np.float32
+    assert co.facility_id.dtype == np.int16
+
+    # Readers see the year & state from the directory names.
+    dataset = pq.read_table(str(root)).to_pandas()
+    assert len(dataset) == 5
+    assert sorted(dataset.state.astype(str).unique()) == ['AL', 'CO']
+
+
+def test_binary_dump_load(monkeypatch):
+    """The whole binary COPY stream, sent in chunks, with NA integers."""
+    import postgres_copy
+    copied = {}
+
+    def copy_from(source, tbl, engine, columns=(), format=None):
+        copied.update(data=source.read(), table=tbl.name, columns=columns,
+                      format=format)
+    monkeypatch.setattr(postgres_copy, 'copy_from', copy_from)
+
+    df = pd.DataFrame({
+        'plant_id_eia': [3, 7, 9],
+        'mine_id_pudl': [np.nan, 12.0, 5.0],
+    })
+    pudl.load._dump_load(df, 'fuel_receipts_costs_eia923', engine=None,
+                         copy_format='binary')
+    assert copied['table'] == 'fuel_receipts_costs_eia923'
+    assert copied['format'] == 'binary'
+    assert copied['columns'] == ('plant_id_eia', 'mine_id_pudl')
+    data = copied['data']
+    assert data.startswith(pudl.load._PGCOPY_HEADER)
+    assert data.endswith(pudl.load._PGCOPY_TRAILER)
+    rows = _decode_binary_copy_tuples(
+        data[len(pudl.load._PGCOPY_HEADER):-len(pudl.load._PGCOPY_TRAILER)])
+    assert rows == [[struct.pack('>i', i), None if m is None else
+                     struct.pack('>i', m)]
+                    for i, m in [(3, None), (7, 12), (9, 5)]]
+
+    # Chunking doesn't change what's sent.
+    pudl.load._binary_dump_load(df, 'fuel_receipts_costs_eia923', None,
+                                chunk_rows=2)
+    assert copied['data'] == data
+
+    with pytest.raises(ValueError):
+        pudl.load._dump_load(df, 'fuel_receipts_costs_eia923', None,
+                             copy_format='json')
+
+
+@pytest.fixture
+def pudl_test_engine():
+    """The PUDL test database, if there's one to connect to."""
+    import pudl.init
+    engine = pudl.init.connect_db(testing=True)
+    try:
+        engine.connect().close()
+    except sa.exc.OperationalError:
+        pytest.skip("The PUDL test database isn't available.")
+    return engine
+
+
+def _round_trip_values(sql_type):
+    """A few values of each type, including NULLs, to load into postgres."""
+    if isinstance(sql_type, sa.Enum):
+        return pd.Series([sql_type.enums[0], None, sql_type.enums[-1]],
+                         dtype=object)
+    if isinstance(sql_type, sa.String):
+        return pd.Series(['Café, "quoted"\nnewline', '', None],
+                         dtype=object)
+    if isinstance(sql_type, sa.Integer):
+        return pd.Series([-7, None, 32767], dtype='Int64')
+    if isinstance(sql_type, (sa.Float, sa.REAL)):
+        return pd.Series([1.5, np.nan, -2.25e10])
+    if isinstance(sql_type, sa.DateTime):
+        return pd.to_datetime(
+            pd.Series(['1999-12-31 23:59:59.123456', None,
+                       '2016-07-01 00:00:00.000000']))
+    if isinstance(sql_type, sa.Date):
+        return pd.to_datetime(pd.Series(['1970-01-01', None, '2016-02-29']))
+    if isinstance(sql_type, sa.Interval):
+        return pd.to_timedelta(pd.Series(['1 hour', None, '36:00:00.5']))
+    raise NotImplementedError(sql_type)
+
+
+@pytest.mark.parametrize('table_name', ['hourly_emissions_epacems',
+                                        'fuel_receipts_costs_eia923'])
+def test_binary_copy_round_trip(pudl_test_engine, table_name):
+    """Binary COPY loads exactly what CSV COPY does into a live database."""
+    import postgres_copy
+    schema = 'binary_copy_test'
+    tbl = pudl.models.entities.PUDLBase.metadata.tables[table_name]
+    metadata = sa.MetaData(schema=schema)
+    tables = {}
+    for copy_format in ['csv', 'binary']:
+        columns = []
+        for col in tbl.columns:
+            sql_type = col.type
+            if isinstance(sql_type, sa.Enum):
+                sql_type = sa.Enum(*sql_type.enums, name=sql_type.name,
+                                   schema=schema)
+            columns.append(sa.Column(col.name, sql_type))
+        tables[copy_format] = sa.Table(f'{table_name}_{copy_format}',
+                                       metadata, *columns)
+    df = pd.DataFrame({col.name: _round_trip_values(col.type)
+                       for col in tbl.columns})
+
+    with pudl_test_engine.connect() as conn:
+        conn.execute(f'DROP SCHEMA IF EXISTS {schema} CASCADE')
+        conn.execute(f'CREATE SCHEMA {schema}')
+        try:
+            metadata.create_all(conn)
+            postgres_copy.copy_from(
+                io.StringIO(df.to_csv(index=False)), tables['csv'], conn,
+                columns=tuple(df.columns), format='csv', header=True)
+            pudl.load.binary_copy([df.iloc[:2], df.iloc[2:]],
+                                  tables['binary'], conn, df.columns)
+            loaded = {}
+            for copy_format, table in tables.items():
+                result = conn.execute(sa.select([table]))
+                loaded[copy_format] = pd.DataFrame(result.fetchall(),
+                                                   columns=result.keys())
+        finally:
+            conn.execute(f'DROP SCHEMA {schema} CASCADE')
+    assert len(loaded['csv']) == len(df)
+    pd.testing.assert_frame_equal(loaded['binary'], loaded['csv'])
+
+
+def test_pipelined_bulk_copy(monkeypatch):
+    """add() waits when the queue is full, and writer errors come back."""
+    import threading
+    loaded = []
+    release = threading.Event()
+
+    def dump_load(df, table_name, engine, **kwargs):
+        release.wait()
+        if df.x.iloc[0] < 0:
+            raise RuntimeError("COPY failed")
+        loaded.append(list(df.x))
+    monkeypatch.setattr(pudl.load, '_dump_load', dump_load)
+
+    # With buffer=0 every add() spills. One spill is being loaded, and one
+    # fills the queue, so the third add() has to wait for the writer.
+    p = pudl.load.PipelinedBulkCopy('hourly_emissions_epacems', None,
+                                    buffer=0, copy_format='binary',
+                                    writers=1, queue_size=1)
+    p.add(pd.DataFrame({'x': [1]}))
+    p.add(pd.DataFrame({'x': [2]}))
+    third = threading.Thread(target=p.add, args=(pd.DataFrame({'x': [3]}),))
+    third.start()
+    third.join(timeout=0.5)
+    assert third.is_alive()
+    release.set()
+    third.join(timeout=10)
+    assert not third.is_alive()
+    p.__exit__(None, None, None)
+    assert loaded == [[1], [2], [3]]
+
+    # A failed COPY in a writer is raised by __exit__, rather than hanging.
+    def exit_with_failed_copy():
+        with pytest.raises(RuntimeError, match="COPY failed"):
+            with pudl.load.PipelinedBulkCopy(
+                    'hourly_emissions_epacems', None, buffer=0,
+                    copy_format='binary', writers=1, queue_size=1) as p:
+                p.add(pd.DataFrame({'x': [-1]}))
+                p.add(pd.DataFrame({'x': [4]}))
+        outcome.append('raised')
+    outcome = []
+    exiting = threading.Thread(target=exit_with_failed_copy)
+    exiting.start()
+    exiting.join(timeout=10)
+    assert not exiting.is_alive()
+    assert outcome == ['raised']
+    assert loaded == [[1], [2], [3]]